@@ -0,0 +1,113 @@
+"""Benchmark: motor vectorizado (dyno.analysis) frente al bucle original de finalizar_test.
+
+    python benchmarks/bench_analysis.py --sizes 10000 100000 1000000
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno.analysis import torque_power  # noqa: E402
+
+J = 0.000055776625
+REG_WINDOW_S = 0.35
+MIN_SAMPLES_REG = 4
+
+
+# ---- implementación original (copiada de rpm_dashboard.finalizar_test) ---- #
+def median_filter_legacy(values, window=3):
+    if len(values) < 1:
+        return []
+    if window <= 1:
+        return values[:]
+    out = []
+    half = window // 2
+    n = len(values)
+    for i in range(n):
+        start = max(0, i - half)
+        end = min(n, i + half + 1)
+        out.append(statistics.median(values[start:end]))
+    return out
+
+
+def slope_least_squares(ts, ys):
+    n = len(ts)
+    if n < 2:
+        return 0.0
+    sum_t = sum(ts)
+    sum_y = sum(ys)
+    sum_tt = sum(t*t for t in ts)
+    sum_ty = sum(t*y for t, y in zip(ts, ys))
+    denom = n * sum_tt - sum_t * sum_t
+    if abs(denom) < 1e-12:
+        return 0.0
+    return (n * sum_ty - sum_t * sum_y) / denom
+
+
+def torque_power_legacy(tiempos_lst, rpms_vals):
+    rpms_filtered = median_filter_legacy(rpms_vals, window=3)
+    omegas = [(2 * math.pi * r) / 60 for r in rpms_filtered]
+    torques = []
+    potencias = []
+    n = len(omegas)
+    for i in range(n):
+        ti = tiempos_lst[i]
+        j0 = i
+        while j0 > 0 and (ti - tiempos_lst[j0 - 1]) <= REG_WINDOW_S:
+            j0 -= 1
+        rec_ts = [t - tiempos_lst[j0] for t in tiempos_lst[j0:i+1]]
+        window_omegas = omegas[j0:i+1]
+        if len(rec_ts) >= MIN_SAMPLES_REG:
+            alpha = slope_least_squares(rec_ts, window_omegas)
+            total_dt = tiempos_lst[i] - tiempos_lst[j0]
+            if total_dt > 0 and total_dt <= REG_WINDOW_S:
+                torque_inst = J * alpha
+                torques.append(torque_inst)
+                potencias.append((torque_inst * window_omegas[-1]) / 745.7)
+    return torques, potencias
+# --------------------------------------------------------------------------- #
+
+
+def synthetic_run(n, rate_hz, seed=0):
+    """Arranque exponencial hasta ~12000 RPM con jitter de timestamps y ruido."""
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / rate_hz
+    ts = 1.7e9 + np.cumsum(dt * (1 + 0.2 * rng.standard_normal(n)).clip(0.2))
+    rel = ts - ts[0]
+    rpms = 12000 * (1 - np.exp(-rel / 4.0)) + 40 * rng.standard_normal(n)
+    return ts, rpms.clip(0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--rate", type=float, default=1000.0, help="Hz de muestreo sintético")
+    ap.add_argument("--legacy-max", type=int, default=100_000,
+                    help="no ejecutar el bucle original por encima de este tamaño")
+    args = ap.parse_args()
+
+    print(f"{'n':>9} {'vectorizado (s)':>16} {'original (s)':>13} {'speedup':>8} {'max |Δτ|':>10}")
+    for n in args.sizes:
+        ts, rpms = synthetic_run(n, args.rate)
+        t0 = time.perf_counter()
+        tq, pw = torque_power(ts, rpms, J, REG_WINDOW_S, MIN_SAMPLES_REG)
+        t_vec = time.perf_counter() - t0
+
+        if n <= args.legacy_max:
+            t0 = time.perf_counter()
+            tq_ref, pw_ref = torque_power_legacy(ts.tolist(), rpms.tolist())
+            t_ref = time.perf_counter() - t0
+            assert len(tq_ref) == len(tq), "distinto número de ventanas válidas"
+            err = float(np.max(np.abs(np.asarray(tq_ref) - tq))) if len(tq) else 0.0
+            print(f"{n:>9} {t_vec:>16.4f} {t_ref:>13.3f} {t_ref / t_vec:>7.0f}x {err:>10.2e}")
+        else:
+            print(f"{n:>9} {t_vec:>16.4f} {'—':>13} {'—':>8} {'—':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark de base de tiempos: trazas sintéticas con alpha conocida, reproducidas por un Enlace.
+
+    python benchmarks/bench_clock.py --rate 1000 --seconds 30 --drift 0 100 500
+
+Cada trama sale del dispositivo con su reloj (desfase + deriva) y llega al
+host en lecturas por bloques con latencia y paradas de planificación. Se
+compara alpha (pendiente de omega) sobre tres bases de tiempo: hora de
+lectura del host (como antes en ASCII / ``time.time()``), reloj del
+dispositivo con desfase fijo de la primera trama (método anterior en
+binario) y reloj del dispositivo corregido por ``EstimadorReloj``.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno.acquisition import Enlace, SampleRing  # noqa: E402
+from dyno.analysis import rpm_to_omega, sliding_slopes, window_starts  # noqa: E402
+from dyno.filters import median_filter  # noqa: E402
+from dyno.protocol import encode_frame  # noqa: E402
+
+H0 = 1.7e9          # epoch del host al empezar
+DEV_OFFSET = 3.25   # s de reloj del dispositivo al empezar la traza
+WINDOW_S = 0.35
+TAU = 4.0
+
+
+def traza(rate, seconds):
+    t = np.arange(1, int(rate * seconds) + 1) / rate
+    rpm = 12000 * (1 - np.exp(-t / TAU))
+    alpha = rpm_to_omega(12000 / TAU * np.exp(-t / TAU))
+    return t, rpm, alpha
+
+
+def lecturas(t, rng, poll_ms, stall_p, stall_ms):
+    """Hora (relativa) de la lectura en la que el host recibe cada trama."""
+    llegada = t + 12 * 10 / 115200 + rng.exponential(0.0002, len(t))
+    n = int(t[-1] * 1000 / poll_ms * 2) + 100
+    dt = rng.exponential(poll_ms / 1000, n)
+    stalls = rng.random(n) < stall_p
+    dt[stalls] += rng.uniform(stall_ms[0], stall_ms[1], stalls.sum()) / 1000
+    r = np.cumsum(dt)
+    idx = np.searchsorted(r, np.maximum.accumulate(llegada))
+    return r[np.minimum(idx, n - 1)]
+
+
+def alpha_en(ts, rpm):
+    omegas = rpm_to_omega(median_filter(rpm, 3))
+    return sliding_slopes(ts, omegas, window_starts(ts, WINDOW_S))
+
+
+def errores(ts, rpm, alpha_true, t_true):
+    a = alpha_en(ts, rpm)
+    ok = t_true > WINDOW_S
+    err = a[ok] - alpha_true[ok]
+    pico = abs(a[ok]).max() / abs(alpha_true[ok]).max() - 1
+    return np.sqrt(np.mean(err ** 2)) / abs(alpha_true).max() * 100, pico * 100
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rate", type=float, default=1000.0)
+    ap.add_argument("--seconds", type=float, default=30.0)
+    ap.add_argument("--drift", type=float, nargs="+", default=[0.0, 100.0, 500.0], help="ppm")
+    ap.add_argument("--poll-ms", type=float, default=2.0, help="periodo medio de lectura")
+    ap.add_argument("--stall-p", type=float, default=0.01, help="prob. de parada por lectura")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    t, rpm_true, alpha_true = traza(args.rate, args.seconds)
+    period = (60e6 / rpm_true).astype(np.int64)
+    rpm = 60e6 / period
+
+    print(f"{'ppm':>5} {'ppm est.':>9} {'base':>12} {'σ t (µs)':>9} {'máx |t| (ms)':>13} "
+          f"{'RMS α (%)':>10} {'pico α (%)':>11}")
+    for ppm in args.drift:
+        t_dev = DEV_OFFSET + t * (1 + ppm * 1e-6)
+        r = lecturas(t, rng, args.poll_ms, args.stall_p, (20, 60))
+
+        ring = SampleRing(1 << int(np.ceil(np.log2(len(t) + 1))))
+        enlace = Enlace(ring, "binario")
+        cortes = np.flatnonzero(np.diff(r)) + 1
+        for a, b in zip(np.r_[0, cortes], np.r_[cortes, len(t)]):
+            frames = b"".join(encode_frame(int(round(td * 1e6)), int(p), k)
+                              for k, (td, p) in enumerate(zip(t_dev[a:b], period[a:b]), start=a))
+            enlace.feed(frames, t_host=H0 + r[b - 1])
+        recs, _ = ring.read(0)
+        assert len(recs) == len(t), (len(recs), len(t))
+
+        bases = {
+            "host": H0 + r,
+            "1ª trama": t_dev + (H0 + r[0] - t_dev[0]),
+            "estimador": recs["t"],
+        }
+        for nombre, ts in bases.items():
+            dt = ts - (H0 + t)
+            dt -= np.median(dt)     # la latencia media no afecta a las derivadas
+            rms, pico = errores(ts, rpm, alpha_true, t)
+            est = f"{enlace.reloj.deriva_ppm:>9.1f}" if nombre == "estimador" else f"{'':>9}"
+            print(f"{ppm:>5.0f} {est} {nombre:>12} {dt.std() * 1e6:>9.1f} {abs(dt).max() * 1e3:>13.2f} "
+                  f"{rms:>10.2f} {pico:>+11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Benchmark de la compensación de pérdidas: error frente al par real del motor y coste.
+
+    python benchmarks/bench_curves.py --runs 8 --rate 2000 --noise 20
+
+Simula tiradas físicamente coherentes: ``J dω/dt = τ_motor(ω) - τ_pérdidas(ω)``
+al acelerar y ``-τ_pérdidas(ω)`` en la bajada libre, con las pérdidas
+cambiando de una tirada a otra (rodamientos en frío/caliente). Compara la
+potencia máxima sin compensar (``analizar_test``) y compensada
+(``analizar_curvas``) con la real del motor, y su dispersión entre tiradas.
+La curva media de todas (``agregar_curvas``) se compara con la real: qué
+parte cae dentro de la banda de confianza. Al final mide el agrupado por
+RPM frente a un bucle por casilla, y la agregación de cientos de runs.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno import config  # noqa: E402
+from dyno.analysis import HP_W, analizar_test, rpm_to_omega  # noqa: E402
+from dyno.curves import agregar_curvas, analizar_curvas, curva_rpm  # noqa: E402
+
+J = config.J
+W_MAX = rpm_to_omega(16000)
+
+
+def par_motor(w):
+    """Par del motor (N·m): máximo a media vuelta, cae a cero en W_MAX."""
+    return 0.03 * np.clip(1 - (w / W_MAX) ** 2 + 0.3 * (w / W_MAX) * (1 - w / W_MAX), 0, None)
+
+
+def tirada(rng, rate, escala, t_gas=5.0, t_bajada=9.0, ruido=0.0):
+    """(t, rpm) de una tirada y el modelo de pérdidas real (c0 + c1 ω + c2 ω²)·escala."""
+    c = np.array([1.5e-3, 2.0e-6, 3.0e-9]) * escala
+    perdidas = lambda w: c[0] + c[1] * w + c[2] * w * w  # noqa: E731
+    dt = 1 / rate
+    n_gas, n = int(t_gas * rate), int((t_gas + t_bajada) * rate)
+    w = np.empty(n)
+    w[0] = rpm_to_omega(300)
+    for i in range(1, n):      # Euler con el paso de muestreo (de sobra para esta dinámica)
+        motor = par_motor(w[i - 1]) if i < n_gas else 0.0
+        w[i] = max(w[i - 1] + dt * (motor - perdidas(w[i - 1])) / J, 0.0)
+    rpm = w * 60 / (2 * np.pi) + rng.normal(0, ruido, n)
+    return 1.7e9 + np.arange(n) * dt, np.maximum(rpm, 0), perdidas
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=8)
+    ap.add_argument("--rate", type=int, default=2000)
+    ap.add_argument("--noise", type=float, default=20.0, help="desviación del ruido (RPM)")
+    ap.add_argument("--agregar", type=int, default=500, help="runs en la prueba de agregación")
+    args = ap.parse_args()
+    rng = np.random.default_rng(1)
+    params = (config.REG_WINDOW_S, config.MIN_SAMPLES_REG, config.MEDIAN_WINDOW)
+
+    w = np.linspace(0, W_MAX, 4000)
+    p_real = float((par_motor(w) * w).max() / HP_W)
+    print(f"Potencia real del motor: {p_real:.4f} HP   (J = {J:g} kg·m², {args.rate} Hz, ruido {args.noise:g} RPM)")
+    print(f"{'tirada':>6} {'pérdidas':>9} {'sin comp. HP':>13} {'error':>7} {'compensada HP':>14} "
+          f"{'error':>7} {'err. pérdidas':>14} {'ms análisis':>12}")
+    crudas, comp, todas = [], [], []
+    for k in range(args.runs):
+        escala = rng.uniform(0.6, 1.6)
+        t, rpm, perdidas = tirada(rng, args.rate, escala, ruido=args.noise)
+        cruda = analizar_test(t, rpm, J, config.D, *params)["potencia_max"]
+        t0 = time.perf_counter()
+        c = analizar_curvas(t, rpm, J, *params)
+        ms = (time.perf_counter() - t0) * 1e3
+        m = c["perdidas"]
+        wb = np.linspace(m.omega_min, m.omega_max, 50)
+        err_modelo = np.abs(m(wb) - perdidas(wb)).max() / perdidas(wb).max()
+        todas.append(c)
+        crudas.append(cruda)
+        comp.append(c["potencia_corr_max"])
+        print(f"{k + 1:>6} {escala:>8.2f}x {cruda:>13.4f} {cruda / p_real - 1:>+7.1%} "
+              f"{c['potencia_corr_max']:>14.4f} {c['potencia_corr_max'] / p_real - 1:>+7.1%} "
+              f"{err_modelo:>14.1%} {ms:>12.1f}")
+    for nombre, v in (("sin compensar", crudas), ("compensada", comp)):
+        v = np.array(v)
+        print(f"{nombre:>14}: media {v.mean():.4f} HP, dispersión (CV) {v.std() / v.mean():.1%}")
+
+    agg = agregar_curvas(todas)
+    wa = rpm_to_omega(agg["rpm"])
+    real = par_motor(wa) * wa / HP_W
+    dentro = np.abs(agg["media"] - real) <= agg["ic"]
+    print(f"Curva media: {dentro.mean():.0%} de {len(dentro)} casillas con la potencia real dentro del IC 95 %, "
+          f"error medio {np.mean(np.abs(agg['media'] / real - 1)[real > 0.2 * real.max()]):.2%}")
+
+    # agrupado: una pasada con reduceat/bincount frente a una máscara por casilla
+    # (muestras en orden de llegada: una subida con ruido, no RPM al azar)
+    n = 2_000_000
+    r = np.linspace(0, 15000, n) + rng.normal(0, 30, n)
+    v = rng.normal(size=n)
+    t0 = time.perf_counter()
+    curva_rpm(r, {"v": v})
+    t_bc = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    k = np.floor(r / config.CURVA_BIN_RPM).astype(int)
+    [(r[k == i].mean(), v[k == i].mean()) for i in range(k.max() + 1)]
+    t_bucle = time.perf_counter() - t0
+    print(f"Agrupar {n:,} muestras en casillas de {config.CURVA_BIN_RPM} RPM: una pasada {t_bc * 1e3:.0f} ms, "
+          f"máscara por casilla {t_bucle * 1e3:.0f} ms")
+
+    # agregación de muchos runs: arrays concatenados frente a un dict por casilla
+    muchas = []
+    for i in range(args.agregar):
+        c = todas[i % len(todas)]
+        sub = {k: v * rng.normal(1, 0.02) if k not in ("bin", "n") else v for k, v in c["subida"].items()}
+        muchas.append({"bin_rpm": c["bin_rpm"], "subida": sub})
+    t0 = time.perf_counter()
+    agregar_curvas(muchas)
+    t_agg = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    por_casilla = {}
+    for c in muchas:
+        for b, v in zip(c["subida"]["bin"].tolist(), c["subida"]["potencia"].tolist()):
+            por_casilla.setdefault(b, []).append(v)
+    {b: (np.mean(v), np.std(v, ddof=1)) for b, v in por_casilla.items()}
+    t_dict = time.perf_counter() - t0
+    print(f"Agregar {args.agregar} runs: {t_agg * 1e3:.1f} ms (dict por casilla {t_dict * 1e3:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
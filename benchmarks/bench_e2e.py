@@ -0,0 +1,209 @@
+"""Benchmark de punta a punta: Arduino simulado -> lector serie -> ring -> análisis en vivo.
+
+    python benchmarks/bench_e2e.py                       # todos los escenarios, compara con la base
+    python benchmarks/bench_e2e.py --solo bin_20k --seconds 5
+    python benchmarks/bench_e2e.py --guardar             # fija la base de esta máquina
+
+Cada escenario arranca un ``FakeDevice`` en un proceso hijo (su CPU no cuenta)
+y lee con ``SerialReader.run`` en un hilo, como ``leer_datos``; el hilo
+principal drena cada ``SAMPLE_INTERVAL`` una ``Captura`` con
+``EstimadorTorque``, como el dashboard durante un test. Mide muestras/s
+recibidas, pérdidas (recibidas frente a las que el dispositivo entregó de
+verdad, sin contar las que pierde a propósito), latencia desde la escritura
+en el pty hasta el drenado y coste del análisis.
+
+Sale con código 1 si algún escenario pierde muestras, no llega a la tasa
+pedida o empeora respecto a la base (``e2e_base.json``) más de lo tolerado.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno import config  # noqa: E402
+from dyno.acquisition import SAMPLE_DTYPE, SampleRing, SerialReader  # noqa: E402
+from dyno.analysis import EstimadorTorque  # noqa: E402
+from dyno.clock import ahora  # noqa: E402
+from dyno.session import Captura  # noqa: E402
+from dyno.simulator import FakeDevice, tirada  # noqa: E402
+
+BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "e2e_base.json")
+
+# nombre -> argumentos de FakeDevice ("replay": (rate del run grabado, factor de velocidad))
+ESCENARIOS = {
+    "ascii_100": dict(protocolo="ascii", rate_hz=100),
+    "ascii_1k": dict(protocolo="ascii", rate_hz=1000),
+    "bin_1k": dict(protocolo="binario", rate_hz=1000),
+    "bin_5k": dict(protocolo="binario", rate_hz=5000),
+    "bin_20k": dict(protocolo="binario", rate_hz=20000),
+    "bin_5k_ruido": dict(protocolo="binario", rate_hz=5000, ruido_rpm=40, jitter=0.2,
+                         prob_perdida=0.002, corrupt_every=997, cortes=[(1.0, 0.25)]),
+    "replay_x8": dict(protocolo="binario", replay=(2000, 8)),
+}
+
+# tolerancias frente a la base: factor y margen absoluto
+TOL_LAT_P99 = (2.0, 10.0)       # ms
+TOL_ANALISIS = (2.0, 1.0)       # µs/muestra
+MAX_PERDIDA = 0.001             # fracción, en cualquier escenario
+MIN_TASA = 0.95                 # fracción de la tasa que el dispositivo entrega
+
+
+def run_grabado(rate, segundos=12.0):
+    """Run sintético de una tirada completa, como el que deja RunWriter."""
+    perfil = tirada()
+    t = 1.7e9 + np.arange(int(rate * segundos)) / rate
+    rec = np.zeros(len(t), dtype=SAMPLE_DTYPE)
+    rec["t"], rec["rpm"] = t, perfil(t - t[0]) + 1.0   # +1: Captura descarta rpm <= 0.5
+    return rec
+
+
+def _dispositivo(kw, conn):
+    kw = dict(kw)
+    if "replay" in kw:
+        rate, velocidad = kw.pop("replay")
+        dev = FakeDevice.replay(run_grabado(rate), velocidad, **kw)
+    else:
+        perfil = tirada()
+        dev = FakeDevice(rpm_fn=lambda t: perfil(t) + 1.0, **kw)
+    conn.send(dev.port)
+    conn.recv()                  # arrancar
+    dev.start()
+    conn.recv()                  # parar
+    dev.stop()
+    conn.send((dev.envios, dev.sent, dev.dropped + dev.corrupted + dev.cortadas))
+    conn.recv()                  # cerrar cuando el lector haya drenado
+    dev.close()
+
+
+def medir(kw, segundos):
+    padre, hijo = mp.Pipe()
+    proc = mp.get_context("fork").Process(target=_dispositivo, args=(kw, hijo), daemon=True)
+    proc.start()
+    port = padre.recv()
+
+    ring = SampleRing(1 << 20)
+    lector = SerialReader(port, 115200, ring, protocolo=kw["protocolo"])
+    hilo = threading.Thread(target=lector.run, daemon=True)
+    hilo.start()
+    lector.conectado.wait(timeout=5)
+    captura = Captura(ring, EstimadorTorque(config.J, config.D, config.REG_WINDOW_S,
+                                            config.MIN_SAMPLES_REG, config.MEDIAN_WINDOW))
+    captura.iniciar()
+
+    drenados = []               # (muestras recibidas acumuladas, hora del drenado)
+    t_analisis = 0.0
+    cpu0, t0 = time.process_time(), time.monotonic()
+    padre.send("start")
+    fin = t0 + segundos
+    while time.monotonic() < fin:
+        time.sleep(config.SAMPLE_INTERVAL)
+        a = time.perf_counter()
+        captura.drenar()
+        t_analisis += time.perf_counter() - a
+        drenados.append((ring.head, ahora()))
+    padre.send("stop")
+    envios, enviadas, perdidas_a_proposito = padre.recv()
+    time.sleep(0.3)             # lo que quede en el pty
+    a = time.perf_counter()
+    captura.drenar()
+    captura.terminar()
+    res = captura.resultado
+    t_analisis += time.perf_counter() - a
+    cpu = (time.process_time() - cpu0) / (time.monotonic() - t0)
+    lector.stop()
+    hilo.join(timeout=2)
+    padre.send("close")
+    proc.join(timeout=5)
+
+    entregadas = envios[-1][0] if envios else 0
+    recibidas = ring.head
+    acum = np.array([e[0] for e in envios])
+    t_env = np.array([e[1] for e in envios])
+    # latencia: del bloque que contenía la última muestra recibida hasta su drenado
+    # (solo drenados con muestras nuevas: en un corte o al acabar el replay no llega nada)
+    lat, previo = [], 0
+    for h, t in drenados:
+        if h > previo:
+            lat.append(t - t_env[min(np.searchsorted(acum, h), len(acum) - 1)])
+        previo = h
+    lat = np.array(lat) * 1000 if lat else np.zeros(1)
+    return {
+        "enviadas": enviadas,
+        "entregadas": entregadas,
+        "perdidas_a_proposito": perdidas_a_proposito,
+        "recibidas": recibidas,
+        "muestras_s": recibidas / segundos,
+        "tasa_entregada": entregadas / segundos,
+        "perdida": max(0.0, 1 - recibidas / entregadas) if entregadas else 1.0,
+        "lat_p50_ms": float(np.percentile(lat, 50)),
+        "lat_p99_ms": float(np.percentile(lat, 99)),
+        "analisis_us": t_analisis / max(recibidas, 1) * 1e6,
+        "cpu": cpu,
+        "torque_max": res["torque_max"] if res else 0.0,
+    }
+
+
+def regresiones(nombre, r, base):
+    fallos = []
+    if r["perdida"] > MAX_PERDIDA:
+        fallos.append(f"pérdida {r['perdida']:.2%}")
+    if r["muestras_s"] < MIN_TASA * r["tasa_entregada"]:
+        fallos.append(f"{r['muestras_s']:.0f} muestras/s de {r['tasa_entregada']:.0f}")
+    if r["torque_max"] <= 0:
+        fallos.append("sin resultado de análisis")
+    b = base.get(nombre)
+    if b:
+        lim = b["lat_p99_ms"] * TOL_LAT_P99[0] + TOL_LAT_P99[1]
+        if r["lat_p99_ms"] > lim:
+            fallos.append(f"latencia p99 {r['lat_p99_ms']:.1f} ms (base {b['lat_p99_ms']:.1f})")
+        lim = b["analisis_us"] * TOL_ANALISIS[0] + TOL_ANALISIS[1]
+        if r["analisis_us"] > lim:
+            fallos.append(f"análisis {r['analisis_us']:.2f} µs/muestra (base {b['analisis_us']:.2f})")
+    return fallos
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=3.0, help="por escenario")
+    ap.add_argument("--solo", nargs="+", choices=sorted(ESCENARIOS), help="escenarios a medir")
+    ap.add_argument("--base", default=BASE, help="JSON con la base de comparación")
+    ap.add_argument("--guardar", action="store_true", help="guarda los resultados como base")
+    args = ap.parse_args()
+
+    base = {}
+    if os.path.exists(args.base) and not args.guardar:
+        with open(args.base) as f:
+            base = json.load(f)
+
+    print(f"{'escenario':>13} {'recibidas':>10} {'muestras/s':>11} {'pérdida':>8} {'lat p50':>8} "
+          f"{'lat p99':>8} {'µs/muestra':>11} {'CPU %':>6}  resultado")
+    resultados, fallidos = {}, 0
+    for nombre in args.solo or ESCENARIOS:
+        r = medir(ESCENARIOS[nombre], args.seconds)
+        resultados[nombre] = r
+        fallos = [] if args.guardar else regresiones(nombre, r, base)
+        fallidos += bool(fallos)
+        print(f"{nombre:>13} {r['recibidas']:>10} {r['muestras_s']:>11.0f} {r['perdida']:>8.2%} "
+              f"{r['lat_p50_ms']:>8.1f} {r['lat_p99_ms']:>8.1f} {r['analisis_us']:>11.2f} "
+              f"{r['cpu'] * 100:>6.1f}  {'FALLO: ' + '; '.join(fallos) if fallos else 'ok'}")
+
+    if args.guardar:
+        base.update({n: {k: r[k] for k in ("muestras_s", "lat_p99_ms", "analisis_us")}
+                     for n, r in resultados.items()})
+        with open(args.base, "w") as f:
+            json.dump(base, f, indent=2)
+        print(f"Base guardada en {args.base}")
+    elif fallidos:
+        print(f"{fallidos} escenario(s) con regresión")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
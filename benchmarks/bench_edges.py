@@ -0,0 +1,121 @@
+"""Benchmark del modo de flancos: capacidad del host, resolución del torque y tabla de imanes.
+
+    python benchmarks/bench_edges.py --pulsos 100 --seconds 5 --min-edges 50000
+
+1. Capacidad: los lotes de flancos de una tirada con ``--pulsos`` por vuelta
+   (100 a 12000 RPM son 20 000 flancos/s) se pasan al ``Enlace`` en trozos de
+   4 KB, como llegan del puerto, y se mide cuántos flancos por segundo
+   convierte a muestras. Sale con código 1 si no llega a ``--min-edges``.
+2. Resolución: en una tirada corta y dura (de 600 a 12000 RPM en ~0,25 s)
+   se compara con el real (``J·dω/dt`` del perfil) el torque máximo sacado
+   de los flancos y de líneas ``RPM: n`` promediadas por el Arduino cada
+   50 ms, con la ventana de regresión de siempre y con una corta.
+3. Imanes: con 4 imanes mal repartidos, ondulación de la velocidad entre
+   pulsos y error del torque sin tabla y con la tabla medida por
+   ``calibrar_espaciado``.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno.acquisition import Enlace, SampleRing  # noqa: E402
+from dyno.analysis import omega_alpha  # noqa: E402
+from dyno.config import J, MIN_SAMPLES_REG, MEDIAN_WINDOW, REG_WINDOW_S  # noqa: E402
+from dyno.protocol import encode_edge_batches  # noqa: E402
+from dyno.pulses import calibrar_espaciado, ondulacion, rpm_flancos  # noqa: E402
+from dyno.simulator import tirada  # noqa: E402
+
+PROMEDIO_ARDUINO_S = 0.05
+IMANES = [0.26, 0.24, 0.255, 0.245]
+TAU_S = 0.06    # tirada dura: subida logística centrada en 0,5 s
+
+
+def tirada_dura(t):
+    return 600 + 11400 / (1 + np.exp(-(np.asarray(t) - 0.5) / TAU_S))
+
+
+def flancos(perfil, duracion, pulsos, espaciado=None, paso=2e-5):
+    """Instantes (s) de cada flanco del perfil y la curva real (t, rpm) con la que se integró."""
+    t = np.arange(0, duracion, paso)
+    rpm = perfil(t)
+    vueltas = np.concatenate(([0.0], np.cumsum((rpm[1:] + rpm[:-1]) / 2 * paso))) / 60
+    k = np.arange(int(vueltas[-1] * pulsos))
+    inicio = np.arange(pulsos) / pulsos if espaciado is None else np.concatenate(([0.0], np.cumsum(espaciado)[:-1]))
+    pos = k // pulsos + inicio[k % pulsos]
+    pos = pos[(pos > 0) & (pos <= vueltas[-1])]
+    return np.interp(pos, vueltas, t), (t, rpm)
+
+
+def lineas_arduino(t_fl, pulsos, duracion):
+    """Lo que manda el firmware de líneas: flancos contados cada 50 ms, al final de la ventana."""
+    bordes = np.arange(0, duracion + PROMEDIO_ARDUINO_S, PROMEDIO_ARDUINO_S)
+    cuenta, _ = np.histogram(t_fl, bordes)
+    return bordes[1:], cuenta / pulsos / PROMEDIO_ARDUINO_S * 60
+
+
+def torque_max(ts, rpms, ventana, filtro=MEDIAN_WINDOW):
+    _, alpha, valid = omega_alpha(ts, rpms, ventana, MIN_SAMPLES_REG, filtro)
+    return J * float(alpha[valid].max()) if valid.any() else float("nan")
+
+
+def capacidad(pulsos, seconds):
+    perfil = tirada(t_subida=1.0, t_meseta=1.0, t_bajada=seconds - 2.5)
+    t_fl, _ = flancos(perfil, seconds, pulsos)
+    datos = b"".join(encode_edge_batches(np.rint(t_fl * 1e6).astype(np.int64), 0, 64))
+    enlace = Enlace(SampleRing(1 << 22), "flancos", pulsos)
+    t0 = time.perf_counter()
+    for i in range(0, len(datos), 4096):
+        enlace.feed(datos[i:i + 4096], t_host=i / len(datos) * seconds)
+    dt = time.perf_counter() - t0
+    return len(t_fl), len(datos), dt, enlace.ring.head
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--pulsos", type=int, default=100, help="pulsos por vuelta para la capacidad y la resolución")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--min-edges", type=float, default=50000, help="flancos/s que tiene que aguantar el host")
+    args = ap.parse_args()
+
+    n, nbytes, dt, muestras = capacidad(args.pulsos, args.seconds)
+    ritmo = n / dt
+    print(f"Capacidad: {n:,} flancos ({n / args.seconds:,.0f}/s de media, {nbytes / args.seconds / 1e3:.0f} kB/s "
+          f"por el puerto) -> {muestras:,} muestras en {dt * 1e3:.0f} ms = {ritmo:,.0f} flancos/s "
+          f"({dt / args.seconds:.1%} de un núcleo)")
+
+    duracion = 1.2
+    t_fl, (t_ref, rpm_ref) = flancos(tirada_dura, duracion, args.pulsos)
+    real = J * float(np.max(np.gradient(rpm_ref, t_ref))) * 2 * np.pi / 60
+    fuentes = {"flancos": rpm_flancos(t_fl, np.arange(len(t_fl)), args.pulsos),
+               "RPM: n cada 50 ms": lineas_arduino(t_fl, args.pulsos, duracion)}
+    print(f"\nResolución (tirada dura, torque máximo real {real:.5f} N·m):")
+    print(f"{'fuente':>18} {'muestras':>9} " + " ".join(f"{f'ventana {v * 1e3:.0f} ms':>18}" for v in (REG_WINDOW_S, 0.05)))
+    for nombre, (ts, rpms) in fuentes.items():
+        celdas = []
+        for v in (REG_WINDOW_S, 0.05):
+            tq = torque_max(ts, rpms, v)
+            celdas.append("sin datos" if np.isnan(tq) else f"{tq:.5f} ({(tq - real) / real:+.0%})")
+        print(f"{nombre:>18} {len(ts):>9} " + " ".join(f"{c:>18}" for c in celdas))
+
+    t_fl, _ = flancos(tirada_dura, duracion, 4, IMANES)
+    k = np.arange(len(t_fl))
+    meseta = t_fl > 0.9
+    tabla = calibrar_espaciado(t_fl[meseta], k[meseta], 4)
+    print(f"\nImanes {IMANES} -> tabla medida en la meseta {np.round(tabla, 4).tolist()}")
+    for nombre, e in (("sin tabla", None), ("con tabla", tabla)):
+        ts, rpms = rpm_flancos(t_fl, k, 4, e)
+        tq = torque_max(ts, rpms, 0.05, filtro=1)
+        print(f"  {nombre:>10}: ondulación entre pulsos {ondulacion(rpms[ts > 0.9]):.2%}, "
+              f"torque máx (ventana 50 ms) {tq:.5f} ({(tq - real) / real:+.0%})")
+
+    if ritmo < args.min_edges:
+        print(f"No llega a {args.min_edges:,.0f} flancos/s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
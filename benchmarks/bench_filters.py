@@ -0,0 +1,61 @@
+"""Benchmark del filtro mediano: original (statistics.median por muestra) vs lotes vs streaming.
+
+    python benchmarks/bench_filters.py --n 200000 --windows 3 15 51
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno.filters import RunningMedian, median_filter  # noqa: E402
+
+
+def median_filter_legacy(values, window=3):
+    out = []
+    half = window // 2
+    n = len(values)
+    for i in range(n):
+        start = max(0, i - half)
+        end = min(n, i + half + 1)
+        out.append(statistics.median(values[start:end]))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--windows", type=int, nargs="+", default=[3, 15, 51])
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    v = 8000 + 300 * rng.standard_normal(args.n)
+    vl = v.tolist()
+
+    print(f"{'ventana':>7} {'original (s)':>13} {'lotes (s)':>10} {'streaming (s)':>14} {'µs/muestra':>11}")
+    for w in args.windows:
+        t0 = time.perf_counter()
+        ref = median_filter_legacy(vl, w)
+        t_ref = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batch = median_filter(v, w)
+        t_batch = time.perf_counter() - t0
+
+        rm = RunningMedian(w)
+        t0 = time.perf_counter()
+        stream = []
+        for x in vl:
+            stream.extend(rm.push(x))
+        stream.extend(rm.flush())
+        t_stream = time.perf_counter() - t0
+
+        assert np.allclose(ref, batch) and np.allclose(ref, stream)
+        print(f"{w:>7} {t_ref:>13.3f} {t_batch:>10.3f} {t_stream:>14.3f} {1e6 * t_stream / args.n:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark del historial SQLite: consultas típicas sobre cien mil tests.
+
+    python benchmarks/bench_history.py --tests 100000 --motors 40 --escs 12
+
+Llena una base temporal con tests sintéticos repartidos en un año (motores,
+ESC y bancos al azar) y mide: alta de un test (lo que hace el dashboard al
+terminar cada uno), las 20 mejores tiradas de un motor este mes, la potencia
+media por ESC, y páginas de la tabla del historial (la primera y la 500)
+por clave frente a ``OFFSET``. Cada consulta se repite y se da la mediana.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno.history import Historial  # noqa: E402
+
+
+def tests_sinteticos(rng, n, motores, escs):
+    fin = time.time()
+    creado = np.sort(fin - rng.uniform(0, 365 * 86400, n))
+    motor = rng.integers(0, motores, n)
+    esc = rng.integers(0, escs, n)
+    # potencia según el motor, con dispersión entre tiradas
+    p = 0.05 + 0.01 * motor + rng.normal(0, 0.005, n)
+    for i in range(n):
+        yield {
+            "run": f"/runs/{i:07d}", "creado": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(creado[i])),
+            "test": i % 5 + 1, "automatico": int(i % 3 == 0), "n": 20000,
+            "banco": f"banco{i % 4 + 1}", "motor": f"motor{motor[i]:02d}", "esc": f"esc{esc[i]:02d}",
+            "firmware": "1.2", "J": 5.6e-5, "D": 0.055, "reg_window_s": 0.35, "min_samples_reg": 4,
+            "median_window": 3, "rpm_max": 10000 + 400 * motor[i], "velocidad_max": 100.0,
+            "torque_max": 0.04, "potencia_max": p[i] * 0.9, "torque_corr_max": 0.05,
+            "potencia_corr_max": p[i], "rpm_potencia_max": 8000.0, "origen_perdidas": "bajada",
+        }
+
+
+def mediana_ms(fn, repeat):
+    t = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        t.append(time.perf_counter() - t0)
+    return float(np.median(t)) * 1e3
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--tests", type=int, default=100_000)
+    ap.add_argument("--motors", type=int, default=40)
+    ap.add_argument("--escs", type=int, default=12)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as d:
+        h = Historial(os.path.join(d, "historial.sqlite"))
+        t0 = time.perf_counter()
+        h.registrar_muchos(tests_sinteticos(rng, args.tests, args.motors, args.escs))
+        print(f"{len(h):,} tests importados en {time.perf_counter() - t0:.1f} s "
+              f"({os.path.getsize(h.path) / 2**20:.0f} MB con índices)")
+
+        fila = next(tests_sinteticos(rng, 1, args.motors, args.escs))
+        k = iter(range(10 ** 6))
+        def alta():
+            h.registrar_muchos([dict(fila, run=f"/nuevo/{next(k)}")])
+        mes = time.strftime("%Y-%m")
+        consultas = {
+            "alta de un test": alta,
+            "20 mejores de un motor este mes": lambda: h.mejores("potencia_corr_max", 20, motor="motor07", desde=mes),
+            "20 mejores de un motor (todo)": lambda: h.mejores("potencia_corr_max", 20, motor="motor07"),
+            "potencia media por ESC (todo)": lambda: h.media_por("esc", "potencia_max"),
+            "potencia media por ESC este mes": lambda: h.media_por("esc", "potencia_max", desde=mes),
+            "primera página (100)": lambda: h.pagina(limite=100),
+        }
+        for nombre, fn in consultas.items():
+            print(f"  {nombre:<34} {mediana_ms(fn, args.repeat):>8.2f} ms")
+
+        cursor = None
+        for _ in range(500):
+            _, cursor = h.pagina(orden="potencia_corr_max", limite=100, despues=cursor)
+        print(f"  {'página 500 por clave':<34} "
+              f"{mediana_ms(lambda: h.pagina(orden='potencia_corr_max', limite=100, despues=cursor), args.repeat):>8.2f} ms")
+        offset = lambda: h.db.execute("SELECT * FROM tests ORDER BY potencia_corr_max DESC, id DESC "  # noqa: E731
+                                      "LIMIT 100 OFFSET 50000").fetchall()
+        print(f"  {'página 500 con OFFSET':<34} {mediana_ms(offset, args.repeat):>8.2f} ms")
+        h.close()
+
+
+if __name__ == "__main__":
+    main()
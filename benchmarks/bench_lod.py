@@ -0,0 +1,83 @@
+"""Benchmark del diezmado min/max: coste por drenado, consulta y frame de LivePlot con y sin LOD.
+
+    python benchmarks/bench_lod.py --rates 200 2000 20000 --duration 60
+"""
+import argparse
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno.lod import PiramideMinMax, minmax_decimate  # noqa: E402
+from dyno.render import LivePlot  # noqa: E402
+
+D = 0.055
+DRENADO_S = 0.05   # SAMPLE_INTERVAL del dashboard
+
+
+def senal(n, duracion, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, duracion, n)
+    rpm = 12000 * (1 - np.exp(-t / (duracion / 4))) + rng.normal(0, 40, n)
+    rpm[rng.integers(n)] += 3000   # pico aislado que no debe perderse
+    return t, rpm
+
+
+def frame_ms(xs, ys, duracion, frames=10):
+    fig, (ax_line, ax_bar) = plt.subplots(2, 1, figsize=(9.5, 6), sharex=True)
+    live = LivePlot(fig.canvas, ax_line, ax_bar, D, duracion, "C0")
+    live.reset()
+    live.update(xs, ys)
+    t0 = time.perf_counter()
+    for k in range(frames):
+        m = len(xs) * (k + 1) // (frames + 1)   # el test va creciendo; la escala ya está fijada
+        live.update(xs[:m], ys[:m])
+    plt.close(fig)
+    return (time.perf_counter() - t0) / frames * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rates", type=int, nargs="+", default=[200, 2000, 20000], help="muestras/s")
+    ap.add_argument("--duration", type=float, default=60.0, help="s por test")
+    ap.add_argument("--max-puntos", type=int, default=2000)
+    ap.add_argument("--raw-max", type=int, default=200_000, help="no medir el frame sin LOD por encima de esto")
+    args = ap.parse_args()
+
+    print(f"{'Hz':>6} {'muestras':>9} {'drenado (ms)':>13} {'puntos() (ms)':>14} {'pts':>5} "
+          f"{'decimate (ms)':>14} {'frame LOD (ms)':>15} {'frame crudo (ms)':>17}")
+    for rate in args.rates:
+        n = int(rate * args.duration)
+        t, rpm = senal(n, args.duration)
+        lote = max(1, int(rate * DRENADO_S))
+
+        lod = PiramideMinMax()
+        t0 = time.perf_counter()
+        for i in range(0, n, lote):
+            lod.extend(t[i:i + lote], rpm[i:i + lote])
+        t_drenado = (time.perf_counter() - t0) / -(-n // lote) * 1000
+
+        t0 = time.perf_counter()
+        xs, ys = lod.puntos(args.max_puntos)
+        t_puntos = (time.perf_counter() - t0) * 1000
+        assert ys.max() == rpm.max() and ys.min() == rpm.min(), "la pirámide perdió un pico"
+        assert len(xs) <= args.max_puntos
+
+        t0 = time.perf_counter()
+        xd, yd = minmax_decimate(t, rpm, args.max_puntos)
+        t_dec = (time.perf_counter() - t0) * 1000
+        assert yd.max() == rpm.max() and yd.min() == rpm.min(), "minmax_decimate perdió un pico"
+
+        f_lod = frame_ms(xs, ys, args.duration)
+        f_raw = f"{frame_ms(t, rpm, args.duration, frames=3):.1f}" if n <= args.raw_max else "—"
+        print(f"{rate:>6} {n:>9} {t_drenado:>13.3f} {t_puntos:>14.2f} {len(xs):>5} "
+              f"{t_dec:>14.2f} {f_lod:>15.1f} {f_raw:>17}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark del coste de la instrumentación (dyno.metrics) en el camino caliente.
+
+    python benchmarks/bench_metrics.py --rate 20000 --seconds 10
+
+Reproduce el mismo flujo (tramas binarias en bloques como las lecturas del
+puerto, drenado por lotes en una Captura con EstimadorTorque) con las
+métricas apagadas y encendidas (alternando, el mejor de ``--repeat``), y el
+coste de un ``cronometro`` suelto en cada estado.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno import config  # noqa: E402
+from dyno.acquisition import Enlace, SampleRing  # noqa: E402
+from dyno.analysis import EstimadorTorque  # noqa: E402
+from dyno.metrics import METRICAS  # noqa: E402
+from dyno.protocol import encode_frame  # noqa: E402
+from dyno.session import Captura  # noqa: E402
+
+LECTURA_S = 0.002   # un read() del puerto cada 2 ms
+
+
+def bloques(rate, seconds):
+    n = int(rate * seconds)
+    t = np.arange(1, n + 1) / rate
+    period = (60e6 / (12000 * (1 - np.exp(-t / 4)) + 100)).astype(np.int64)
+    frames = [encode_frame(int(ti * 1e6), int(p), k & 0xFFFF) for k, (ti, p) in enumerate(zip(t, period))]
+    por_lectura = max(1, int(rate * LECTURA_S))
+    return [b"".join(frames[i:i + por_lectura]) for i in range(0, n, por_lectura)], n
+
+
+def pasada(datos, drenar_cada):
+    ring = SampleRing(1 << 18)
+    enlace = Enlace(ring, "binario")
+    cap = Captura(ring, EstimadorTorque(config.J, config.D, config.REG_WINDOW_S,
+                                        config.MIN_SAMPLES_REG, config.MEDIAN_WINDOW))
+    cap.iniciar()
+    cap.t0 = -np.inf   # las muestras sintéticas empiezan antes del t0 real
+    t_host = 1.7e9
+    t0 = time.perf_counter()
+    for i, d in enumerate(datos):
+        t_host += LECTURA_S
+        enlace.feed(d, t_host=t_host)
+        if i % drenar_cada == 0:
+            cap.drenar()
+    cap.terminar()
+    return time.perf_counter() - t0
+
+
+def coste_cronometro(n=200_000):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with METRICAS.cronometro("bench_vacio_segundos"):
+            pass
+    return (time.perf_counter() - t0) / n
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rate", type=int, default=20000)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    datos, n = bloques(args.rate, args.seconds)
+    drenar_cada = max(1, int(config.SAMPLE_INTERVAL / LECTURA_S))
+    tiempos = {False: np.inf, True: np.inf}
+    cronos = {}
+    for _ in range(args.repeat):
+        for activo in (False, True):
+            METRICAS.activo = activo
+            METRICAS.reset()
+            tiempos[activo] = min(tiempos[activo], pasada(datos, drenar_cada))
+            cronos[activo] = coste_cronometro()
+    print(f"{n} muestras a {args.rate} Hz, {len(datos)} lecturas")
+    for activo, t in tiempos.items():
+        print(f"  métricas {'encendidas' if activo else 'apagadas':>10}: {t * 1e3:8.1f} ms "
+              f"({t / n * 1e9:6.0f} ns/muestra) · cronometro {cronos[activo] * 1e9:5.0f} ns")
+    print(f"  sobrecoste: {(tiempos[True] / tiempos[False] - 1) * 100:+.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark multi-banco: N puertos simulados leídos por un único BucleSerie frente a un hilo por puerto.
+
+    python benchmarks/bench_multi.py --stands 1 2 4 8 --rate 2000 --seconds 4
+
+Los FakeDevice corren en un proceso hijo, así que la CPU medida es solo la de
+lectura y decodificación. La última columna estima la RSS de la alternativa
+anterior: un proceso Python con numpy + matplotlib por banco.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno.acquisition import SampleRing, SerialReader  # noqa: E402
+from dyno.simulator import FakeDevice  # noqa: E402
+from dyno.stand import Banco, BucleSerie  # noqa: E402
+
+CAPACIDAD = 1 << 18
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def rss_proceso_por_banco():
+    code = ("import numpy, serial, matplotlib; matplotlib.use('Agg'); import matplotlib.pyplot, os; "
+            "print(int(open('/proc/self/statm').read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20)")
+    return float(subprocess.check_output([sys.executable, "-c", code]).decode())
+
+
+def _dispositivos(n, rate, conn):
+    devs = [FakeDevice(protocolo="binario", rate_hz=rate) for _ in range(n)]
+    conn.send([d.port for d in devs])
+    conn.recv()                      # arrancar
+    for d in devs:
+        d.start()
+    conn.recv()                      # parar
+    for d in devs:
+        d.stop()
+    conn.send(sum(d.sent for d in devs))
+    conn.recv()                      # cerrar cuando el lector haya drenado
+    for d in devs:
+        d.close()
+
+
+def medir(modo, n, rate, seconds):
+    padre, hijo = mp.Pipe()
+    proc = mp.get_context("fork").Process(target=_dispositivos, args=(n, rate, hijo), daemon=True)
+    proc.start()
+    ports = padre.recv()
+    rss0 = rss_mb()
+
+    if modo == "bucle":
+        bancos = [Banco(f"b{k}", p, 115200, capacidad=CAPACIDAD) for k, p in enumerate(ports)]
+        lectores = [BucleSerie(bancos)]
+        rings = [b.ring for b in bancos]
+    else:
+        rings = [SampleRing(CAPACIDAD) for _ in ports]
+        lectores = [SerialReader(p, 115200, r) for p, r in zip(ports, rings)]
+    hilos = [threading.Thread(target=lec.run, daemon=True) for lec in lectores]
+    for h in hilos:
+        h.start()
+    time.sleep(0.3)
+
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    padre.send("start")
+    time.sleep(seconds)
+    padre.send("stop")
+    enviadas = padre.recv()
+    time.sleep(0.5)                  # drenar lo pendiente en los pty
+    cpu = time.process_time() - cpu0
+    wall = time.perf_counter() - t0
+    rss = rss_mb() - rss0
+    for lec in lectores:
+        lec.stop()
+    for h in hilos:
+        h.join(timeout=2)
+    padre.send("close")
+    proc.join(timeout=5)
+    recibidas = sum(r.head for r in rings)
+    return enviadas, recibidas, 100 * cpu / wall, rss, len(hilos)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--stands", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--rate", type=float, default=2000.0, help="muestras/s por banco")
+    ap.add_argument("--seconds", type=float, default=4.0)
+    args = ap.parse_args()
+
+    por_proceso = rss_proceso_por_banco()
+    print(f"{'bancos':>6} {'modo':>6} {'hilos':>5} {'enviadas':>9} {'recibidas':>10} {'CPU %':>6} "
+          f"{'RSS +MB':>8} {'1 proceso/banco (MB)':>21}")
+    for n in args.stands:
+        for modo in ("bucle", "hilos"):
+            enviadas, recibidas, cpu, rss, hilos = medir(modo, n, args.rate, args.seconds)
+            print(f"{n:>6} {modo:>6} {hilos:>5} {enviadas:>9} {recibidas:>10} {cpu:>6.1f} "
+                  f"{rss:>8.1f} {n * por_proceso:>21.0f}")
+            if modo == "bucle":
+                assert recibidas >= 0.99 * enviadas, (recibidas, enviadas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark de EstimadorTorque: coste por muestra, espera al terminar y diferencia con analizar_test.
+
+    python benchmarks/bench_online.py --rates 200 2000 20000 --seconds 15
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno import config  # noqa: E402
+from dyno.analysis import EstimadorTorque, analizar_test  # noqa: E402
+
+LOTE_S = config.SAMPLE_INTERVAL   # el dashboard drena cada SAMPLE_INTERVAL
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rates", type=int, nargs="+", default=[200, 2000, 20000])
+    ap.add_argument("--seconds", type=float, default=15.0)
+    ap.add_argument("--median-window", type=int, default=config.MEDIAN_WINDOW)
+    args = ap.parse_args()
+    params = (config.J, config.D, config.REG_WINDOW_S, config.MIN_SAMPLES_REG, args.median_window)
+
+    print(f"{'Hz':>6} {'muestras':>9} {'µs/muestra':>11} {'CPU %':>6} {'flush (ms)':>11} "
+          f"{'lotes (ms)':>11} {'máx dif. rel.':>14}")
+    rng = np.random.default_rng(0)
+    for rate in args.rates:
+        n = int(rate * args.seconds)
+        t = 1.7e9 + np.cumsum(rng.uniform(0.5, 1.5, n) / rate)
+        rpm = np.abs(12000 * (1 - np.exp(-(t - t[0]) / 4)) + rng.normal(0, 30, n))
+        lote = max(1, int(rate * LOTE_S))
+
+        est = EstimadorTorque(*params)
+        t0 = time.perf_counter()
+        for i in range(0, n, lote):
+            est.extend(t[i:i + lote], rpm[i:i + lote])
+        t_stream = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        res = est.flush()
+        t_flush = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        ref = analizar_test(t, rpm, *params)
+        t_lotes = time.perf_counter() - t0
+        dif = max(abs(res[k] - ref[k]) / (abs(ref[k]) or 1) for k in ref)
+        assert dif < 1e-9, (res, ref)
+        print(f"{rate:>6} {n:>9} {t_stream / n * 1e6:>11.2f} {t_stream / args.seconds * 100:>6.1f} "
+              f"{t_flush * 1e3:>11.3f} {t_lotes * 1e3:>11.1f} {dif:>14.1e}")
+
+
+if __name__ == "__main__":
+    main()
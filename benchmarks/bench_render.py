@@ -0,0 +1,72 @@
+"""Benchmark de frame: ax_bar.clear() + bar() + draw() frente a LivePlot (blitting), sobre Agg.
+
+    python benchmarks/bench_render.py --points 100 500 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno.render import LivePlot  # noqa: E402
+
+D = 0.055
+DURACION = 15
+
+
+def figura():
+    fig, (ax_line, ax_bar) = plt.subplots(2, 1, figsize=(9.5, 6), sharex=True)
+    return fig, ax_line, ax_bar
+
+
+def frame_original(fig, ax_line, linea, ax_bar, xs, rpms):
+    ax_line.set_ylim(0, max(2000, max(rpms) * 1.1))
+    linea.set_data(xs, rpms)
+    ax_bar.clear()
+    ax_bar.set_xlim(0, DURACION)
+    ax_bar.bar(xs, [(r * np.pi * D * 60) / 1000 for r in rpms], width=0.08, alpha=0.9)
+    fig.canvas.draw()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--points", type=int, nargs="+", default=[100, 500, 2000])
+    ap.add_argument("--frames", type=int, default=30)
+    args = ap.parse_args()
+
+    print(f"{'puntos':>7} {'original (ms)':>14} {'LivePlot (ms)':>14}")
+    for n in args.points:
+        xs = np.linspace(0, DURACION, n)
+        rpms = 12000 * (1 - np.exp(-xs / 4))
+
+        fig, ax_line, ax_bar = figura()
+        linea, = ax_line.plot([], [])
+        ax_line.set_xlim(0, DURACION)
+        t0 = time.perf_counter()
+        for k in range(args.frames):
+            m = max(2, n * (k + 1) // args.frames)
+            frame_original(fig, ax_line, linea, ax_bar, xs[:m].tolist(), rpms[:m].tolist())
+        t_orig = (time.perf_counter() - t0) / args.frames * 1000
+        plt.close(fig)
+
+        fig, ax_line, ax_bar = figura()
+        live = LivePlot(fig.canvas, ax_line, ax_bar, D, DURACION, "C0")
+        live.reset()
+        live.update(xs, rpms)  # fija la escala final para medir solo frames con blit
+        t0 = time.perf_counter()
+        for k in range(args.frames):
+            m = max(2, n * (k + 1) // args.frames)
+            live.update(xs[:m], rpms[:m])
+        t_live = (time.perf_counter() - t0) / args.frames * 1000
+        plt.close(fig)
+
+        print(f"{n:>7} {t_orig:>14.1f} {t_live:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
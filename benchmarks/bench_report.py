@@ -0,0 +1,82 @@
+"""Benchmark del informe PDF: generar_informe (figura plantilla, OO) frente al método pyplot original.
+
+    python benchmarks/bench_report.py --tests 5 50 500 --legacy-max 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+from matplotlib.backends.backend_pdf import PdfPages  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno.acquisition import SAMPLE_DTYPE  # noqa: E402
+from dyno.report import HEADERS, filas_resultados, generar_informe  # noqa: E402
+
+D = 0.055
+
+
+def datos(n_tests, n_muestras, seed=0):
+    rng = np.random.default_rng(seed)
+    resultados, muestras = [], []
+    for _ in range(n_tests):
+        rec = np.zeros(n_muestras, dtype=SAMPLE_DTYPE)
+        rec["t"] = 1.7e9 + np.arange(n_muestras) * 0.01
+        rec["rpm"] = 12000 * (1 - np.exp(-np.arange(n_muestras) / 400)) + rng.normal(0, 30, n_muestras)
+        muestras.append(rec)
+        resultados.append({"rpm_max": 12000.0, "velocidad_max": 124.4, "torque_max": 0.02, "potencia_max": 0.01})
+    return resultados, muestras
+
+
+def informe_original(filename, resultados, muestras):
+    # copia del generar_pdf original: pyplot, una figura nueva por página y bbox_inches='tight'
+    with PdfPages(filename) as pdf:
+        fig, ax = plt.subplots(figsize=(8.27, 11.69))
+        ax.axis('off')
+        table = ax.table(cellText=filas_resultados(resultados), colLabels=HEADERS, loc='center', cellLoc='center')
+        table.auto_set_font_size(False)
+        table.set_fontsize(10)
+        table.scale(1, 1.5)
+        ax.set_title("Resultados de Tests", fontsize=14)
+        pdf.savefig(fig, bbox_inches='tight')
+        plt.close(fig)
+        for i, samples in enumerate(muestras):
+            fig, (a1, a2) = plt.subplots(2, 1, figsize=(8.27, 11.69/1.5))
+            fig.suptitle(f"Test {i+1}", fontsize=12)
+            ts = samples["t"] - samples["t"][0]
+            a1.plot(ts, samples["rpm"])
+            a2.plot(ts, [(r * np.pi * D * 60) / 1000 for r in samples["rpm"]])
+            pdf.savefig(fig, bbox_inches='tight')
+            plt.close(fig)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--tests", type=int, nargs="+", default=[5, 50, 500])
+    ap.add_argument("--samples", type=int, default=1500, help="muestras por test")
+    ap.add_argument("--legacy-max", type=int, default=50)
+    args = ap.parse_args()
+
+    print(f"{'tests':>6} {'nuevo (s)':>10} {'original (s)':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.tests:
+            resultados, muestras = datos(n, args.samples)
+            t0 = time.perf_counter()
+            generar_informe(os.path.join(tmp, "nuevo.pdf"), resultados, muestras, D, "#0db99b")
+            t_new = time.perf_counter() - t0
+            if n <= args.legacy_max:
+                t0 = time.perf_counter()
+                informe_original(os.path.join(tmp, "orig.pdf"), resultados, muestras)
+                t_old = f"{time.perf_counter() - t0:.2f}"
+            else:
+                t_old = "—"
+            print(f"{n:>6} {t_new:>10.2f} {t_old:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark del planificador: muestreo, cálculo y render con frames lentos, sin Tk.
+
+    python benchmarks/bench_scheduler.py --seconds 10 --render-ms 20 150
+
+Un bucle de eventos mínimo imita el ``after`` de Tk (un solo hilo, callbacks
+en orden de plazo). Se compara la cadena de ``after`` fijos de antes (cada
+bucle se reprograma con su periodo al terminar) con ``Planificador``: número
+de ejecuciones frente a las esperadas, deriva acumulada y retraso p99 del
+muestreo cuando el render tarda más que su periodo.
+"""
+import argparse
+import heapq
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno import config  # noqa: E402
+from dyno.scheduler import Planificador  # noqa: E402
+
+
+class BucleEventos:
+    """Lo justo de Tk: ``after``/``after_cancel`` y un ``mainloop`` con límite de tiempo."""
+
+    def __init__(self):
+        self._cola = []
+        self._ids = itertools.count()
+        self._cancelados = set()
+
+    def after(self, ms, fn):
+        i = next(self._ids)
+        heapq.heappush(self._cola, (time.monotonic() + ms / 1000, i, fn))
+        return i
+
+    def after_cancel(self, i):
+        self._cancelados.add(i)
+
+    def mainloop(self, segundos):
+        fin = time.monotonic() + segundos
+        while self._cola:
+            cuando, i, fn = heapq.heappop(self._cola)
+            if i in self._cancelados:
+                continue
+            if cuando > fin:
+                break
+            time.sleep(max(0.0, cuando - time.monotonic()))
+            fn()
+
+
+def carga(rng, rango_ms):
+    time.sleep(rng.uniform(*rango_ms) / 1000)
+
+
+def con_after(args, rng):
+    tk = BucleEventos()
+    marcas = []
+
+    def muestreo():
+        marcas.append(time.monotonic())
+        carga(rng, (0.5, 2))
+        tk.after(int(config.SAMPLE_INTERVAL * 1000), muestreo)
+
+    def render():
+        carga(rng, args.render_ms)
+        tk.after(int(config.RENDER_INTERVAL * 1000), render)
+
+    tk.after(0, muestreo)
+    tk.after(0, render)
+    tk.mainloop(args.seconds)
+    m = np.asarray(marcas)
+    rejilla = m[0] + np.arange(len(m)) * config.SAMPLE_INTERVAL
+    return len(m), (m - rejilla).max() * 1000, float("nan"), "-"
+
+
+def con_planificador(args, rng):
+    tk = BucleEventos()
+    plan = Planificador(tk)
+    t0 = time.monotonic()
+    marcas = []
+
+    def muestreo():
+        marcas.append(time.monotonic())
+        carga(rng, (0.5, 2))
+
+    plan.bucle("muestreo", config.SAMPLE_INTERVAL, muestreo, prioridad=2)
+    plan.bucle("calculo", config.COMPUTE_INTERVAL, lambda: carga(rng, (0.2, 1)), prioridad=1)
+    plan.bucle("render", config.RENDER_INTERVAL, lambda: carga(rng, args.render_ms), descartable=True)
+    tk.mainloop(args.seconds)
+    st = plan.estadisticas()
+    m = np.asarray(marcas)
+    # desfase de la última ejecución respecto a su casilla de la rejilla
+    k = np.round((m - t0) / config.SAMPLE_INTERVAL)
+    deriva = (m - t0 - k * config.SAMPLE_INTERVAL).max() * 1000
+    return (st["muestreo"]["ejecuciones"], deriva, st["muestreo"]["retraso_p99_ms"],
+            f"{st['render']['ejecuciones']}/{st['render']['descartados']}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--render-ms", type=float, nargs=2, default=[20.0, 150.0],
+                    help="rango de duración de un frame")
+    args = ap.parse_args()
+
+    esperadas = int(args.seconds / config.SAMPLE_INTERVAL)
+    print(f"muestreo cada {config.SAMPLE_INTERVAL * 1000:.0f} ms, render cada "
+          f"{config.RENDER_INTERVAL * 1000:.0f} ms tardando {args.render_ms[0]:.0f}-{args.render_ms[1]:.0f} ms")
+    print(f"{'modo':>13} {'muestreos':>10} {'esperados':>10} {'máx desfase (ms)':>17} "
+          f"{'retraso p99 (ms)':>17} {'render ok/desc.':>16}")
+    for nombre, fn in (("after fijos", con_after), ("planificador", con_planificador)):
+        n, deriva, p99, render = fn(args, np.random.default_rng(0))
+        print(f"{nombre:>13} {n:>10} {esperadas:>10} {deriva:>17.1f} {p99:>17.1f} {render:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark de DetectorTiradas: aciertos, error de los cortes, CPU y memoria sobre un flujo largo.
+
+    python benchmarks/bench_segmentation.py --pulls 20 --rates 100 2000 20000 --noise 40
+
+Genera un flujo continuo de tiradas con ralentí, pico, duraciones y pausas al
+azar (algunas encadenadas sin pausa y algunos falsos arranques), lo pasa al
+detector en lotes de ``SAMPLE_INTERVAL`` y compara inicio y fin detectados con
+los reales. La última columna es el tiempo de captura frente al de tests fijos
+de ``COUNTDOWN_S + TEST_DURATION`` por tirada. El inicio sale adelantado
+``margen_s`` a propósito; el fin, algo antes del real porque el detector corta
+al bajar de ``reposo_rel`` del pico en vez de esperar al ralentí exacto.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno import config  # noqa: E402
+from dyno.segmentation import DetectorTiradas  # noqa: E402
+
+
+def flujo(rng, pulls, rate):
+    """Devuelve (t, rpm, [(inicio, fin)] reales)."""
+    trozos_t, trozos_r, reales = [], [], []
+    t0 = 0.0
+    for k in range(pulls):
+        ralenti = rng.choice([0.0, rng.uniform(300, 800)])
+        pico = rng.uniform(6000, 14000)
+        subida, meseta, bajada = rng.uniform(1.5, 5), rng.uniform(0, 2), rng.uniform(3, 9)
+        pausa = 0.0 if rng.random() < 0.2 else rng.uniform(0.5, 6)
+        tt = np.arange(0, pausa + subida + meseta + bajada, 1 / rate)
+        u = tt - pausa
+        r = np.full(len(tt), ralenti)
+        sube = (u >= 0) & (u < subida + meseta)
+        r[sube] = ralenti + (pico - ralenti) * (1 - np.exp(-3 * u[sube] / subida))
+        baja = u >= subida + meseta
+        s = (u[baja] - subida - meseta) / bajada
+        r[baja] = ralenti + (r[sube][-1] - ralenti) * (1 - s) / (1 + 3 * s)
+        if rng.random() < 0.15:     # falso arranque durante la pausa
+            f = (tt > 0.1) & (tt < min(0.4, pausa))
+            r[f] += 400 * (tt[f] - 0.1) / 0.3
+        trozos_t.append(t0 + tt)
+        trozos_r.append(r)
+        reales.append((t0 + pausa, t0 + tt[-1]))
+        t0 += tt[-1] + 1 / rate
+    cola = np.arange(0, 2, 1 / rate)
+    trozos_t.append(t0 + cola)
+    trozos_r.append(np.full(len(cola), trozos_r[-1][-1]))
+    return np.concatenate(trozos_t), np.concatenate(trozos_r), reales
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--pulls", type=int, default=20)
+    ap.add_argument("--rates", type=int, nargs="+", default=[100, 2000, 20000])
+    ap.add_argument("--noise", type=float, default=40.0, help="desviación del ruido (RPM)")
+    args = ap.parse_args()
+
+    print(f"{'Hz':>6} {'reales':>7} {'detect.':>8} {'falsos':>7} {'err. inicio (s)':>16} "
+          f"{'err. fin (s)':>13} {'CPU %':>6} {'máx buffer':>11} {'captura vs fijo':>16}")
+    for rate in args.rates:
+        rng = np.random.default_rng(rate)
+        t, rpm, reales = flujo(rng, args.pulls, rate)
+        rpm = np.maximum(rpm + rng.normal(0, args.noise, len(t)), 0)
+        t = t + 1.7e9
+        det = DetectorTiradas()
+        lote = max(1, int(rate * config.SAMPLE_INTERVAL))
+        tiradas, max_buf = [], 0
+        c0 = time.process_time()
+        for i in range(0, len(t), lote):
+            tiradas += det.extend(t[i:i + lote], rpm[i:i + lote])
+            max_buf = max(max_buf, sum(map(len, det._preroll)) + sum(map(len, det._trozos)))
+        tiradas += det.terminar()
+        cpu = (time.process_time() - c0) / (t[-1] - t[0]) * 100
+
+        ini = np.array([x.t_inicio for x in tiradas]) - 1.7e9
+        fin = np.array([x.t_fin for x in tiradas]) - 1.7e9
+        err_i, err_f = [], []
+        for a, b in reales:
+            k = int(np.argmin(abs(ini - a)))
+            err_i.append(ini[k] - a)
+            err_f.append(fin[k] - b)
+        aciertos = sum(abs(e) < 0.5 for e in err_i)
+        falsos = len(tiradas) - aciertos
+        captura = sum(x.duracion for x in tiradas)
+        fijo = len(reales) * (config.COUNTDOWN_S + config.TEST_DURATION)
+        print(f"{rate:>6} {len(reales):>7} {aciertos:>8} {falsos:>7} "
+              f"{np.median(err_i):>+8.2f} ±{np.std(err_i):<6.2f} {np.median(err_f):>+6.2f} ±{np.std(err_f):<5.2f} "
+              f"{cpu:>6.2f} {max_buf:>11} {captura:>7.0f} / {fijo:.0f} s")
+
+
+if __name__ == "__main__":
+    main()
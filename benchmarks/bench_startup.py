@@ -0,0 +1,108 @@
+"""Benchmark del arranque: coste de importar cada parte y tiempo hasta la primera muestra.
+
+    python benchmarks/bench_startup.py --repeat 5 --max-first-ms 600
+
+Cada medida es un intérprete nuevo (las importaciones no se cachean entre
+medidas; la caché de disco del sistema sí, así que la primera vuelta en frío
+tras encender el portátil es más lenta). Primero, lo que cuesta importar lo
+que el dashboard carga al arrancar y lo que ahora carga después: gráfica en
+vivo (matplotlib + TkAgg), backend PDF y pyplot, cada una por separado
+(las tres pagan la importación de matplotlib). Después, con un Arduino
+simulado (``FakeDevice``, solo POSIX), el tiempo desde que arranca el
+intérprete hasta la primera muestra en el buffer: como antes (todo importado
+y la figura construida antes de abrir el puerto) y como ahora (lector
+primero). Sin pantalla no se crea la ventana de Tk, así que la figura se
+dibuja con Agg. Sale con código 1 si la primera muestra de ahora pasa de
+``--max-first-ms``.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+from dyno.simulator import FakeDevice  # noqa: E402
+
+# lo que importa rpm_dashboard.py al arrancar
+NUCLEO = ("import tkinter, numpy; import dyno.acquisition, dyno.analysis, dyno.batch, dyno.clock, "
+          "dyno.curves, dyno.lod, dyno.metrics, dyno.overlay, dyno.scheduler, dyno.segmentation, "
+          "dyno.session, dyno.storage, dyno.worker")
+# lo que ahora se carga después (cada grupo por separado, además del núcleo)
+GRUPOS = {
+    "gráfica en vivo": "import matplotlib.figure, matplotlib.backends.backend_tkagg, dyno.render",
+    "backend PDF": "import matplotlib.backends.backend_pdf, dyno.report",
+    "pyplot": "import matplotlib.pyplot",
+}
+
+FIGURA = """
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+fig = Figure(figsize=(9.5, 6))
+axs = fig.subplots(2, 1, sharex=True, gridspec_kw={"height_ratios": [1, 0.7]})
+FigureCanvasAgg(fig).draw()
+"""
+
+LECTOR = """
+import threading
+from dyno.acquisition import SampleRing, SerialReader
+ring = SampleRing(1 << 16)
+threading.Thread(target=SerialReader(PUERTO, 115200, ring, "binario").run, daemon=True).start()
+while ring.head == 0:
+    time.sleep(0.001)
+"""
+
+ARRANQUES = {
+    "antes": NUCLEO + "; " + GRUPOS["gráfica en vivo"] + "; " + GRUPOS["backend PDF"] + "; "
+             + GRUPOS["pyplot"] + "\n" + FIGURA + LECTOR,
+    "ahora": NUCLEO + "\n" + LECTOR,
+}
+
+
+def medir(codigo, repeat):
+    """Mediana de segundos desde lanzar el intérprete hasta que ``codigo`` termina (incluye el arranque de Python)."""
+    env = dict(os.environ, PYTHONPATH=RAIZ, MPLBACKEND="Agg")
+    tiempos = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import time\n" + codigo], env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        tiempos.append(time.perf_counter() - t0)
+    return float(np.median(tiempos))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--max-first-ms", type=float, default=None,
+                    help="límite para la primera muestra con el arranque de ahora")
+    args = ap.parse_args()
+
+    vacio = medir("pass", args.repeat)
+    nucleo = medir(NUCLEO, args.repeat)
+    print(f"Intérprete vacío: {vacio * 1e3:.0f} ms (descontado abajo)")
+    print(f"  importar {'núcleo (al arrancar)':<22} {(nucleo - vacio) * 1e3:>7.0f} ms")
+    for nombre, codigo in GRUPOS.items():
+        t = medir(NUCLEO + "\n" + codigo, args.repeat) - nucleo
+        print(f"  importar {nombre:<22} {t * 1e3:>7.0f} ms")
+
+    if os.name != "posix":
+        print("Primera muestra: FakeDevice necesita un pty (solo POSIX)")
+        return
+    dev = FakeDevice(protocolo="binario", rate_hz=2000).start()
+    try:
+        res = {n: medir(c.replace("PUERTO", repr(dev.port)), args.repeat) for n, c in ARRANQUES.items()}
+    finally:
+        dev.close()
+    for n, t in res.items():
+        print(f"Primera muestra ({n}): {t * 1e3:.0f} ms desde que arranca el intérprete")
+    if args.max_first_ms is not None and res["ahora"] * 1e3 > args.max_first_ms:
+        print(f"Pasa de {args.max_first_ms:g} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
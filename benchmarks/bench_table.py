@@ -0,0 +1,144 @@
+"""Benchmark de la tabla de resultados: construirla y actualizarla con 5, 50 y 200 tests.
+
+    python benchmarks/bench_table.py --tests 5 50 200
+
+Compara la tabla de antes (cinco ``tk.Label`` por test y, al terminar cada
+test, ``.config`` en todas las filas y ``statistics.mean`` de todo) con la de
+ahora (``ttk.Treeview`` con la fila del test y la media por sumas). Mide lo que
+tarda en construirse y dibujarse y lo que cuesta, de media, apuntar cada test
+de una tanda completa (con ``update_idletasks`` para contar el redibujado).
+Necesita pantalla (Tk); sin ella solo mide las medias.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tkinter as tk
+from tkinter import ttk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno.analysis import MediasResultados  # noqa: E402
+
+CAMPOS = (("rpm_max", ".0f"), ("velocidad_max", ".2f"), ("torque_corr_max", ".6f"), ("potencia_corr_max", ".4f"))
+ANCHOS = (8, 10, 12, 16, 14)
+
+
+def resultado(i):
+    return {"rpm_max": 12000.0 + i, "velocidad_max": 124.0 + i / 100,
+            "torque_corr_max": 0.05 + i / 1e5, "potencia_corr_max": 0.053 + i / 1e4}
+
+
+class TablaLabels:
+    """La tabla de antes, igual que estaba en rpm_dashboard.py."""
+
+    def __init__(self, padre, n):
+        self.n = n
+        self.filas = []
+        for i in range(n):
+            fila = tk.Frame(padre)
+            fila.pack(fill="x", pady=4)
+            lbls = [tk.Label(fila, text=f"Test {i+1}" if j == 0 else "—", width=w, anchor="w")
+                    for j, w in enumerate(ANCHOS)]
+            for lbl in lbls:
+                lbl.pack(side="left", padx=6)
+            self.filas.append(lbls)
+        media = tk.Frame(padre)
+        media.pack(fill="x")
+        self.media = [tk.Label(media, text="—", width=w, anchor="w") for w in ANCHOS]
+        for lbl in self.media:
+            lbl.pack(side="left", padx=6)
+
+    def poner(self, resultados, i):
+        for k, res in enumerate(resultados):
+            lbls = self.filas[k]
+            lbls[0].config(text=f"Test {k+1}")
+            for lbl, (c, f) in zip(lbls[1:], CAMPOS):
+                lbl.config(text="—" if res is None else format(res[c], f))
+        if all(r is not None for r in resultados):
+            for lbl, (c, f) in zip(self.media[1:], CAMPOS):
+                lbl.config(text=format(statistics.mean(r[c] for r in resultados), f))
+
+
+class TablaTreeview:
+    """La tabla de ahora: Treeview con scroll, fila a fila, media por sumas."""
+
+    def __init__(self, padre, n, visibles=10):
+        cols = ["test"] + [c for c, _ in CAMPOS]
+        self.tabla = ttk.Treeview(padre, columns=cols, show="headings", height=min(n, visibles))
+        barra = ttk.Scrollbar(padre, orient="vertical", command=self.tabla.yview)
+        self.tabla.configure(yscrollcommand=barra.set)
+        barra.pack(side="right", fill="y")
+        self.tabla.pack(fill="both", expand=True)
+        for i in range(n):
+            self.tabla.insert("", "end", iid=str(i), values=(f"Test {i+1}",) + ("—",) * len(CAMPOS))
+        self.media = ttk.Treeview(padre, columns=cols, show=(), height=1)
+        self.media.pack(fill="x")
+        self.media.insert("", "end", iid="media", values=("Media",) + ("—",) * len(CAMPOS))
+        self.medias = MediasResultados(c for c, _ in CAMPOS)
+
+    def poner(self, resultados, i):
+        res = resultados[i]
+        self.tabla.item(str(i), values=(f"Test {i+1}",) + tuple(format(res[c], f) for c, f in CAMPOS))
+        self.tabla.see(str(i))
+        self.medias.poner(i, res)
+        m = self.medias.medias()
+        self.media.item("media", values=("Media",) + tuple(format(m[c], f) for c, f in CAMPOS))
+
+
+def medir_tk(root, clase, n):
+    marco = tk.Frame(root)
+    marco.pack(fill="both", expand=True)
+    t0 = time.perf_counter()
+    tabla = clase(marco, n)
+    root.update_idletasks()
+    construir = time.perf_counter() - t0
+    resultados = [None] * n
+    t0 = time.perf_counter()
+    for i in range(n):
+        resultados[i] = resultado(i)
+        tabla.poner(resultados, i)
+        root.update_idletasks()
+    por_test = (time.perf_counter() - t0) / n
+    marco.destroy()
+    return construir, por_test
+
+
+def medir_medias(n, repeat=20):
+    """(antes, ahora): s por test terminado solo en la media."""
+    res = [resultado(i) for i in range(n)]
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for c, _ in CAMPOS:
+            statistics.mean(r[c] for r in res)
+    antes = (time.perf_counter() - t0) / repeat
+    m = MediasResultados(c for c, _ in CAMPOS)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        m.poner(0, res[0])
+        m.medias()
+    return antes, (time.perf_counter() - t0) / repeat
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--tests", type=int, nargs="+", default=[5, 50, 200])
+    args = ap.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        root = None
+        print(f"Sin pantalla ({e}): solo las medias")
+    print(f"{'tests':>6} {'tabla':>9} {'construir (ms)':>15} {'por test (ms)':>14} {'media (µs)':>11}")
+    for n in args.tests:
+        medias = medir_medias(n)
+        for k, (nombre, clase) in enumerate((("labels", TablaLabels), ("treeview", TablaTreeview))):
+            construir, por_test = medir_tk(root, clase, n) if root else (float("nan"), float("nan"))
+            print(f"{n:>6} {nombre:>9} {construir * 1e3:>15.1f} {por_test * 1e3:>14.2f} {medias[k] * 1e6:>11.1f}")
+    if root:
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark del análisis de fin de test: retraso de los bucles de la UI mientras se analiza.
+
+    python benchmarks/bench_worker.py --seconds 8 --rate 20000 --every 1.0 --guarantee-ms 25
+
+Un bucle de eventos mínimo imita el ``after`` de Tk y lleva el ``Planificador``
+del dashboard (muestreo, cálculo y render con su coste). Cada ``--every``
+segundos termina un test de ``--rate`` Hz y se analiza completo
+(``analizar_muestras``): en línea en el hilo de la UI (lo de antes), en un
+hilo, o en el proceso de ``dyno.worker``. Se mide el retraso p99 y máximo de
+cada bucle respecto a su plazo y cuánto tarda en llegar cada resultado. Sale
+con código 1 si con el proceso el p99 del muestreo o del render pasa de
+``--guarantee-ms``.
+"""
+import argparse
+import heapq
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dyno import config  # noqa: E402
+from dyno.acquisition import SAMPLE_DTYPE  # noqa: E402
+from dyno.scheduler import Planificador  # noqa: E402
+from dyno.session import analizar_muestras  # noqa: E402
+from dyno.simulator import tirada  # noqa: E402
+from dyno.worker import Analizador  # noqa: E402
+
+
+class BucleEventos:
+    """Lo justo de Tk: ``after``/``after_cancel`` y un ``mainloop`` con límite de tiempo."""
+
+    def __init__(self):
+        self._cola = []
+        self._ids = itertools.count()
+        self._cancelados = set()
+
+    def after(self, ms, fn):
+        i = next(self._ids)
+        heapq.heappush(self._cola, (time.monotonic() + ms / 1000, i, fn))
+        return i
+
+    def after_cancel(self, i):
+        self._cancelados.add(i)
+
+    def mainloop(self, segundos):
+        fin = time.monotonic() + segundos
+        while self._cola:
+            cuando, i, fn = heapq.heappop(self._cola)
+            if i in self._cancelados:
+                continue
+            if cuando > fin:
+                break
+            time.sleep(max(0.0, cuando - time.monotonic()))
+            fn()
+
+
+def test_completo(rate, ruido=30.0):
+    perfil = tirada()
+    t = np.arange(0, perfil.duracion, 1 / rate)
+    rec = np.zeros(len(t), SAMPLE_DTYPE)
+    rec["t"] = 1.7e9 + t
+    rec["rpm"] = np.maximum(perfil(t) + np.random.default_rng(0).normal(0, ruido, len(t)), 0)
+    return rec
+
+
+def escenario(modo, rec, args):
+    tk = BucleEventos()
+    plan = Planificador(tk)
+    rng = np.random.default_rng(1)
+    trozo = rng.normal(size=20000)
+    plan.bucle("muestreo", config.SAMPLE_INTERVAL, lambda: np.sort(trozo[:2000]), prioridad=2)
+    plan.bucle("calculo", config.COMPUTE_INTERVAL, lambda: np.median(trozo), prioridad=1)
+    plan.bucle("render", config.RENDER_INTERVAL, lambda: np.sort(trozo), descartable=True)
+
+    params = dict(J=config.J, D=config.D, window_s=config.REG_WINDOW_S,
+                  min_samples=config.MIN_SAMPLES_REG, filter_window=config.MEDIAN_WINDOW)
+    hilo = ThreadPoolExecutor(max_workers=1)
+    analizador = Analizador().start() if modo == "proceso" else None
+    esperas = []
+
+    def fin_test():
+        t0 = time.perf_counter()
+        if modo == "en línea":
+            analizar_muestras(rec, **params)
+            esperas.append(time.perf_counter() - t0)
+            return
+        fut = analizador.analizar(rec, **params) if analizador else hilo.submit(analizar_muestras, rec, **params)
+        fut.add_done_callback(lambda f: esperas.append(time.perf_counter() - t0))
+
+    plan.bucle("fin_test", args.every, fin_test, prioridad=-1)
+    tk.mainloop(args.seconds)
+    if analizador:
+        analizador.stop()
+    hilo.shutdown(wait=True)
+    return plan.estadisticas(), esperas
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=8.0)
+    ap.add_argument("--rate", type=int, default=20000, help="Hz del test analizado")
+    ap.add_argument("--every", type=float, default=1.0, help="s entre tests terminados")
+    ap.add_argument("--guarantee-ms", type=float, default=25.0)
+    args = ap.parse_args()
+
+    rec = test_completo(args.rate)
+    t0 = time.perf_counter()
+    analizar_muestras(rec, config.J, config.D)
+    print(f"Test de {len(rec):,} muestras ({args.rate} Hz): análisis {(time.perf_counter() - t0) * 1e3:.0f} ms, "
+          f"uno cada {args.every:g} s durante {args.seconds:g} s")
+    print(f"{'modo':>9} {'muestreo p99/máx (ms)':>22} {'render p99/máx (ms)':>20} {'render descart.':>16} "
+          f"{'análisis':>9} {'resultado en (ms)':>18}")
+    fallo = False
+    for modo in ("en línea", "hilo", "proceso"):
+        st, esperas = escenario(modo, rec, args)
+        fila = [(st[n]["retraso_p99_ms"], st[n]["retraso_max_ms"]) for n in ("muestreo", "render")]
+        print(f"{modo:>9} {fila[0][0]:>12.1f} / {fila[0][1]:<7.1f} {fila[1][0]:>10.1f} / {fila[1][1]:<7.1f} "
+              f"{st['render']['descartados']:>16} {len(esperas):>9} {np.mean(esperas) * 1e3 if esperas else 0:>18.0f}")
+        if modo == "proceso":
+            fallo = max(fila[0][0], fila[1][0]) > args.guarantee_ms
+    print(f"Garantía con el proceso: p99 de muestreo y render ≤ {args.guarantee_ms:g} ms -> "
+          f"{'NO se cumple' if fallo else 'se cumple'}")
+    sys.exit(1 if fallo else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Núcleo del Dyno Stand RC: análisis de las muestras (t, rpm) de cada test."""
@@ -0,0 +1,263 @@
+"""Adquisición: lector serie y buffer circular de muestras hacia la UI/análisis."""
+import threading
+
+import numpy as np
+import serial
+
+from .clock import EstimadorReloj, ahora
+from .metrics import METRICAS
+from .protocol import EdgeDecoder, FrameDecoder, detectar_protocolo, parse_rpm_line, period_to_rpm
+from .pulses import ConversorFlancos
+
+SAMPLE_DTYPE = np.dtype([("t", "f8"), ("rpm", "f8")])
+
+
+class SampleRing:
+    """Buffer circular preasignado (array estructurado) con un único escritor.
+
+    El hilo lector escribe la muestra y después avanza ``head``; en CPython la
+    asignación de un entero es atómica, así que no hace falta lock. Cada
+    consumidor guarda su propio cursor y drena por lotes con ``read``; si se
+    queda más de ``capacity`` muestras atrás pierde las más antiguas y se
+    contabilizan en ``overruns``.
+    """
+
+    def __init__(self, capacity=1 << 16, dtype=SAMPLE_DTYPE):
+        if capacity & (capacity - 1):
+            raise ValueError("capacity debe ser potencia de 2")
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._buf = np.zeros(capacity, dtype=dtype)
+        self.head = 0       # total de muestras escritas
+        self.overruns = 0   # muestras perdidas por consumidores lentos
+
+    def push(self, *fields):
+        h = self.head
+        self._buf[h & self._mask] = fields
+        self.head = h + 1
+
+    def extend(self, *columns):
+        """Escribe un lote de muestras (una secuencia por campo del dtype)."""
+        k = len(columns[0])
+        if k == 0:
+            return
+        h = self.head
+        skip = max(0, k - self.capacity)
+        idx = (h + np.arange(skip, k)) & self._mask
+        for name, col in zip(self._buf.dtype.names, columns):
+            self._buf[name][idx] = col[skip:]
+        self.head = h + k
+
+    def latest(self):
+        """Última muestra escrita (registro del array) o None si aún no hay ninguna."""
+        h = self.head
+        if h == 0:
+            return None
+        return self._buf[(h - 1) & self._mask].copy()
+
+    def read(self, cursor, max_items=None):
+        """Copia las muestras en [cursor, head). Devuelve (registros, nuevo_cursor)."""
+        head = self.head
+        if max_items is not None:
+            head = min(head, cursor + max_items)
+        if cursor < head - self.capacity:
+            self.overruns += head - self.capacity - cursor
+            cursor = head - self.capacity
+        if cursor >= head:
+            return self._buf[:0].copy(), cursor
+        a, b = cursor & self._mask, head & self._mask
+        if a < b:
+            out = self._buf[a:b].copy()
+        else:
+            out = np.concatenate((self._buf[a:], self._buf[:b]))
+        # si el escritor dio la vuelta mientras copiábamos, descartar lo sobrescrito
+        lost = self.head - self.capacity - cursor
+        if lost > 0:
+            self.overruns += lost
+            out = out[lost:]
+        return out, head
+
+
+AUTO_PROBE_BYTES = 64   # bytes leídos para decidir el protocolo en modo "auto"
+AUTO_PROBE_MAX = 2048   # con bytes no ASCII se sigue mirando hasta aquí (lotes de flancos largos)
+READ_CHUNK = 1 << 16    # máximo de bytes por read()
+ASCII_REPARTO_S = 0.1   # las líneas de una misma lectura se reparten en como mucho este intervalo
+
+_BYTES = METRICAS.contador("dyno_bytes_leidos_total", "Bytes recibidos de los puertos")
+_MUESTRAS = METRICAS.contador("dyno_muestras_total", "Muestras (líneas o tramas) escritas en el ring")
+_ERRORES = METRICAS.contador("dyno_errores_parseo_total", "Líneas RPM con valor no numérico")
+
+
+class Enlace:
+    """Convierte los bytes que llegan de un puerto en muestras (t, rpm) del ring.
+
+    No lee del puerto: recibe trozos con ``feed``, así que sirve igual para un
+    hilo por puerto (``SerialReader``) que para un bucle de E/S con varios
+    bancos (``dyno.stand``). ``protocolo``: "ascii" (líneas ``RPM: n``),
+    "binario" (tramas de dyno.protocol), "flancos" (lotes con el instante de
+    cada pulso, ``dyno.pulses``; ``espaciado`` es la tabla de los imanes) o
+    "auto" (mira los primeros bytes).
+
+    ``t_host`` es la hora (``clock.ahora``) de la lectura. En ASCII es lo único
+    que hay: las líneas que llegan juntas se reparten entre la lectura anterior
+    y esta. En binario se usa el reloj del dispositivo, pasado a la base del
+    host con un ``EstimadorReloj`` (desfase y deriva); con flancos, igual y una
+    muestra por intervalo entre pulsos. Las líneas ``RPM:`` con
+    un valor que no se puede leer se cuentan en ``errores_parseo`` y la última
+    se guarda en ``ultimo_error``.
+    """
+
+    def __init__(self, ring, protocolo="auto", pulsos_por_vuelta=1, espaciado=None):
+        self.ring = ring
+        self.protocolo = protocolo
+        self.pulsos_por_vuelta = pulsos_por_vuelta
+        self.modo = None if protocolo == "auto" else protocolo
+        self.decoder = EdgeDecoder() if self.modo == "flancos" else FrameDecoder()
+        self.flancos = ConversorFlancos(pulsos_por_vuelta, espaciado)
+        self.reloj = EstimadorReloj()
+        self._pendiente = b""
+        self._t_lectura = None
+        self._t_ultimo = -np.inf
+        self.errores_parseo = 0
+        self.ultimo_error = None
+
+    def feed(self, data, t_host=None):
+        if t_host is None:
+            t_host = ahora()
+        _BYTES.inc(len(data))
+        with METRICAS.cronometro("dyno_parseo_segundos"):
+            self._feed(data, t_host)
+
+    def _feed(self, data, t_host):
+        if self.modo is None:
+            self._pendiente += data
+            if len(self._pendiente) < AUTO_PROBE_BYTES:
+                return
+            modo = detectar_protocolo(self._pendiente)
+            if modo == "ascii" and not self._pendiente.isascii() and len(self._pendiente) < AUTO_PROBE_MAX:
+                return      # bytes binarios sin un lote completo todavía
+            data, self._pendiente = self._pendiente, b""
+            self.modo = modo
+            if modo == "flancos":
+                self.decoder = EdgeDecoder()
+            print(f"Protocolo: {self.modo}")
+        if self.modo == "binario":
+            self._binario(data, t_host)
+        elif self.modo == "flancos":
+            self._flancos(data, t_host)
+        else:
+            self._ascii(data, t_host)
+
+    def _ascii(self, data, t_host):
+        *lineas, self._pendiente = (self._pendiente + data).split(b"\n")
+        vals = [v for v in map(self._linea_ascii, lineas) if v is not None]
+        desde = max(self._t_lectura or t_host, t_host - ASCII_REPARTO_S)
+        self._t_lectura = t_host
+        if vals:
+            k = len(vals)
+            self._emitir(desde + (t_host - desde) * np.arange(1, k + 1) / k, vals)
+
+    def _linea_ascii(self, raw):
+        linea = raw.decode(errors='ignore').strip()
+        try:
+            return parse_rpm_line(linea)
+        except ValueError:
+            self.errores_parseo += 1
+            self.ultimo_error = linea
+            _ERRORES.inc()
+            return None
+
+    def _binario(self, data, t_host):
+        fr = self.decoder.feed(data)
+        if len(fr):
+            # la última trama del bloque es la que menos ha esperado en el buffer
+            self.reloj.observar(fr["t_dev"][-1], t_host)
+            self._emitir(self.reloj.a_host(fr["t_dev"]),
+                         period_to_rpm(fr["period_us"], self.pulsos_por_vuelta))
+
+    def _flancos(self, data, t_host):
+        fl = self.decoder.feed(data)
+        if len(fl):
+            self.reloj.observar(fl["t_dev"][-1], t_host)
+            ts, rpms = self.flancos.convertir(fl["t_dev"], fl["flanco"])
+            if len(ts):
+                self._emitir(self.reloj.a_host(ts), rpms)
+
+    def _emitir(self, ts, rpms):
+        # al corregirse el ajuste del reloj, el tiempo nunca retrocede
+        ts = np.maximum(ts, self._t_ultimo)
+        self._t_ultimo = ts[-1]
+        self.ring.extend(ts, rpms)
+        _MUESTRAS.inc(len(ts))
+
+    def estado(self):
+        """Texto corto del enlace para la UI."""
+        if self.modo not in ("binario", "flancos"):
+            if self.modo and self.errores_parseo:
+                return f"ASCII · líneas erróneas: {self.errores_parseo} (última: {self.ultimo_error!r})"
+            return "ASCII" if self.modo else ""
+        d = self.decoder
+        if self.modo == "flancos":
+            fase = "" if self.flancos.fase is not None else " · buscando fase de los imanes"
+            return (f"Flancos ({self.pulsos_por_vuelta}/vuelta) · perdidos: {d.lost} · CRC: {d.crc_errors} · "
+                    f"deriva: {self.reloj.deriva_ppm:+.0f} ppm{fase}")
+        return (f"Binario · tramas perdidas: {d.lost} · CRC: {d.crc_errors} · "
+                f"deriva: {self.reloj.deriva_ppm:+.0f} ppm")
+
+    def metricas(self, etiquetas=""):
+        """Contadores del enlace y su ring para ``METRICAS.fuente`` (``etiquetas``: ``banco="A"``)."""
+        e = "{" + etiquetas + "}" if etiquetas else ""
+        d = self.decoder
+        return {
+            f"dyno_enlace_muestras_total{e}": self.ring.head,
+            f"dyno_enlace_overruns_total{e}": self.ring.overruns,
+            f"dyno_enlace_errores_parseo_total{e}": self.errores_parseo,
+            f"dyno_enlace_tramas_perdidas_total{e}": d.lost,
+            f"dyno_enlace_errores_crc_total{e}": d.crc_errors,
+            f"dyno_enlace_deriva_ppm{e}": round(self.reloj.deriva_ppm, 1),
+        }
+
+
+class SerialReader:
+    """Hilo lector de un puerto serie que pasa lo leído a un ``Enlace`` sobre ``ring``."""
+
+    def __init__(self, puerto, baudios, ring, protocolo="auto", pulsos_por_vuelta=1, espaciado=None):
+        self.puerto = puerto
+        self.baudios = baudios
+        self.ring = ring
+        self.protocolo = protocolo
+        self.pulsos_por_vuelta = pulsos_por_vuelta
+        self.espaciado = espaciado
+        self.enlace = Enlace(ring, protocolo, pulsos_por_vuelta, espaciado)
+        self.stop_event = threading.Event()
+        self.conectado = threading.Event()
+        self.error = None
+
+    @property
+    def modo(self):
+        return self.enlace.modo
+
+    @property
+    def decoder(self):
+        return self.enlace.decoder
+
+    def run(self):
+        try:
+            with serial.Serial(self.puerto, self.baudios, timeout=1) as arduino:
+                print(f"Conectado a {self.puerto}")
+                self.conectado.set()
+                while not self.stop_event.is_set():
+                    data = arduino.read(min(max(arduino.in_waiting, 1), READ_CHUNK))
+                    if data:
+                        self.enlace.feed(data)
+        except serial.SerialException as e:
+            self.error = e
+            print(f"No se pudo abrir {self.puerto}")
+        finally:
+            self.conectado.clear()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def estado(self):
+        return self.enlace.estado()
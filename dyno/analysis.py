@@ -0,0 +1,262 @@
+"""Motor de análisis vectorizado: torque y potencia a partir de muestras (t, rpm).
+
+Reproduce la regresión por ventana deslizante de ``finalizar_test`` (ventana
+hacia atrás de ``REG_WINDOW_S`` y al menos ``MIN_SAMPLES_REG`` puntos), pero en
+una sola pasada O(n) con sumas acumuladas en lugar de rehacer listas por muestra.
+``EstimadorTorque`` hace lo mismo en streaming, muestra a muestra, durante el test.
+"""
+import math
+from collections import deque
+
+import numpy as np
+
+from .filters import RunningMedian, median_filter
+
+HP_W = 745.7  # W por HP
+
+
+def rpm_to_omega(rpm):
+    """RPM -> rad/s (acepta escalares o arrays)."""
+    return rpm * (2 * math.pi / 60)
+
+
+def rpm_to_kmh(rpm, D):
+    """RPM del rodillo de diámetro D (m) -> km/h."""
+    return (rpm * math.pi * D * 60) / 1000
+
+
+def window_starts(ts, window_s):
+    """Para cada muestra i, primer índice j0 con ts[i] - ts[j0] <= window_s (ts creciente)."""
+    ts = np.asarray(ts, dtype=float)
+    n = len(ts)
+    idx = np.arange(n)
+    j0 = np.searchsorted(ts, ts - window_s, side="left")
+    # corregir el redondeo de (ts - window_s) para usar el mismo criterio que el bucle original
+    prev = np.maximum(j0 - 1, 0)
+    j0 -= ((j0 > 0) & (ts - ts[prev] <= window_s)).astype(j0.dtype)
+    j0 += ((j0 < idx) & (ts - ts[j0] > window_s)).astype(j0.dtype)
+    return j0
+
+
+def sliding_slopes(ts, ys, starts):
+    """Pendiente por mínimos cuadrados de ys frente a ts en cada ventana [starts[i], i].
+
+    Las sumas se acumulan respecto al origen de bloques de L muestras (L = ventana
+    más larga), así cada ventana cae en como mucho dos bloques y las sumas no pierden
+    precisión en runs largos con timestamps absolutos.
+    """
+    ts = np.asarray(ts, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    n = len(ts)
+    if n == 0:
+        return np.zeros(0)
+    idx = np.arange(n)
+    counts = idx - starts + 1
+    L = int(counts.max())
+    seg_start = (idx // L) * L
+    u = ts - ts[seg_start]
+    y = ys - ys[0]  # la pendiente no cambia al desplazar y
+
+    def prefix(a):
+        p = np.zeros(n + 1)
+        np.cumsum(a, out=p[1:])
+        return p
+
+    Pu, Puu, Py, Puy = prefix(u), prefix(u * u), prefix(y), prefix(u * y)
+
+    # parte A: [starts, split) en el bloque anterior; parte B: [split, i] en el de i
+    split = np.maximum(starts, seg_start)
+    nA = split - starts
+    delta = ts[seg_start] - ts[np.maximum(seg_start - L, 0)]
+    Au, Auu, Ay, Auy = (P[split] - P[starts] for P in (Pu, Puu, Py, Puy))
+    Bu, Buu, By, Buy = (P[idx + 1] - P[split] for P in (Pu, Puu, Py, Puy))
+
+    # llevar la parte A al origen del bloque de i: u' = u - delta
+    Su = Bu + Au - nA * delta
+    Suu = Buu + Auu - 2 * delta * Au + nA * delta * delta
+    Sy = By + Ay
+    Suy = Buy + Auy - delta * Ay
+
+    denom = counts * Suu - Su * Su
+    num = counts * Suy - Su * Sy
+    ok = np.abs(denom) >= 1e-12
+    return np.divide(num, denom, out=np.zeros(n), where=ok)
+
+
+def omega_alpha(ts, rpms, window_s, min_samples, filter_window=3):
+    """Omega filtrada (rad/s), alpha (rad/s²) por muestra y máscara de las ventanas válidas."""
+    ts = np.asarray(ts, dtype=float)
+    omegas = rpm_to_omega(median_filter(rpms, window=filter_window))
+    if len(ts) == 0:
+        return np.zeros(0), np.zeros(0), np.zeros(0, dtype=bool)
+    starts = window_starts(ts, window_s)
+    alpha = sliding_slopes(ts, omegas, starts)
+    total_dt = ts - ts[starts]
+    valid = ((np.arange(len(ts)) - starts + 1) >= min_samples) & (total_dt > 0) & (total_dt <= window_s)
+    return omegas, alpha, valid
+
+
+def torque_power(ts, rpms, J, window_s, min_samples, filter_window=3):
+    """Series de torque (N·m) y potencia (HP) en las muestras con ventana válida."""
+    omegas, alpha, valid = omega_alpha(ts, rpms, window_s, min_samples, filter_window)
+    torques = J * alpha[valid]
+    potencias = (torques * omegas[valid]) / HP_W
+    return torques, potencias
+
+
+def analizar_test(ts, rpms, J, D, window_s, min_samples, filter_window=3):
+    """Resultado de un test con la misma forma que las entradas de ``test_results``."""
+    rpms = np.asarray(rpms, dtype=float)
+    if len(rpms) == 0:
+        return {"rpm_max": 0.0, "velocidad_max": 0.0, "torque_max": 0.0, "potencia_max": 0.0}
+    rpm_max = float(rpms.max())
+    velocidad_max = rpm_to_kmh(rpm_max, D) if rpm_max else 0.0
+    torques, potencias = torque_power(ts, rpms, J, window_s, min_samples, filter_window)
+    return {
+        "rpm_max": rpm_max,
+        "velocidad_max": velocidad_max,
+        "torque_max": float(np.abs(torques).max()) if torques.size else 0.0,
+        "potencia_max": float(np.abs(potencias).max()) if potencias.size else 0.0,
+    }
+
+
+class MediasResultados:
+    """Medias de los campos de ``test_results`` mantenidas con sumas al cambiar cada test.
+
+    ``poner(i, res)`` sustituye lo que aportaba el test ``i`` (un resultado con
+    algún campo a None, o None, no cuenta): actualizar una fila es O(campos),
+    no una pasada por toda la tabla.
+    """
+
+    def __init__(self, campos):
+        self.campos = tuple(campos)
+        self.reset()
+
+    def reset(self):
+        self._filas = {}
+        self.sumas = dict.fromkeys(self.campos, 0.0)
+
+    def __len__(self):
+        return len(self._filas)
+
+    def poner(self, clave, res):
+        self.quitar(clave)
+        if res is None or any(res.get(c) is None for c in self.campos):
+            return
+        fila = tuple(float(res[c]) for c in self.campos)
+        self._filas[clave] = fila
+        for c, v in zip(self.campos, fila):
+            self.sumas[c] += v
+
+    def quitar(self, clave):
+        fila = self._filas.pop(clave, None)
+        if fila is None:
+            return
+        if not self._filas:
+            self.sumas = dict.fromkeys(self.campos, 0.0)    # sin restos de redondeo al vaciarse
+            return
+        for c, v in zip(self.campos, fila):
+            self.sumas[c] -= v
+
+    def medias(self):
+        """{campo: media} de los tests que cuentan; None si no hay ninguno."""
+        n = len(self._filas)
+        return {c: s / n for c, s in self.sumas.items()} if n else None
+
+
+class EstimadorTorque:
+    """Torque y potencia en streaming con el mismo criterio que ``analizar_test``.
+
+    Cada muestra pasa por la mediana en streaming y entra en una regresión por
+    mínimos cuadrados sobre la ventana hacia atrás de ``window_s``, mantenida con
+    sumas que se actualizan al entrar y salir puntos (O(1) amortizado). Las sumas
+    se recalculan respecto a un origen nuevo cada ``len(ventana)`` muestras para
+    no perder precisión. Como la mediana es centrada, torque/potencia van
+    ``filter_window//2`` muestras por detrás; ``flush`` al terminar el test
+    procesa la cola y deja ``resultado()`` igual al del análisis por lotes.
+    """
+
+    def __init__(self, J, D, window_s, min_samples, filter_window=3):
+        self.J = J
+        self.D = D
+        self.window_s = window_s
+        self.min_samples = min_samples
+        self._mediana = RunningMedian(filter_window)
+        self.reset()
+
+    def reset(self):
+        self._mediana.reset()
+        self._t_pend = deque()   # tiempos a la espera de su salida de la mediana
+        self._win = deque()      # (t, omega) en la ventana
+        self._t0 = self._w0 = 0.0
+        self._s = [0.0] * 4      # su, suu, sy, suy respecto a (t0, w0)
+        self._desde_rebase = 0
+        self.n = 0
+        self.rpm_max = 0.0
+        self.torque = 0.0
+        self.potencia = 0.0
+        self.torque_max = 0.0
+        self.potencia_max = 0.0
+
+    def push(self, t, rpm):
+        self.n += 1
+        if rpm > self.rpm_max:
+            self.rpm_max = float(rpm)
+        self._t_pend.append(float(t))
+        for m in self._mediana.push(rpm):
+            self._regresion(self._t_pend.popleft(), rpm_to_omega(m))
+
+    def extend(self, ts, rpms):
+        for t, r in zip(np.asarray(ts, dtype=float).tolist(), np.asarray(rpms, dtype=float).tolist()):
+            self.push(t, r)
+
+    def flush(self):
+        """Procesa las muestras pendientes de la mediana y devuelve ``resultado()``."""
+        for m in self._mediana.flush():
+            self._regresion(self._t_pend.popleft(), rpm_to_omega(m))
+        return self.resultado()
+
+    def _sumar(self, t, w, signo):
+        u, y = t - self._t0, w - self._w0
+        s = self._s
+        s[0] += signo * u
+        s[1] += signo * u * u
+        s[2] += signo * y
+        s[3] += signo * u * y
+
+    def _rebase(self):
+        self._t0, self._w0 = self._win[0]
+        self._s = [0.0] * 4
+        for t, w in self._win:
+            self._sumar(t, w, 1)
+        self._desde_rebase = 0
+
+    def _regresion(self, t, w):
+        win = self._win
+        win.append((t, w))
+        self._sumar(t, w, 1)
+        while t - win[0][0] > self.window_s:
+            self._sumar(*win.popleft(), -1)
+        self._desde_rebase += 1
+        if self._desde_rebase >= len(win):
+            self._rebase()
+
+        n = len(win)
+        if n < self.min_samples or t - win[0][0] <= 0:
+            return
+        su, suu, sy, suy = self._s
+        denom = n * suu - su * su
+        alpha = (n * suy - su * sy) / denom if abs(denom) >= 1e-12 else 0.0
+        self.torque = self.J * alpha
+        self.potencia = (self.torque * w) / HP_W
+        self.torque_max = max(self.torque_max, abs(self.torque))
+        self.potencia_max = max(self.potencia_max, abs(self.potencia))
+
+    def resultado(self):
+        """Métricas hasta ahora, con la forma de ``analizar_test``."""
+        return {
+            "rpm_max": self.rpm_max,
+            "velocidad_max": rpm_to_kmh(self.rpm_max, self.D) if self.rpm_max else 0.0,
+            "torque_max": self.torque_max,
+            "potencia_max": self.potencia_max,
+        }
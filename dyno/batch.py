@@ -0,0 +1,211 @@
+"""Reanálisis por lotes de runs grabados, repartidos en un pool de procesos.
+
+    python -m dyno.batch runs/ --J 0.0000560 --reg-window 0.25 --out reanalisis.csv
+
+Recalcula las métricas de ``test_results`` (rpm_max, velocidad_max,
+torque_max, potencia_max y los máximos con las pérdidas compensadas) de cada run. Los parámetros que no se pasan se
+toman del ``meta.json`` de cada run. La salida se escribe según van llegando
+los resultados: CSV, o Parquet si la extensión es ``.parquet`` (requiere pyarrow).
+Un run que no se puede leer o analizar no para el lote: su fila sale solo con
+el nombre y la columna ``error``, y al final se dice cuántos fallaron.
+
+Con ``--curvas curvas.csv`` además junta las curvas de potencia y torque
+frente a RPM de todos los runs: media, banda de confianza al 95 % y
+envolvente por casilla (``dyno.curves.agregar_curvas``).
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import config
+from .curves import agregar_curvas, curvas_desde_json
+from .session import analizar_muestras
+from .storage import Run, leer_meta, listar_runs
+
+CAMPOS = ["run", "test", "creado", "n", "J", "D", "reg_window_s", "min_samples_reg", "median_window",
+          "rpm_max", "velocidad_max", "torque_max", "potencia_max",
+          "torque_corr_max", "potencia_corr_max", "rpm_potencia_max", "origen_perdidas", "error"]
+
+# parámetro -> (clave en meta.json, valor por defecto)
+PARAMETROS = {
+    "J": ("J", config.J),
+    "D": ("D", config.D),
+    "reg_window_s": ("reg_window_s", config.REG_WINDOW_S),
+    "min_samples_reg": ("min_samples_reg", config.MIN_SAMPLES_REG),
+    "median_window": ("median_window", config.MEDIAN_WINDOW),
+}
+
+
+def reanalizar_run(path, overrides, curvas=False):
+    """Métricas de un run con los parámetros de su meta.json salvo los de ``overrides``.
+
+    Con ``curvas`` la fila lleva también ``"curvas"`` (JSON de ``analizar_curvas``).
+    """
+    run = Run(path)
+    p = {k: overrides.get(k) if overrides.get(k) is not None else run.meta.get(clave, defecto)
+         for k, (clave, defecto) in PARAMETROS.items()}
+    res = analizar_muestras(run, p["J"], p["D"], p["reg_window_s"], p["min_samples_reg"], p["median_window"])
+    c = res.pop("curvas")
+    res["origen_perdidas"] = c["origen_perdidas"]
+    if curvas:
+        res["curvas"] = c
+    return {"run": os.path.basename(path), "test": run.meta.get("test"), "creado": run.meta.get("creado"),
+            "n": len(run), **p, **res, "error": ""}
+
+
+def _reanalizar(args):
+    """``reanalizar_run`` sin dejar que un run roto pare el lote: su fila lleva el error y nada más."""
+    path = args[0]
+    try:
+        return reanalizar_run(*args)
+    except Exception as e:
+        return dict(dict.fromkeys(CAMPOS), run=os.path.basename(path), error=f"{type(e).__name__}: {e}")
+
+
+def curvas_run(path):
+    """Curvas de un run: las de su meta.json o, si no las tiene, recalculadas con sus parámetros."""
+    c = (leer_meta(path).get("resultados") or {}).get("curvas")
+    if not c or "bin" not in c["subida"]:
+        c = reanalizar_run(path, {}, curvas=True)["curvas"]
+    return curvas_desde_json(c)
+
+
+def cargar_curvas(paths):
+    """``curvas_run`` de cada run; los que no se pueden leer se saltan."""
+    curvas = []
+    for p in paths:
+        try:
+            curvas.append(curvas_run(p))
+        except (OSError, ValueError, KeyError):
+            continue
+    return curvas
+
+
+def guardar_curvas(path, curvas):
+    """CSV con la agregación de ``curvas`` por casilla de RPM (potencia y torque de la subida)."""
+    pot, tq = agregar_curvas(curvas, "potencia"), agregar_curvas(curvas, "torque")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["rpm", "runs"] + [f"{c}_{k}" for c in ("potencia", "torque")
+                                      for k in ("media", "std", "ic95", "min", "max")])
+        for i in range(len(pot["bin"])):
+            w.writerow([pot["rpm"][i], pot["runs"][i]] + [a[k][i] for a in (pot, tq)
+                                                          for k in ("media", "std", "ic", "min", "max")])
+
+
+class _CsvSalida:
+    def __init__(self, path):
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        self._w = csv.DictWriter(self._f, fieldnames=CAMPOS)
+        self._w.writeheader()
+
+    def escribir(self, fila):
+        self._w.writerow(fila)
+
+    def close(self):
+        self._f.close()
+
+
+class _ParquetSalida:
+    """Escribe filas en bloques (row groups) para no acumular todo el archivo en memoria."""
+
+    def __init__(self, path, bloque=1024):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._path = path
+        self._pq = pq
+        self._writer = None
+        self._filas = []
+        self._bloque = bloque
+
+    def escribir(self, fila):
+        self._filas.append(fila)
+        if len(self._filas) >= self._bloque:
+            self._volcar()
+
+    def _volcar(self):
+        if not self._filas:
+            return
+        tabla = self._pa.Table.from_pylist(self._filas)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._path, tabla.schema)
+        self._writer.write_table(tabla)
+        self._filas = []
+
+    def close(self):
+        self._volcar()
+        if self._writer is not None:
+            self._writer.close()
+
+
+def abrir_salida(path):
+    if path.endswith(".parquet"):
+        try:
+            return _ParquetSalida(path)
+        except ImportError:
+            raise SystemExit("Para escribir Parquet instala pyarrow (pip install pyarrow)")
+    return _CsvSalida(path)
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m dyno.batch", description=__doc__.splitlines()[0])
+    ap.add_argument("directorio", help="carpeta con runs grabados (dyno/storage.py)")
+    ap.add_argument("--out", default="reanalisis.csv", help=".csv o .parquet")
+    ap.add_argument("--workers", type=int, default=None, help="procesos (por defecto, núcleos)")
+    ap.add_argument("--J", type=float)
+    ap.add_argument("--D", type=float)
+    ap.add_argument("--reg-window", dest="reg_window_s", type=float)
+    ap.add_argument("--min-samples", dest="min_samples_reg", type=int)
+    ap.add_argument("--median-window", dest="median_window", type=int)
+    ap.add_argument("--curvas", metavar="FICHERO", help="CSV con las curvas agregadas de todos los runs")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = listar_runs(args.directorio)
+    if not paths:
+        print(f"No hay runs en {args.directorio}", file=sys.stderr)
+        return 1
+    overrides = {k: getattr(args, k) for k in PARAMETROS}
+    workers = args.workers or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (workers * 8))
+
+    salida = abrir_salida(args.out)
+    t0 = time.perf_counter()
+    hechos = fallidos = 0
+    curvas = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            trabajos = [(p, overrides, bool(args.curvas)) for p in paths]
+            for fila in pool.map(_reanalizar, trabajos, chunksize=chunksize):
+                c = fila.pop("curvas", None)
+                if fila["error"]:
+                    fallidos += 1
+                    print(f"\r{fila['run']}: {fila['error']}", file=sys.stderr)
+                elif args.curvas:
+                    curvas.append(c)
+                salida.escribir(fila)
+                hechos += 1
+                if hechos % 50 == 0 or hechos == len(paths):
+                    dt = time.perf_counter() - t0
+                    print(f"\r{hechos}/{len(paths)} runs · {hechos / dt:.1f} runs/s", end="", file=sys.stderr)
+    finally:
+        salida.close()
+    dt = time.perf_counter() - t0
+    print(f"\n{hechos} runs en {dt:.2f}s ({hechos / dt:.1f} runs/s, {workers} procesos) -> {args.out}",
+          file=sys.stderr)
+    if fallidos:
+        print(f"{fallidos} runs no se pudieron reanalizar (columna error)", file=sys.stderr)
+    if args.curvas:
+        guardar_curvas(args.curvas, curvas)
+        print(f"Curvas agregadas -> {args.curvas}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
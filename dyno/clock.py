@@ -0,0 +1,76 @@
+"""Base de tiempos: reloj del host monotónico y alineación del reloj del dispositivo.
+
+Las muestras llevan tiempo de host (segundos epoch) para poder compararlas
+con ``Captura.t0`` y guardarlas en los runs, pero se toma de
+``time.monotonic`` (``ahora``), así que un ajuste NTP no mete saltos. Con el
+protocolo binario el tiempo de cada muestra es el del dispositivo, pasado a
+la base del host con ``EstimadorReloj``: el jitter de planificación del host
+no llega a las derivadas (torque y potencia).
+"""
+import math
+import time
+
+_BASE = time.time() - time.monotonic()
+
+
+def ahora():
+    """Hora del host en segundos epoch, pero monotónica (no salta con NTP)."""
+    return _BASE + time.monotonic()
+
+
+class EstimadorReloj:
+    """Ajuste lineal continuo ``t_host ≈ a + b · t_dev`` con olvido exponencial.
+
+    ``observar`` recibe pares (tiempo del dispositivo, hora de lectura en el
+    host), uno por lectura del puerto. La pendiente ``b`` es la deriva del
+    cristal del dispositivo frente al host; hasta tener ``min_span_s`` de datos
+    se fija a 1 y solo se estima el desfase. Un salto mayor que ``salto_s``
+    (dispositivo reiniciado) reinicia el ajuste.
+    """
+
+    def __init__(self, tau_s=120.0, min_span_s=5.0, max_ppm=2000.0, salto_s=1.0):
+        self.tau_s = tau_s
+        self.min_span_s = min_span_s
+        self.max_ppm = max_ppm
+        self.salto_s = salto_s
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self._x0 = self._y0 = 0.0
+        self._x_ultimo = 0.0
+        self._s = self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self._a, self._b = 0.0, 1.0
+
+    def observar(self, t_dev, t_host):
+        if self.n and abs(self.a_host(t_dev) - t_host) > self.salto_s:
+            self.reset()
+        if self.n == 0:
+            self._x0, self._y0 = t_dev, t_host
+        x, y = t_dev - self._x0, t_host - self._y0
+        k = math.exp(-max(x - self._x_ultimo, 0.0) / self.tau_s)
+        self._s = self._s * k + 1.0
+        self._sx = self._sx * k + x
+        self._sy = self._sy * k + y
+        self._sxx = self._sxx * k + x * x
+        self._sxy = self._sxy * k + x * y
+        self._x_ultimo = x
+        self.n += 1
+
+        b = 1.0
+        den = self._s * self._sxx - self._sx * self._sx
+        if x >= self.min_span_s and den > 0:    # x: tiempo desde la primera observación
+            b = (self._s * self._sxy - self._sx * self._sy) / den
+            lim = self.max_ppm * 1e-6
+            b = min(max(b, 1.0 - lim), 1.0 + lim)
+        self._b = b
+        self._a = (self._sy - b * self._sx) / self._s
+
+    def a_host(self, t_dev):
+        """Tiempo(s) del dispositivo -> hora del host (acepta arrays)."""
+        return self._y0 + self._a + self._b * (t_dev - self._x0)
+
+    @property
+    def deriva_ppm(self):
+        """Cuánto adelanta el reloj del dispositivo respecto al host (ppm)."""
+        return (1.0 / self._b - 1.0) * 1e6
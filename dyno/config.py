@@ -0,0 +1,38 @@
+"""Configuración del banco, compartida por el dashboard Tk y el modo headless."""
+
+PUERTO = "COM7"
+BAUDIOS = 9600            # para el protocolo binario a alta frecuencia usa 115200 o más; flancos, 1000000
+PROTOCOLO = "auto"        # "ascii" (RPM: n), "binario" (tramas con CRC), "flancos" (cada pulso) o "auto"
+PULSOS_POR_VUELTA = 1     # pulsos del sensor por vuelta del rodillo (protocolos binario y flancos)
+ESPACIADO_IMANES = None   # fracción de vuelta entre cada imán y el siguiente (python -m dyno.pulses); None = iguales
+J = 0.000055776625  # Momento de inercia (kg·m²)
+D = 0.055           # Diámetro del rodillo (m)
+SAMPLE_INTERVAL = 0.05  # s, periodo de drenado del buffer durante el test
+COMPUTE_INTERVAL = 0.1   # s, periodo del cálculo en vivo (RPM suavizada, torque, potencia)
+RENDER_INTERVAL = 0.1    # s, periodo de refresco de la interfaz (se descartan frames si va cargada)
+RING_CAPACITY = 1 << 16  # muestras en el buffer circular del lector serie
+TEST_DURATION = 15       # s por test
+COUNTDOWN_S = 3          # s de cuenta atrás antes de cada test
+REG_WINDOW_S = 0.35      # ventana para regresión (s)
+MIN_SAMPLES_REG = 4      # mínimo de puntos en la ventana para estimar alpha
+MEDIAN_WINDOW = 3        # ventana del filtro mediano (impar; 15-51 para sensores hall ruidosos)
+NUM_TESTS = 5            # número de tests
+FILAS_TABLA = 10         # filas visibles en la tabla de resultados; con más tests, scroll
+LOD_MAX_PUNTOS = 2000    # puntos máximos por curva en gráficas en vivo y PDF (diezmado min/max)
+SEG_ACEL_MIN = 1000       # RPM/s sostenidos que marcan el arranque de una tirada (modo automático)
+SEG_SUBIDA_MIN = 1000     # RPM que tiene que subir una tirada para contar (si no, falso arranque)
+SEG_MAX_S = 60            # s, una tirada se corta como mucho a esta duración
+PERDIDAS_GRADO = 2        # grado del polinomio de pérdidas en omega, ajustado en la bajada libre
+CURVA_BIN_RPM = 250       # RPM por casilla en las curvas de torque/potencia frente a RPM
+RUNS_DIR = "runs"        # carpeta donde se graba cada test (dyno/storage.py)
+FIRMWARE = ""            # versión del firmware del Arduino, se guarda con cada run
+MOTOR = ""               # etiquetas por defecto del motor y del ESC (con su firmware) de cada run
+ESC = ""
+HISTORIAL_DB = "historial.sqlite"  # base SQLite con todos los tests hechos (dyno/history.py)
+METRICAS = False         # tiempos del pipeline (dyno/metrics.py); el panel de la UI los activa al abrirse
+ANALISIS_PROCESO = True  # análisis de fin de test en un proceso aparte (dyno/worker.py); False = en un hilo
+
+# Varios bancos en un proceso (dyno/stand.py). Cada entrada: {"nombre", "puerto"} y
+# opcionalmente "baudios", "protocolo", "pulsos_por_vuelta", "espaciado", "J", "D"; lo que falte
+# se toma de arriba. Vacío = un único banco en PUERTO.
+BANCOS = []
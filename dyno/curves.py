@@ -0,0 +1,262 @@
+"""Curvas de torque y potencia frente a RPM, con las pérdidas de la deceleración compensadas.
+
+Con el motor acelerando, ``J * alpha`` es solo lo que queda del par después
+de vencer rozamientos (rodamientos, rodillo, aire), así que se queda corto y
+varía con la temperatura o el tensado de un test a otro. En la bajada libre
+el único par es el de pérdidas, ``-J * alpha``: se ajusta con un polinomio
+en omega (``ModeloPerdidas``) y se suma al de la subida en cada muestra.
+
+    c = analizar_curvas(t, rpm, J, REG_WINDOW_S, MIN_SAMPLES_REG, MEDIAN_WINDOW)
+    c["subida"]["rpm"], c["subida"]["potencia"]     # curva compensada por casillas de RPM
+    c["perdidas"](omega)                            # par de pérdidas (N·m)
+
+Las curvas se agrupan en casillas fijas de ``CURVA_BIN_RPM`` (media,
+mínimo, máximo y muestras por casilla, en una pasada sin ordenar) y
+``agregar_curvas`` junta las de muchos runs con una banda de confianza. Si
+el test no tiene bajada suficiente para el ajuste se usa ``respaldo`` (p. ej.
+el último modelo bueno del banco).
+"""
+import math
+
+import numpy as np
+from numpy.polynomial import polynomial as P
+
+from . import config
+from .analysis import HP_W, omega_alpha, rpm_to_omega, window_starts
+
+
+class ModeloPerdidas:
+    """Par de pérdidas (N·m) en función de omega (rad/s): polinomio de coeficientes crecientes.
+
+    Fuera del rango ajustado se mantiene el valor del borde en vez de
+    extrapolar el polinomio, y nunca es negativo.
+    """
+
+    def __init__(self, coefs, omega_min, omega_max, rms=0.0):
+        self.coefs = np.asarray(coefs, dtype=float)
+        self.omega_min = float(omega_min)
+        self.omega_max = float(omega_max)
+        self.rms = float(rms)      # residuo del ajuste (N·m)
+
+    def __call__(self, omega):
+        w = np.clip(np.asarray(omega, dtype=float), self.omega_min, self.omega_max)
+        return np.maximum(P.polyval(w, self.coefs), 0.0)
+
+    def a_dict(self):
+        return {"coefs": self.coefs.tolist(), "omega_min": self.omega_min,
+                "omega_max": self.omega_max, "rms": self.rms}
+
+    @classmethod
+    def desde_dict(cls, d):
+        return cls(**d) if d else None
+
+
+def curva_rpm(rpm, columnas, bin_rpm=config.CURVA_BIN_RPM, min_n=3):
+    """Estadísticos por casilla fija de ``bin_rpm`` RPM de cada serie de ``columnas`` ({nombre: array}).
+
+    La casilla es ``floor(rpm / bin_rpm)``, la misma en todos los runs, así
+    que las curvas se agregan casilla a casilla (``agregar_curvas``). Devuelve
+    ``{"bin", "n", "rpm": RPM media, nombre: media, nombre_min, nombre_max}``
+    de las casillas con al menos ``min_n`` muestras, en orden de RPM.
+
+    Una pasada en el orden de llegada: las muestras seguidas en la misma
+    casilla (lo normal en una subida o una bajada) se reducen con
+    ``reduceat`` y los tramos se juntan con ``bincount``/``minimum.at``.
+    """
+    rpm = np.asarray(rpm, dtype=float)
+    if len(rpm) == 0:
+        curva = {"bin": np.zeros(0, dtype=np.int64), "n": np.zeros(0, dtype=np.int64), "rpm": np.zeros(0)}
+        for nombre in columnas:
+            curva[nombre] = curva[nombre + "_min"] = curva[nombre + "_max"] = np.zeros(0)
+        return curva
+    k = np.floor(rpm / bin_rpm).astype(np.int64)
+    k0 = int(k.min())
+    inicios = np.r_[0, np.flatnonzero(np.diff(k)) + 1]
+    kt = k[inicios] - k0           # casilla de cada tramo
+    n = np.bincount(kt, weights=np.diff(np.r_[inicios, len(k)])).astype(np.int64)
+    ok = n >= min_n
+
+    def media(v):
+        return np.bincount(kt, weights=np.add.reduceat(v, inicios), minlength=len(n))[ok] / n[ok]
+
+    curva = {"bin": np.flatnonzero(ok) + k0, "n": n[ok], "rpm": media(rpm)}
+    for nombre, v in columnas.items():
+        v = np.asarray(v, dtype=float)
+        mn = np.full(len(n), np.inf)
+        np.minimum.at(mn, kt, np.minimum.reduceat(v, inicios))
+        mx = np.full(len(n), -np.inf)
+        np.maximum.at(mx, kt, np.maximum.reduceat(v, inicios))
+        curva[nombre] = media(v)
+        curva[nombre + "_min"] = mn[ok]
+        curva[nombre + "_max"] = mx[ok]
+    return curva
+
+
+def ajustar_perdidas(bajada, grado=config.PERDIDAS_GRADO):
+    """``ModeloPerdidas`` ajustado a una curva de bajada (``rpm``, ``torque``, ``n``); None si no da."""
+    if len(bajada["rpm"]) < grado + 2:
+        return None
+    w = rpm_to_omega(bajada["rpm"])
+    # cada casilla pesa según sus muestras (su media tiene menos ruido)
+    ajuste = np.polynomial.Polynomial.fit(w, bajada["torque"], grado, w=np.sqrt(bajada["n"]))
+    rms = float(np.sqrt(np.mean((ajuste(w) - bajada["torque"]) ** 2)))
+    return ModeloPerdidas(ajuste.convert().coef, w.min(), w.max(), rms)
+
+
+def omega_ventana(ts, omegas, window_s):
+    """Omega media de la ventana hacia atrás de cada muestra (la misma de la regresión).
+
+    La pendiente de la ventana corresponde a su centro, no a su última
+    muestra: emparejarla con la omega del final desplaza la curva hacia
+    arriba en RPM (unas ``window_s / 2`` de aceleración).
+    """
+    if len(ts) == 0:
+        return omegas
+    starts = window_starts(ts, window_s)
+    acum = np.zeros(len(omegas) + 1)
+    np.cumsum(omegas, out=acum[1:])
+    idx = np.arange(len(omegas))
+    return (acum[idx + 1] - acum[starts]) / (idx + 1 - starts)
+
+
+def analizar_curvas(ts, rpms, J, window_s, min_samples, filter_window=3, perdidas=None, respaldo=None,
+                    grado=config.PERDIDAS_GRADO, bin_rpm=config.CURVA_BIN_RPM):
+    """Curvas de subida (compensada) y bajada de un test, y máximos de la curva compensada.
+
+    El test se parte en el pico de RPM (filtrada). La bajada se toma desde
+    ``window_s`` después del pico, para que la regresión no mezcle las dos
+    fases. Con ``perdidas`` se usa ese modelo en vez de ajustarlo.
+    ``origen_perdidas`` dice de dónde salió: ``"bajada"``, ``"fijo"``,
+    ``"respaldo"`` o None (sin compensar). Los máximos salen de las
+    casillas, no de una muestra suelta, así que el ruido los infla menos.
+    """
+    ts = np.asarray(ts, dtype=float)
+    omegas, alpha, valid = omega_alpha(ts, rpms, window_s, min_samples, filter_window)
+    omegas = omega_ventana(ts, omegas, window_s)
+    rpm_f = omegas * (60 / (2 * math.pi))
+    i_pico = int(np.argmax(omegas)) if len(ts) else 0
+    tras_pico = ts > (ts[i_pico] + window_s if len(ts) else 0.0)
+
+    baja = valid & tras_pico & (alpha < 0)
+    tq_b = -J * alpha[baja]
+    bajada = curva_rpm(rpm_f[baja], {"torque": tq_b, "potencia": tq_b * omegas[baja] / HP_W}, bin_rpm)
+
+    if perdidas is not None:
+        modelo, origen = perdidas, "fijo"
+    else:
+        modelo, origen = ajustar_perdidas(bajada, grado), "bajada"
+        if modelo is None:
+            modelo, origen = respaldo, "respaldo" if respaldo is not None else None
+    bajada["modelo"] = modelo(rpm_to_omega(bajada["rpm"])) if modelo else np.zeros(len(bajada["rpm"]))
+
+    sube = valid & (np.arange(len(ts)) <= i_pico) & (alpha > 0)
+    w = omegas[sube]
+    inercia = J * alpha[sube]
+    tl = modelo(w) if modelo else np.zeros(len(w))
+    tq = inercia + tl
+    subida = curva_rpm(rpm_f[sube], {"torque": tq, "torque_inercia": inercia, "perdidas": tl,
+                                     "potencia": tq * w / HP_W}, bin_rpm)
+
+    hay = len(subida["rpm"]) > 0
+    k = int(np.argmax(subida["potencia"])) if hay else 0
+    return {
+        "bin_rpm": bin_rpm,
+        "subida": subida,
+        "bajada": bajada,
+        "perdidas": modelo,
+        "origen_perdidas": origen,
+        "torque_corr_max": float(subida["torque"].max()) if hay else 0.0,
+        "potencia_corr_max": float(subida["potencia"][k]) if hay else 0.0,
+        "rpm_potencia_max": float(subida["rpm"][k]) if hay else 0.0,
+    }
+
+
+# t de Student bilateral al 95 % por grados de libertad (1-30); con más, la normal
+_T95 = np.array([12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+                 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+                 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042])
+
+
+def agregar_curvas(curvas, columna="potencia", fase="subida"):
+    """Curva media de muchos runs por casilla, con banda de confianza al 95 % y envolvente.
+
+    ``curvas``: resultados de ``analizar_curvas`` (o su JSON) con el mismo
+    ``bin_rpm``; los None se saltan. Devuelve ``{"bin", "rpm", "runs",
+    "media", "std", "ic", "min", "max"}``: ``runs`` es cuántos runs llegan a
+    la casilla, ``media ± ic`` el intervalo de confianza de la media (NaN con
+    un solo run) y ``min``/``max`` los extremos de todas sus muestras. Se
+    concatenan las casillas de todos los runs y se reduce con ``bincount``,
+    sin bucles por run ni por casilla.
+    """
+    curvas = [c for c in curvas if c is not None and len(c[fase]["bin"])]
+    claves = ("bin", "rpm", "runs", "media", "std", "ic", "min", "max")
+    if not curvas:
+        return {k: np.zeros(0) for k in claves}
+    if len({c.get("bin_rpm") for c in curvas}) > 1:
+        raise ValueError("curvas con distinto bin_rpm")
+
+    def unir(nombre, dtype=float):
+        return np.concatenate([np.asarray(c[fase][nombre], dtype=dtype) for c in curvas])
+
+    k = unir("bin", np.int64)
+    k0 = int(k.min())
+    k -= k0
+    v = unir(columna)
+    runs = np.bincount(k)
+    ok = runs > 0
+    m = runs[ok]
+    media = np.bincount(k, weights=v)[ok] / m
+    var = np.bincount(k, weights=v * v)[ok] - m * media * media
+    std = np.sqrt(np.maximum(var, 0.0) / np.maximum(m - 1, 1))
+    t = np.where(m - 1 <= len(_T95), _T95[np.clip(m - 2, 0, len(_T95) - 1)], 1.96)
+    ic = np.where(m > 1, t * std / np.sqrt(m), np.nan)
+    mn = np.full(len(runs), np.inf)
+    np.minimum.at(mn, k, unir(columna + "_min"))
+    mx = np.full(len(runs), -np.inf)
+    np.maximum.at(mx, k, unir(columna + "_max"))
+    return {
+        "bin": np.flatnonzero(ok) + k0,
+        "rpm": np.bincount(k, weights=unir("rpm"))[ok] / m,
+        "runs": m,
+        "media": media,
+        "std": std,
+        "ic": ic,
+        "min": mn[ok],
+        "max": mx[ok],
+    }
+
+
+def curvas_a_json(c):
+    """``analizar_curvas`` con listas en vez de arrays y el modelo como dict (para meta.json)."""
+    out = {k: v for k, v in c.items() if k not in ("subida", "bajada", "perdidas")}
+    for fase in ("subida", "bajada"):
+        out[fase] = {k: v.tolist() for k, v in c[fase].items()}
+    out["perdidas"] = c["perdidas"].a_dict() if c["perdidas"] is not None else None
+    return out
+
+
+def curvas_desde_json(d):
+    """Inversa de ``curvas_a_json``."""
+    c = dict(d)
+    for fase in ("subida", "bajada"):
+        c[fase] = {k: np.asarray(v) for k, v in d[fase].items()}
+    c["perdidas"] = ModeloPerdidas.desde_dict(d["perdidas"])
+    return c
+
+
+def resultado_curvas(c):
+    """Campos que se añaden al resultado de un test: máximos compensados y ``curvas`` en JSON."""
+    return {
+        "torque_corr_max": c["torque_corr_max"],
+        "potencia_corr_max": c["potencia_corr_max"],
+        "rpm_potencia_max": c["rpm_potencia_max"],
+        "curvas": curvas_a_json(c),
+    }
+
+
+def modelo_ajustado(res):
+    """El ``ModeloPerdidas`` que un resultado ajustó con su propia bajada (None si no lo hizo)."""
+    c = res.get("curvas")
+    if not c or c.get("origen_perdidas") != "bajada":
+        return None
+    return ModeloPerdidas.desde_dict(c["perdidas"])
@@ -0,0 +1,97 @@
+"""Filtro mediano deslizante: por lotes sobre arrays y en streaming muestra a muestra.
+
+Ambos modos dan el mismo resultado que el ``median_filter`` original
+(ventana centrada de ``2*(window//2)+1`` puntos, recortada en los bordes).
+"""
+from bisect import bisect_left, insort
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+_CHUNK_ELEMS = 1 << 22  # elementos por bloque en el modo por lotes (~32 MB)
+
+
+class RunningMedian:
+    """Mediana centrada en streaming sobre una ventana ordenada (O(log w) búsqueda por muestra).
+
+    ``push`` devuelve la lista (normalmente 0 o 1 valores) de salidas que ya se
+    pueden calcular; como la ventana es centrada, la salida va ``window//2``
+    muestras por detrás de la entrada. ``flush`` emite la cola con la ventana
+    recortada, igual que en los bordes del filtro por lotes.
+    """
+
+    def __init__(self, window=3):
+        self.half = max(window, 1) // 2
+        self.size = 2 * self.half + 1
+        self.reset()
+
+    def reset(self):
+        self._fifo = deque()
+        self._sorted = []
+        self.count = 0      # muestras recibidas
+        self.emitted = 0    # salidas entregadas
+
+    def _median(self):
+        s = self._sorted
+        n = len(s)
+        m = n // 2
+        if n % 2:
+            return s[m]
+        return (s[m - 1] + s[m]) / 2
+
+    def _drop_oldest(self):
+        old = self._fifo.popleft()
+        del self._sorted[bisect_left(self._sorted, old)]
+
+    def push(self, x):
+        x = float(x)
+        self._fifo.append(x)
+        insort(self._sorted, x)
+        self.count += 1
+        if len(self._fifo) > self.size:
+            self._drop_oldest()
+        if self.count > self.half:
+            self.emitted += 1
+            return [self._median()]
+        return []
+
+    def extend(self, values):
+        out = []
+        for x in values:
+            out.extend(self.push(x))
+        return out
+
+    def flush(self):
+        """Salidas pendientes del final del run; deja el filtro listo para otro run."""
+        out = []
+        for k in range(self.emitted, self.count):
+            first = self.count - len(self._fifo)  # índice de la muestra más antigua en la ventana
+            while first < k - self.half:
+                self._drop_oldest()
+                first += 1
+            out.append(self._median())
+        self.reset()
+        return out
+
+
+def median_filter(values, window=3):
+    """Mediana deslizante centrada por lotes; en los bordes la ventana se recorta."""
+    v = np.asarray(values, dtype=float)
+    n = len(v)
+    if n == 0 or window <= 1:
+        return v.copy()
+    half = window // 2
+    size = 2 * half + 1
+    out = np.empty(n)
+    if n > 2 * half:
+        # interior en bloques para acotar la memoria de np.median con ventanas anchas
+        view = sliding_window_view(v, size)
+        step = max(1, _CHUNK_ELEMS // size)
+        for a in range(0, len(view), step):
+            b = min(a + step, len(view))
+            out[half + a:half + b] = np.median(view[a:b], axis=1)
+    # bordes: ventana recortada, igual que statistics.median(values[start:end])
+    for i in list(range(min(half, n))) + list(range(max(half, n - half), n)):
+        out[i] = np.median(v[max(0, i - half):min(n, i + half + 1)])
+    return out
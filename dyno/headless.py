@@ -0,0 +1,220 @@
+"""Modo sin interfaz: conecta al puerto, hace N tests y guarda resultados y muestras.
+
+    python -m dyno.headless --port /dev/ttyACM0 --tests 5 --out runs/
+    python -m dyno.headless --port /dev/ttyACM0 --port /dev/ttyACM1 --out runs/
+
+Con varios ``--port`` (o ``BANCOS`` en dyno/config.py) todos los bancos hacen
+los tests a la vez, leídos por un único bucle de E/S (dyno.stand), y cada uno
+guarda en ``out/<banco>/``. No importa tkinter ni matplotlib, así que funciona
+en un banco sin pantalla.
+
+Con ``--auto`` no hay cuenta atrás ni duración fija: se lee sin parar y cada
+tirada (arranque, pico y deceleración) se detecta, se corta y se analiza sola
+(dyno.segmentation), hasta tener ``--tests`` por banco o pasar ``--max-time``.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from . import config
+from .metrics import METRICAS
+from .clock import ahora
+from .history import Historial
+from .segmentation import DetectorTiradas
+from .session import nuevo_run
+from .stand import Banco, Taller, bancos_desde_config
+from .storage import actualizar_meta
+
+CAMPOS = ["rpm_max", "velocidad_max", "torque_max", "potencia_max",
+          "torque_corr_max", "potencia_corr_max", "rpm_potencia_max"]
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m dyno.headless", description=__doc__.splitlines()[0])
+    ap.add_argument("--port", action="append", help="repetir para varios bancos (por defecto, config)")
+    ap.add_argument("--baud", type=int, default=config.BAUDIOS)
+    ap.add_argument("--protocolo", default=config.PROTOCOLO, choices=["auto", "ascii", "binario", "flancos"])
+    ap.add_argument("--pulsos", type=int, default=config.PULSOS_POR_VUELTA, help="pulsos por vuelta")
+    ap.add_argument("--espaciado", type=float, nargs="+", default=config.ESPACIADO_IMANES,
+                    help="fracción de vuelta entre imanes, con --protocolo flancos (python -m dyno.pulses)")
+    ap.add_argument("--tests", type=int, default=config.NUM_TESTS)
+    ap.add_argument("--duration", type=float, default=config.TEST_DURATION, help="s por test")
+    ap.add_argument("--countdown", type=float, default=config.COUNTDOWN_S, help="s antes de cada test")
+    ap.add_argument("--J", type=float, help="para todos los bancos (por defecto, su calibración)")
+    ap.add_argument("--D", type=float)
+    ap.add_argument("--reg-window", type=float, default=config.REG_WINDOW_S)
+    ap.add_argument("--min-samples", type=int, default=config.MIN_SAMPLES_REG)
+    ap.add_argument("--median-window", type=int, default=config.MEDIAN_WINDOW)
+    ap.add_argument("--out", default=config.RUNS_DIR, help="directorio de salida")
+    ap.add_argument("--motor", default=config.MOTOR, help="etiqueta del motor en los runs y el historial")
+    ap.add_argument("--esc", default=config.ESC, help="etiqueta del ESC (y su firmware)")
+    ap.add_argument("--historial", default=config.HISTORIAL_DB, help="base SQLite de tests")
+    ap.add_argument("--auto", action="store_true",
+                    help="detecta y corta las tiradas solo, sin cuenta atrás ni --duration")
+    ap.add_argument("--max-time", type=float, help="s máximos de captura con --auto")
+    ap.add_argument("--metrics", metavar="FICHERO",
+                    help="guarda tiempos y contadores del pipeline (.json, o .prom para Prometheus)")
+    return ap.parse_args(argv)
+
+
+def capturar_tests(bancos, duracion, writers):
+    """Captura a la vez un test en cada banco; devuelve los Run grabados."""
+    for b, w in zip(bancos, writers):
+        b.captura.iniciar(w)
+    fin = time.monotonic() + duracion
+    while time.monotonic() < fin:
+        time.sleep(config.SAMPLE_INTERVAL)
+        for b in bancos:
+            b.captura.drenar()
+    return [b.captura.terminar() for b in bancos]
+
+
+def capturar_auto(bancos, args, directorios, taller, analisis, historial):
+    """Modo --auto: cada banco con su detector; devuelve {banco: [resultados]}.
+
+    Los análisis van al pool del ``Taller`` y se recogen en vueltas siguientes
+    del bucle, así ningún banco deja de drenarse mientras se analiza otro.
+    """
+    detectores = {b.nombre: DetectorTiradas() for b in bancos}
+    cursores = {b.nombre: b.ring.head for b in bancos}
+    resultados = {b.nombre: [] for b in bancos}
+    pendientes = {b.nombre: [] for b in bancos}     # análisis lanzados, en orden de tirada
+    fin = time.monotonic() + args.max_time if args.max_time else None
+    print(f"Esperando tiradas ({args.tests} por banco)...")
+    try:
+        while any(len(resultados[b.nombre]) + len(pendientes[b.nombre]) < args.tests for b in bancos):
+            if fin is not None and time.monotonic() >= fin:
+                break
+            time.sleep(config.SAMPLE_INTERVAL)
+            for b in bancos:
+                det = detectores[b.nombre]
+                recs, cursores[b.nombre] = b.ring.read(cursores[b.nombre])
+                tiradas = det.extend(recs["t"], recs["rpm"]) + det.silencio(ahora())
+                for tir in tiradas:
+                    _lanzar_tirada(b, tir, resultados[b.nombre], pendientes[b.nombre], args, directorios,
+                                   taller, analisis)
+                _recoger(b, pendientes[b.nombre], resultados[b.nombre], historial)
+    except KeyboardInterrupt:
+        pass
+    # lo que quede abierto al parar también cuenta
+    for b in bancos:
+        for tir in detectores[b.nombre].terminar():
+            _lanzar_tirada(b, tir, resultados[b.nombre], pendientes[b.nombre], args, directorios,
+                           taller, analisis)
+    for b in bancos:
+        _recoger(b, pendientes[b.nombre], resultados[b.nombre], historial, esperar=True)
+    return resultados
+
+
+def _lanzar_tirada(b, tir, resultados, pendientes, args, directorios, taller, analisis):
+    """Graba la tirada como run y deja su análisis en ``pendientes``."""
+    i = len(resultados) + len(pendientes) + 1
+    if i > args.tests:
+        return
+    w = nuevo_run(i, b, directorios[b.nombre], banco=b.nombre, J=b.J, D=b.D,
+                  reg_window_s=args.reg_window, min_samples_reg=args.min_samples,
+                  median_window=args.median_window, motor=args.motor, esc=args.esc, automatico=True,
+                  motivo_fin=tir.motivo, t_inicio=tir.t_inicio, t_pico=tir.t_pico, t_fin=tir.t_fin)
+    w.append(tir.muestras)
+    w.close()
+    pendientes.append((i, w.path, tir, taller.analizar(b, tir.muestras, **analisis)))
+
+
+def _recoger(b, pendientes, resultados, historial, esperar=False):
+    """Apunta, en orden de tirada, los análisis ya terminados (todos, con ``esperar``)."""
+    while pendientes and (esperar or pendientes[0][3].done()):
+        i, path, tir, fut = pendientes.pop(0)
+        res = fut.result()
+        historial.registrar(path, actualizar_meta(path, resultados=res))
+        resultados.append(res)
+        print(f"  {b.nombre} tirada {i}: {tir.duracion:.1f} s | RPM máx {res['rpm_max']:.0f} | "
+              f"torque comp. {res['torque_corr_max']:.6f} N·m | potencia comp. {res['potencia_corr_max']:.4f} HP | {len(tir)} muestras")
+
+
+def crear_bancos(args):
+    if args.port:
+        bancos = [Banco(f"banco{k+1}", p, args.baud, args.protocolo, args.pulsos, args.espaciado)
+                  for k, p in enumerate(args.port)]
+    else:
+        bancos = bancos_desde_config()
+    for b in bancos:
+        if args.J is not None:
+            b.J = args.J
+        if args.D is not None:
+            b.D = args.D
+    return bancos
+
+
+def guardar_resultados(directorio, banco, args, resultados):
+    os.makedirs(directorio, exist_ok=True)
+    with open(os.path.join(directorio, "resultados.csv"), "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["test"] + CAMPOS)
+        for i, res in enumerate(resultados):
+            w.writerow([i + 1] + [res[k] for k in CAMPOS])
+    parametros = {k: v for k, v in vars(args).items() if k not in ("out", "port", "metrics")}
+    parametros.update(banco=banco.nombre, port=banco.puerto, J=banco.J, D=banco.D)
+    with open(os.path.join(directorio, "resultados.json"), "w") as f:
+        json.dump({"parametros": parametros,
+                   "enlace": banco.estado(),
+                   "tests": resultados}, f, indent=2, ensure_ascii=False)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.out, exist_ok=True)
+
+    todos = crear_bancos(args)
+    if args.metrics:
+        METRICAS.activo = True
+        for b in todos:
+            METRICAS.fuente(b.metricas)
+    taller = Taller(todos).start()
+    bancos = [b for b in todos if b.conectado]
+    for b in todos:
+        if not b.conectado:
+            print(f"Sin conexión con {b.puerto} ({b.nombre}): {b.error}", file=sys.stderr)
+    if not bancos:
+        taller.stop()
+        return 1
+    # con un solo banco se mantiene la salida plana en --out
+    directorios = {b.nombre: args.out if len(todos) == 1 else os.path.join(args.out, b.nombre)
+                   for b in bancos}
+    analisis = dict(window_s=args.reg_window, min_samples=args.min_samples, filter_window=args.median_window)
+
+    historial = Historial(args.historial)
+    resultados = {b.nombre: [] for b in bancos}
+    if args.auto:
+        resultados = capturar_auto(bancos, args, directorios, taller, analisis, historial)
+    for i in range(0 if args.auto else args.tests):
+        print(f"Test {i+1}/{args.tests}: comienza en {args.countdown:g}s")
+        time.sleep(args.countdown)
+        print("¡Acelera!")
+        writers = [nuevo_run(i + 1, b, directorios[b.nombre], banco=b.nombre, J=b.J, D=b.D,
+                             reg_window_s=args.reg_window, min_samples_reg=args.min_samples,
+                             median_window=args.median_window, motor=args.motor, esc=args.esc)
+                   for b in bancos]
+        recs = capturar_tests(bancos, args.duration, writers)
+        futuros = [taller.analizar(b, rec, **analisis) for b, rec in zip(bancos, recs)]
+        for b, rec, fut in zip(bancos, recs, futuros):
+            res = fut.result()
+            historial.registrar(rec.path, actualizar_meta(rec.path, resultados=res))
+            resultados[b.nombre].append(res)
+            print(f"  {b.nombre}: RPM máx {res['rpm_max']:.0f} | {res['velocidad_max']:.2f} km/h | "
+                  f"torque comp. {res['torque_corr_max']:.6f} N·m | potencia comp. {res['potencia_corr_max']:.4f} HP | {len(rec)} muestras")
+    taller.stop()
+    historial.close()
+
+    for b in bancos:
+        guardar_resultados(directorios[b.nombre], b, args, resultados[b.nombre])
+    if args.metrics:
+        METRICAS.guardar(args.metrics)
+    print(f"Resultados en {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
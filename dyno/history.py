@@ -0,0 +1,214 @@
+"""Historial de tests en SQLite: métricas, parámetros y etiquetas de cada test, con índices.
+
+    h = Historial()                                   # config.HISTORIAL_DB
+    h.registrar(rec.path, actualizar_meta(rec.path, resultados=res))
+    h.mejores("potencia_corr_max", motor="2450KV", desde="2026-10-01", limite=20)
+    h.media_por("esc", "potencia_max")
+    filas, cursor = h.pagina(orden="creado", motor="2450KV")         # primera página
+    filas, cursor = h.pagina(orden="creado", motor="2450KV", despues=cursor)
+
+Una fila por test. Las muestras no se copian: ``run`` es la ruta absoluta de
+la carpeta del run (``Run(fila["run"])`` las abre como memmap). ``creado`` es
+el texto ISO del ``meta.json`` (``2026-10-18T15:30:00``), que ordena igual que
+la fecha, así que "este mes" es ``desde="2026-10"``.
+
+Las páginas van por clave (``orden`` e ``id`` de la última fila), no por
+``OFFSET``: la página 500 cuesta lo mismo que la primera.
+
+Desde consola, para importar un archivo de runs ya grabado o consultar:
+
+    python -m dyno.history runs/ --importar
+    python -m dyno.history --mejores potencia_corr_max --motor 2450KV --desde 2026-10
+    python -m dyno.history --media-por esc --metrica potencia_max
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+from . import config
+from .storage import META, leer_meta
+
+METRICAS = ("rpm_max", "velocidad_max", "torque_max", "potencia_max",
+            "torque_corr_max", "potencia_corr_max", "rpm_potencia_max")
+ETIQUETAS = ("banco", "motor", "esc", "firmware")
+PARAMETROS = ("J", "D", "reg_window_s", "min_samples_reg", "median_window")
+COLUMNAS = ("run", "creado", "test", "automatico", "n") + ETIQUETAS + PARAMETROS + METRICAS + ("origen_perdidas",)
+# métricas con índice propio (y con el motor delante) para ordenar sin recorrer la tabla
+INDEXADAS = ("potencia_corr_max", "torque_corr_max", "rpm_max")
+
+ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    run TEXT UNIQUE NOT NULL,
+    creado TEXT NOT NULL,
+    test INTEGER, automatico INTEGER, n INTEGER,
+    banco TEXT, motor TEXT, esc TEXT, firmware TEXT,
+    J REAL, D REAL, reg_window_s REAL, min_samples_reg INTEGER, median_window INTEGER,
+    {", ".join(f"{m} REAL" for m in METRICAS)},
+    origen_perdidas TEXT
+);
+CREATE INDEX IF NOT EXISTS tests_creado ON tests(creado);
+CREATE INDEX IF NOT EXISTS tests_motor_creado ON tests(motor, creado);
+-- con las potencias dentro: la media por ESC sale del índice sin leer la tabla
+CREATE INDEX IF NOT EXISTS tests_esc_creado ON tests(esc, creado, potencia_max, potencia_corr_max);
+CREATE INDEX IF NOT EXISTS tests_banco_creado ON tests(banco, creado);
+{"".join(f"CREATE INDEX IF NOT EXISTS tests_{m} ON tests({m});"
+         f"CREATE INDEX IF NOT EXISTS tests_motor_{m} ON tests(motor, {m});" for m in INDEXADAS)}
+"""
+
+
+def fila_desde_meta(path, meta):
+    """Fila de ``tests`` a partir del ``meta.json`` de un run con resultados."""
+    res = meta.get("resultados") or {}
+    fila = {c: meta.get(c) for c in ("test", "n") + ETIQUETAS + PARAMETROS}
+    fila.update({m: res.get(m) for m in METRICAS})
+    fila["run"] = os.path.abspath(path)
+    fila["creado"] = meta.get("creado") or time.strftime("%Y-%m-%dT%H:%M:%S")
+    fila["automatico"] = int(bool(meta.get("automatico")))
+    fila["banco"] = meta.get("banco") or meta.get("puerto")
+    fila["origen_perdidas"] = res.get("origen_perdidas") or (res.get("curvas") or {}).get("origen_perdidas")
+    return fila
+
+
+def _columna(nombre, validas):
+    # los nombres de columna no pueden ir como parámetros de SQL: solo se aceptan los conocidos
+    if nombre not in validas:
+        raise ValueError(f"columna desconocida: {nombre!r} (válidas: {', '.join(validas)})")
+    return nombre
+
+
+class Historial:
+    """Base SQLite de tests; una conexión por hilo (la del hilo que la crea)."""
+
+    def __init__(self, path=config.HISTORIAL_DB):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")      # lecturas sin bloquear al que escribe
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(ESQUEMA)
+
+    def close(self):
+        self.db.close()
+
+    def registrar(self, path, meta):
+        """Añade (o actualiza, si se reanaliza) el test del run ``path``."""
+        self.registrar_muchos([fila_desde_meta(path, meta)])
+
+    def registrar_muchos(self, filas):
+        cols = ", ".join(COLUMNAS)
+        ph = ", ".join(f":{c}" for c in COLUMNAS)
+        act = ", ".join(f"{c}=excluded.{c}" for c in COLUMNAS if c != "run")
+        with self.db:
+            self.db.executemany(f"INSERT INTO tests ({cols}) VALUES ({ph}) "
+                                f"ON CONFLICT(run) DO UPDATE SET {act}", filas)
+
+    def importar(self, directorio):
+        """Registra todos los runs con resultados bajo ``directorio`` (también en subcarpetas por banco)."""
+        filas = []
+        for base, _, ficheros in os.walk(directorio):
+            if META not in ficheros:
+                continue
+            try:
+                meta = leer_meta(base)
+            except (OSError, ValueError):
+                continue
+            if meta.get("resultados"):
+                filas.append(fila_desde_meta(base, meta))
+        self.registrar_muchos(filas)
+        return len(filas)
+
+    def _filtros(self, motor=None, esc=None, banco=None, desde=None, hasta=None):
+        """(WHERE ..., parámetros). ``desde``/``hasta``: prefijos ISO (``2026-10``, ``2026-10-18``); ``hasta`` no incluido."""
+        cond, args = [], []
+        for col, v in (("motor", motor), ("esc", esc), ("banco", banco)):
+            if v is not None:
+                cond.append(f"{col} = ?")
+                args.append(v)
+        if desde:
+            cond.append("creado >= ?")
+            args.append(desde)
+        if hasta:
+            cond.append("creado < ?")
+            args.append(hasta)
+        return (" WHERE " + " AND ".join(cond)) if cond else "", args
+
+    def mejores(self, metrica="potencia_corr_max", limite=20, **filtros):
+        """Los ``limite`` tests con mayor ``metrica`` (filtros: motor, esc, banco, desde, hasta)."""
+        m = _columna(metrica, METRICAS)
+        donde, args = self._filtros(**filtros)
+        donde += (" AND " if donde else " WHERE ") + f"{m} IS NOT NULL"
+        return self.db.execute(f"SELECT * FROM tests{donde} ORDER BY {m} DESC LIMIT ?",
+                               args + [limite]).fetchall()
+
+    def media_por(self, grupo="esc", metrica="potencia_max", **filtros):
+        """[(grupo, media, máx, tests)] de ``metrica`` por ``grupo`` (motor, esc, banco, firmware)."""
+        g = _columna(grupo, ETIQUETAS)
+        m = _columna(metrica, METRICAS)
+        donde, args = self._filtros(**filtros)
+        return self.db.execute(f"SELECT {g}, AVG({m}), MAX({m}), COUNT({m}) FROM tests{donde} "
+                               f"GROUP BY {g} ORDER BY AVG({m}) DESC", args).fetchall()
+
+    def pagina(self, orden="creado", descendente=True, limite=100, despues=None, **filtros):
+        """(filas, cursor) de una página; ``despues`` = el cursor de la anterior (None: la primera).
+
+        El cursor es ``(valor de orden, id)`` de la última fila; None cuando no hay más.
+        """
+        o = _columna(orden, ("creado",) + METRICAS)
+        donde, args = self._filtros(**filtros)
+        cond = [] if orden == "creado" else [f"{o} IS NOT NULL"]
+        if despues is not None:
+            cond.append(f"({o}, id) {'<' if descendente else '>'} (?, ?)")
+            args = args + list(despues)
+        if cond:
+            donde += (" AND " if donde else " WHERE ") + " AND ".join(cond)
+        sentido = "DESC" if descendente else "ASC"
+        filas = self.db.execute(f"SELECT * FROM tests{donde} ORDER BY {o} {sentido}, id {sentido} LIMIT ?",
+                                args + [limite]).fetchall()
+        cursor = (filas[-1][o], filas[-1]["id"]) if len(filas) == limite else None
+        return filas, cursor
+
+    def valores(self, etiqueta):
+        """Valores distintos de ``etiqueta`` (para los desplegables de filtro)."""
+        e = _columna(etiqueta, ETIQUETAS)
+        return [r[0] for r in self.db.execute(f"SELECT DISTINCT {e} FROM tests WHERE {e} IS NOT NULL "
+                                              f"AND {e} != '' ORDER BY {e}")]
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM tests").fetchone()[0]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("directorio", nargs="?", default=config.RUNS_DIR)
+    ap.add_argument("--db", default=config.HISTORIAL_DB)
+    ap.add_argument("--importar", action="store_true", help="registrar los runs de DIRECTORIO")
+    ap.add_argument("--mejores", metavar="METRICA", choices=METRICAS)
+    ap.add_argument("--media-por", choices=ETIQUETAS)
+    ap.add_argument("--metrica", default="potencia_corr_max", choices=METRICAS)
+    ap.add_argument("--motor")
+    ap.add_argument("--esc")
+    ap.add_argument("--banco")
+    ap.add_argument("--desde", help="fecha ISO o prefijo (2026-10)")
+    ap.add_argument("--hasta", help="fecha ISO o prefijo, sin incluir")
+    ap.add_argument("--limite", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    h = Historial(args.db)
+    filtros = dict(motor=args.motor, esc=args.esc, banco=args.banco, desde=args.desde, hasta=args.hasta)
+    if args.importar:
+        print(f"{h.importar(args.directorio)} tests registrados; {len(h)} en {args.db}")
+    if args.mejores:
+        for r in h.mejores(args.mejores, args.limite, **filtros):
+            print(f"{r['creado']}  {r['motor'] or '-':<12} {r['esc'] or '-':<12} "
+                  f"{r[args.mejores]:>12.4f}  {r['run']}")
+    if args.media_por:
+        for g, media, maximo, n in h.media_por(args.media_por, args.metrica, **filtros):
+            print(f"{g or '-':<20} media {media if media is not None else float('nan'):.4f}  "
+                  f"máx {maximo if maximo is not None else float('nan'):.4f}  ({n} tests)")
+    h.close()
+
+
+if __name__ == "__main__":
+    main()
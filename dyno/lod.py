@@ -0,0 +1,139 @@
+"""Diezmado min/max para dibujar runs largos con pocos puntos sin perder picos.
+
+Cada cubo de muestras se representa por su mínimo y su máximo (en orden
+temporal), así que el máximo de RPM de la curva dibujada es exactamente el
+del run. ``minmax_decimate`` hace una pasada sobre un run ya grabado (sirve
+para memmaps); ``PiramideMinMax`` mantiene niveles de cubos cada vez mayores
+y se actualiza por lotes durante la captura.
+"""
+import numpy as np
+
+
+def _pares(imin, imax):
+    # (min, max) de cada cubo en orden temporal
+    return np.column_stack((np.minimum(imin, imax), np.maximum(imin, imax))).ravel()
+
+
+def minmax_decimate(ts, ys, max_puntos=2000):
+    """Devuelve (ts, ys) con como mucho ~``max_puntos`` puntos: min y max de cada cubo."""
+    n = len(ys)
+    if n <= max_puntos:
+        return np.array(ts[:n], dtype=float), np.array(ys[:n], dtype=float)
+    cubos = max(1, (max_puntos - 2) // 2)
+    s = -(-n // cubos)          # muestras por cubo (ceil)
+    m = n // s                  # cubos completos
+    bloque = np.asarray(ys[:m * s]).reshape(m, s)
+    base = np.arange(m) * s
+    partes = [[0], _pares(bloque.argmin(1) + base, bloque.argmax(1) + base)]
+    if m * s < n:
+        cola = np.asarray(ys[m * s:])
+        partes.append([m * s + cola.argmin(), m * s + cola.argmax()])
+    partes.append([n - 1])
+    idx = np.unique(np.concatenate(partes).astype(np.intp))
+    return np.asarray(ts[idx], dtype=float), np.asarray(ys[idx], dtype=float)
+
+
+class _Columna:
+    """Array que crece por lotes (duplicando capacidad)."""
+
+    def __init__(self, dtype, capacidad=4096):
+        self._a = np.empty(capacidad, dtype=dtype)
+        self.n = 0
+
+    def extend(self, vals):
+        k = len(vals)
+        if self.n + k > len(self._a):
+            nuevo = np.empty(max(2 * len(self._a), self.n + k), dtype=self._a.dtype)
+            nuevo[:self.n] = self._a[:self.n]
+            self._a = nuevo
+        self._a[self.n:self.n + k] = vals
+        self.n += k
+
+    def vista(self):
+        return self._a[:self.n]
+
+    def clear(self):
+        self.n = 0
+
+
+class PiramideMinMax:
+    """Pirámide incremental de cubos min/max sobre una serie (t, y).
+
+    El nivel k agrupa ``factor**k`` muestras y guarda los índices del mínimo y
+    del máximo de cada cubo completo; ``extend`` solo calcula los cubos que se
+    completan con el lote nuevo. ``puntos`` elige el nivel más fino que cabe en
+    el presupuesto y completa el final con niveles inferiores y muestras crudas.
+    """
+
+    def __init__(self, factor=4):
+        self.factor = factor
+        self._t = _Columna(float)
+        self._y = _Columna(float)
+        self._niveles = []   # [(imin, imax)] por nivel, índices de muestra
+
+    def __len__(self):
+        return self._y.n
+
+    def clear(self):
+        self._t.clear()
+        self._y.clear()
+        self._niveles = []
+
+    def append(self, t, y):
+        self.extend([t], [y])
+
+    def extend(self, ts, ys):
+        if len(ys) == 0:
+            return
+        self._t.extend(ts)
+        self._y.extend(ys)
+        f = self.factor
+        y = self._y.vista()
+        hijos = len(y)
+        k = 0
+        while True:
+            if k == len(self._niveles):
+                if hijos < f:
+                    break
+                self._niveles.append((_Columna(np.intp, 256), _Columna(np.intp, 256)))
+            imin, imax = self._niveles[k]
+            a, b = imin.n, hijos // f
+            if b > a:
+                if k == 0:
+                    base = np.arange(a, b) * f
+                    bloque = y[a * f:b * f].reshape(-1, f)
+                    imin.extend(bloque.argmin(1) + base)
+                    imax.extend(bloque.argmax(1) + base)
+                else:
+                    fila = np.arange(b - a)
+                    cmin, cmax = self._niveles[k - 1]
+                    hmin = cmin.vista()[a * f:b * f].reshape(-1, f)
+                    hmax = cmax.vista()[a * f:b * f].reshape(-1, f)
+                    imin.extend(hmin[fila, y[hmin].argmin(1)])
+                    imax.extend(hmax[fila, y[hmax].argmax(1)])
+            hijos = imin.n
+            k += 1
+
+    def puntos(self, max_puntos=2000):
+        """(ts, ys) de todo el run con como mucho ~``max_puntos`` puntos, picos incluidos."""
+        n = len(self)
+        t, y = self._t.vista(), self._y.vista()
+        if n <= max_puntos:
+            return t.copy(), y.copy()
+        f = self.factor
+        nivel = len(self._niveles)
+        for k in range(1, len(self._niveles) + 1):
+            if 2 * (n // f ** k) + 2 * (f - 1) * k + f <= max_puntos:
+                nivel = k
+                break
+        partes = [[0]]
+        pos = 0
+        for k in range(nivel, 0, -1):
+            imin, imax = self._niveles[k - 1]
+            tam = f ** k
+            desde = pos // tam
+            partes.append(_pares(imin.vista()[desde:], imax.vista()[desde:]))
+            pos = imin.n * tam
+        partes.append(np.arange(pos, n))
+        idx = np.unique(np.concatenate(partes).astype(np.intp))
+        return t[idx], y[idx]
@@ -0,0 +1,231 @@
+"""Instrumentación ligera del pipeline: contadores e histogramas de latencia.
+
+    from dyno.metrics import METRICAS
+    with METRICAS.cronometro("dyno_render_segundos"):
+        canvas.draw()
+
+Con ``METRICAS.activo = False`` (``config.METRICAS``) ``cronometro`` devuelve
+un contexto vacío compartido y no se toma ningún tiempo; los contadores son
+una suma de enteros por lote, así que se dejan siempre. Los valores que ya
+lleva otro objeto (tramas perdidas del decoder, overruns del ring...) no se
+duplican: se leen al exportar con ``fuente``. Exporta a JSON o al formato de
+texto de Prometheus.
+"""
+import bisect
+import contextlib
+import json
+import threading
+import time
+
+from . import config
+
+# límites de los histogramas de tiempo (s): de 50 µs a 5 s, ×~2.5
+LIMITES_S = (5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05,
+             0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_NULO = contextlib.nullcontext()
+
+# descripción de los histogramas que crean los ``cronometro`` del pipeline
+AYUDAS = {
+    "dyno_parseo_segundos": "Parseo de un bloque leído del puerto (Enlace.feed)",
+    "dyno_drenado_segundos": "Lectura de un lote del ring (Captura.drenar)",
+    "dyno_espera_ring_segundos": "Edad de la última muestra al drenarla del ring",
+    "dyno_analisis_segundos": "Análisis incremental de un lote (EstimadorTorque.extend)",
+    "dyno_analisis_final_segundos": "Cierre del análisis al terminar el test (flush)",
+    "dyno_analisis_lote_segundos": "Análisis por lotes de un test completo (Banco.analizar)",
+    "dyno_analisis_proceso_segundos": "Ida y vuelta de un análisis de fin de test en el proceso de análisis",
+    "dyno_render_blit_segundos": "Frame de la gráfica en vivo con blitting",
+    "dyno_render_completo_segundos": "Frame de la gráfica en vivo con redibujado completo",
+}
+
+
+class Contador:
+    """Cuenta monótona (solo suma)."""
+
+    tipo = "counter"
+
+    def __init__(self, nombre, ayuda=""):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.valor = 0
+
+    def inc(self, n=1):
+        self.valor += n
+
+    def reset(self):
+        self.valor = 0
+
+    def a_dict(self):
+        return self.valor
+
+
+class Histograma:
+    """Histograma con cubos fijos (``limites`` superiores, como en Prometheus)."""
+
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda="", limites=LIMITES_S):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = tuple(limites)
+        self.reset()
+
+    def reset(self):
+        self.cuentas = [0] * (len(self.limites) + 1)   # el último es +Inf
+        self.suma = 0.0
+        self.n = 0
+        self.maximo = 0.0
+
+    def observar(self, v):
+        v = float(v)
+        self.cuentas[bisect.bisect_left(self.limites, v)] += 1
+        self.suma += v
+        self.n += 1
+        if v > self.maximo:
+            self.maximo = v
+
+    def percentil(self, q):
+        """Límite superior del cubo donde cae el percentil ``q`` (0-100)."""
+        if not self.n:
+            return 0.0
+        objetivo = q / 100 * self.n
+        acum = 0
+        for lim, c in zip(self.limites + (self.maximo,), self.cuentas):
+            acum += c
+            if acum >= objetivo:
+                return min(lim, self.maximo)
+        return self.maximo
+
+    def a_dict(self):
+        return {
+            "n": self.n,
+            "suma": self.suma,
+            "media": self.suma / self.n if self.n else 0.0,
+            "p50": self.percentil(50),
+            "p99": self.percentil(99),
+            "max": self.maximo,
+            "cubos": dict(zip([str(l) for l in self.limites] + ["+Inf"], self.cuentas)),
+        }
+
+
+class _Cronometro:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observar(time.perf_counter() - self.t0)
+        return False
+
+
+class Registro:
+    """Métricas con nombre. ``fuente(fn)``: ``fn()`` devuelve ``{nombre: valor}`` al exportar.
+
+    Los nombres pueden llevar etiquetas al estilo Prometheus
+    (``dyno_tramas_perdidas{banco="A"}``).
+    """
+
+    def __init__(self, activo=False):
+        self.activo = activo
+        self.metricas = {}
+        self._fuentes = []
+        self._lock = threading.Lock()   # solo para crear métricas, no para observar
+
+    def contador(self, nombre, ayuda=""):
+        return self._obtener(Contador, nombre, ayuda)
+
+    def histograma(self, nombre, ayuda="", limites=LIMITES_S):
+        return self._obtener(Histograma, nombre, ayuda or AYUDAS.get(nombre, ""), limites)
+
+    def _obtener(self, cls, nombre, *args):
+        m = self.metricas.get(nombre)
+        if m is None:
+            with self._lock:
+                m = self.metricas.setdefault(nombre, cls(nombre, *args))
+        return m
+
+    def cronometro(self, nombre):
+        """Contexto que mide su duración en el histograma ``nombre`` (nada si está apagado)."""
+        if not self.activo:
+            return _NULO
+        return _Cronometro(self.histograma(nombre))
+
+    def observar(self, nombre, valor):
+        if self.activo:
+            self.histograma(nombre).observar(valor)
+
+    def fuente(self, fn):
+        self._fuentes.append(fn)
+        return fn
+
+    def reset(self):
+        for m in self.metricas.values():
+            m.reset()
+
+    def _valores_fuentes(self):
+        vals = {}
+        for fn in self._fuentes:
+            vals.update(fn())
+        return vals
+
+    def instantanea(self):
+        """Todas las métricas como dict (lo que se exporta a JSON)."""
+        out = {n: m.a_dict() for n, m in sorted(self.metricas.items())}
+        out.update(sorted(self._valores_fuentes().items()))
+        return out
+
+    def a_json(self):
+        return json.dumps(self.instantanea(), indent=2, ensure_ascii=False)
+
+    def a_prometheus(self):
+        """Formato de texto de exposición de Prometheus (versión 0.0.4)."""
+        lineas = []
+        for nombre, m in sorted(self.metricas.items()):
+            if m.ayuda:
+                lineas.append(f"# HELP {nombre} {m.ayuda}")
+            lineas.append(f"# TYPE {nombre} {m.tipo}")
+            if m.tipo == "counter":
+                lineas.append(f"{nombre} {m.valor}")
+                continue
+            acum = 0
+            for lim, c in zip([repr(l) for l in m.limites] + ["+Inf"], m.cuentas):
+                acum += c
+                lineas.append(f'{nombre}_bucket{{le="{lim}"}} {acum}')
+            lineas.append(f"{nombre}_sum {m.suma!r}")
+            lineas.append(f"{nombre}_count {m.n}")
+        tipos = set()
+        for nombre, v in sorted(self._valores_fuentes().items()):
+            base = nombre.split("{")[0]
+            if base not in tipos:
+                tipos.add(base)
+                lineas.append(f"# TYPE {base} {'counter' if base.endswith('_total') else 'gauge'}")
+            lineas.append(f"{nombre} {v}")
+        return "\n".join(lineas) + "\n"
+
+    def guardar(self, path):
+        """Escribe JSON o, si ``path`` acaba en ``.prom``/``.txt``, texto de Prometheus."""
+        texto = self.a_prometheus() if path.endswith((".prom", ".txt")) else self.a_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(texto)
+
+    def resumen(self):
+        """Líneas cortas para el panel de la UI."""
+        lineas = []
+        for nombre, m in sorted(self.metricas.items()):
+            corto = nombre.removeprefix("dyno_")
+            if m.tipo == "counter":
+                lineas.append(f"{corto:<44} {m.valor:>10}")
+            else:
+                lineas.append(f"{corto:<44} n={m.n:<7} media {m.suma / max(m.n, 1) * 1e3:7.2f} ms"
+                              f"  p99 ≤{m.percentil(99) * 1e3:7.2f} ms  máx {m.maximo * 1e3:7.2f} ms")
+        for nombre, v in sorted(self._valores_fuentes().items()):
+            lineas.append(f"{nombre.removeprefix('dyno_'):<44} {v:>10}")
+        return "\n".join(lineas)
+
+
+METRICAS = Registro(activo=config.METRICAS)
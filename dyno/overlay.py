@@ -0,0 +1,77 @@
+"""Superposición de curvas de potencia y torque frente a RPM de varios runs (dashboard y PDF).
+
+Usa la API orientada a objetos de matplotlib sobre una ``Figure`` que se le
+pasa, así que sirve igual para un ``FigureCanvasTkAgg`` que para una página
+de ``PdfPages``. Al rellenar solo se quitan y se vuelven a crear sus propios
+artistas; ejes, etiquetas y estilo se quedan.
+"""
+from .curves import agregar_curvas
+
+COLUMNAS = (("potencia", "Potencia (HP)"), ("torque", "Torque (N·m)"))
+
+
+class GraficaCurvas:
+    """Una línea fina por run, la media de todos con su banda de confianza y la envolvente."""
+
+    MAX_LINEAS = 40     # con más runs solo se dibujan la media, la banda y la envolvente
+    MAX_LEYENDA = 8
+
+    def __init__(self, fig, color="#0db99b", color_media="#e07b39"):
+        self.fig = fig
+        self.color = color
+        self.color_media = color_media
+        self.ejes = fig.subplots(2, 1, sharex=True)
+        for ax, (_, etiqueta) in zip(self.ejes, COLUMNAS):
+            ax.set_ylabel(etiqueta)
+            ax.grid(True, alpha=0.2)
+        self.ejes[1].set_xlabel("RPM")
+        self.vacio = [ax.text(0.5, 0.5, "Sin curvas", ha="center", va="center", transform=ax.transAxes)
+                      for ax in self.ejes]
+        self._artistas = []
+
+    def rellenar(self, curvas, etiquetas=None):
+        """``curvas``: resultados de ``analizar_curvas`` (o su JSON); None se salta."""
+        for a in self._artistas:
+            a.remove()
+        self._artistas = []
+        etiquetas = list(etiquetas) if etiquetas is not None else [None] * len(curvas)
+        pares = [(c, e) for c, e in zip(curvas, etiquetas) if c is not None and len(c["subida"]["rpm"])]
+        for t in self.vacio:
+            t.set_visible(not pares)
+        if not pares:
+            return
+        con_lineas = len(pares) <= self.MAX_LINEAS
+        en_leyenda = len(pares) <= self.MAX_LEYENDA
+        for ax, (col, _) in zip(self.ejes, COLUMNAS):
+            if con_lineas:
+                for c, e in pares:
+                    sub = c["subida"]
+                    self._artistas += ax.plot(sub["rpm"], sub[col], lw=0.8, alpha=0.6,
+                                              label=e if en_leyenda else None)
+            agg = agregar_curvas([c for c, _ in pares], col)
+            if len(pares) > 1:
+                self._artistas.append(ax.fill_between(agg["rpm"], agg["min"], agg["max"],
+                                                      color=self.color, alpha=0.08, lw=0))
+                self._artistas.append(ax.fill_between(agg["rpm"], agg["media"] - agg["ic"],
+                                                      agg["media"] + agg["ic"],
+                                                      color=self.color_media, alpha=0.3, lw=0,
+                                                      label="IC 95 %"))
+                self._artistas += ax.plot(agg["rpm"], agg["media"], color=self.color_media, lw=2,
+                                          label=f"Media ({len(pares)})")
+            if len(pares) > 1 or en_leyenda and pares[0][1]:
+                self._artistas.append(ax.legend(fontsize=7, loc="best"))
+            ax.relim(visible_only=True)
+            ax.autoscale_view()
+            lo, hi = ax.get_ylim()
+            ax.set_ylim(min(lo, 0.0), hi, auto=True)   # que el siguiente rellenar reescale
+
+    def titulo(self, texto):
+        self.fig.suptitle(texto, fontsize=12)
+
+
+def curvas_validas(resultados):
+    """(curvas, etiquetas) de los ``test_results`` que tienen curvas."""
+    pares = [(r["curvas"], f"Test {i+1}") for i, r in enumerate(resultados)
+             if r is not None and r.get("curvas")]
+    return [c for c, _ in pares], [e for _, e in pares]
+
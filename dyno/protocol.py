@@ -0,0 +1,290 @@
+"""Protocolos serie: líneas ASCII ``RPM: 1234`` y tramas binarias de tamaño fijo.
+
+Trama binaria (12 bytes, little-endian)::
+
+    0xA5 | t_us (u32) | period_us (u32) | seq (u16) | crc8 (u8)
+
+``t_us`` es el reloj del dispositivo en µs (da la vuelta cada ~71 min),
+``period_us`` el periodo bruto entre pulsos y ``seq`` un contador de tramas.
+El CRC-8 (polinomio 0x07) cubre los 10 bytes entre el sync y el propio CRC.
+
+Lote de flancos (protocolo "flancos", ``n`` flancos, 11 + 2·(n-1) bytes)::
+
+    0xA6 | n (u8) | flanco0 (u32) | t0_us (u32) | dt_us (u16) × (n-1) | crc8 (u8)
+
+El dispositivo no promedia: ``t0_us`` es el instante del primer flanco del
+lote, ``dt_us`` la distancia de cada uno al anterior y ``flanco0`` el número
+del primer flanco desde que arrancó (da el imán de cada pulso y los flancos
+perdidos). Un hueco de más de 65535 µs abre lote nuevo. El CRC cubre todo lo
+que hay entre el sync y él.
+"""
+import struct
+
+import numpy as np
+
+SYNC = 0xA5
+FRAME = struct.Struct("<BIIHB")
+FRAME_SIZE = FRAME.size
+FRAME_DTYPE = np.dtype([("sync", "u1"), ("t_us", "<u4"), ("period_us", "<u4"),
+                        ("seq", "<u2"), ("crc", "u1")])
+DECODED_DTYPE = np.dtype([("t_dev", "f8"), ("period_us", "u4"), ("seq", "u2")])
+
+EDGE_SYNC = 0xA6
+EDGE_HEADER = struct.Struct("<BII")     # n, flanco0, t0_us (sin el sync)
+EDGE_MIN_SIZE = 1 + EDGE_HEADER.size + 1
+EDGE_DT_MAX = 0xFFFF
+EDGE_DTYPE = np.dtype([("t_dev", "f8"), ("flanco", "i8")])
+
+
+def _crc8_table(poly=0x07):
+    table = []
+    for b in range(256):
+        c = b
+        for _ in range(8):
+            c = ((c << 1) ^ poly) & 0xFF if c & 0x80 else (c << 1) & 0xFF
+        table.append(c)
+    return np.array(table, dtype=np.uint8)
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    c = 0
+    for b in data:
+        c = int(CRC8_TABLE[c ^ b])
+    return c
+
+
+def crc8_rows(rows):
+    """CRC-8 de cada fila de una matriz (k, m) de uint8, vectorizado por columnas."""
+    c = np.zeros(len(rows), dtype=np.uint8)
+    for j in range(rows.shape[1]):
+        c = CRC8_TABLE[c ^ rows[:, j]]
+    return c
+
+
+def encode_frame(t_us, period_us, seq):
+    """Trama binaria lista para enviar (referencia para el firmware y el simulador)."""
+    body = FRAME.pack(SYNC, t_us & 0xFFFFFFFF, period_us & 0xFFFFFFFF, seq & 0xFFFF, 0)[1:-1]
+    return bytes((SYNC,)) + body + bytes((crc8(body),))
+
+
+def encode_frames(t_us, period_us, seq):
+    """Varias tramas de golpe (arrays de la misma longitud), concatenadas en un ``bytes``."""
+    fr = np.zeros(len(t_us), dtype=FRAME_DTYPE)
+    fr["sync"] = SYNC
+    fr["t_us"] = np.asarray(t_us, dtype=np.int64) & 0xFFFFFFFF
+    fr["period_us"] = np.asarray(period_us, dtype=np.int64) & 0xFFFFFFFF
+    fr["seq"] = np.asarray(seq, dtype=np.int64) & 0xFFFF
+    rows = fr.view(np.uint8).reshape(-1, FRAME_SIZE)
+    fr["crc"] = crc8_rows(rows[:, 1:-1])
+    return fr.tobytes()
+
+
+def encode_edge_batches(t_us, flanco0=0, por_lote=64):
+    """Lotes de flancos (lista de ``bytes``) para los instantes ``t_us`` de flancos consecutivos."""
+    t_us = np.asarray(t_us, dtype=np.int64)
+    cortes = (np.flatnonzero(np.diff(t_us) > EDGE_DT_MAX) + 1).tolist()
+    lotes = []
+    for ini, fin in zip([0] + cortes, cortes + [len(t_us)]):
+        for a in range(ini, fin, por_lote):
+            b = min(a + por_lote, fin)
+            body = (EDGE_HEADER.pack(b - a, (flanco0 + a) & 0xFFFFFFFF, int(t_us[a]) & 0xFFFFFFFF)
+                    + np.diff(t_us[a:b]).astype("<u2").tobytes())
+            lotes.append(bytes((EDGE_SYNC,)) + body + bytes((crc8(body),)))
+    return lotes
+
+
+def period_to_rpm(period_us, pulsos_por_vuelta=1):
+    """Periodo entre pulsos (µs) -> RPM; periodo 0 (rodillo parado) -> 0."""
+    p = np.asarray(period_us, dtype=float) * pulsos_por_vuelta
+    return np.divide(60e6, p, out=np.zeros_like(p), where=p > 0)
+
+
+def parse_rpm_line(linea):
+    """Valor de una línea ``RPM: n`` o None si la línea no es de RPM."""
+    if not linea.startswith("RPM:"):
+        return None
+    return float(linea.split(":")[1].strip())
+
+
+class FrameDecoder:
+    """Decodificador incremental de tramas binarias a partir de bloques de bytes.
+
+    Las tramas alineadas se validan de golpe (sync + CRC vectorizado); ante una
+    trama corrupta se avanza byte a byte hasta el siguiente sync. Lleva la cuenta
+    de tramas válidas, descartadas, bytes saltados y huecos de secuencia.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._last_seq = None
+        self._last_t_us = None
+        self._wraps = 0
+        self.frames = 0
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+        self.lost = 0  # tramas que faltan según el número de secuencia
+
+    def feed(self, data):
+        """Añade bytes y devuelve un array DECODED_DTYPE con las tramas completas y válidas."""
+        buf = self._buf
+        buf += data
+        n = len(buf)
+        pos = 0
+        chunks = []
+        while n - pos >= FRAME_SIZE:
+            if buf[pos] != SYNC:
+                nxt = buf.find(SYNC, pos)
+                if nxt < 0:
+                    nxt = n
+                self.skipped_bytes += nxt - pos
+                pos = nxt
+                continue
+            k = (n - pos) // FRAME_SIZE
+            raw = np.frombuffer(bytes(buf[pos:pos + k * FRAME_SIZE]), dtype=np.uint8).reshape(k, FRAME_SIZE)
+            ok = (raw[:, 0] == SYNC) & (crc8_rows(raw[:, 1:-1]) == raw[:, -1])
+            good = k if ok.all() else int(np.argmin(ok))
+            if good:
+                chunks.append(raw[:good].copy().view(FRAME_DTYPE).reshape(good))
+                pos += good * FRAME_SIZE
+            if good < k:
+                # trama corrupta o desalineada: saltar el sync y volver a buscar
+                self.crc_errors += 1
+                self.skipped_bytes += 1
+                pos += 1
+        del buf[:pos]
+        if not chunks:
+            return np.zeros(0, dtype=DECODED_DTYPE)
+        return self._decode(np.concatenate(chunks))
+
+    def _decode(self, fr):
+        out = np.empty(len(fr), dtype=DECODED_DTYPE)
+        seq = fr["seq"].astype(np.int64)
+        t_us = fr["t_us"].astype(np.int64)
+
+        prev = seq[0] - 1 if self._last_seq is None else self._last_seq
+        d = np.diff(seq, prepend=prev) % 65536
+        self.lost += int(((d - 1) % 65536)[d != 0].sum())
+        self._last_seq = int(seq[-1])
+
+        # deshacer la vuelta del contador de 32 bits del reloj del dispositivo
+        prev = t_us[0] if self._last_t_us is None else self._last_t_us
+        wraps = self._wraps + np.cumsum(np.diff(t_us, prepend=prev) < 0)
+        self._wraps = int(wraps[-1])
+        self._last_t_us = int(t_us[-1])
+
+        out["t_dev"] = (t_us + (wraps << 32)) / 1e6
+        out["period_us"] = fr["period_us"]
+        out["seq"] = fr["seq"]
+        self.frames += len(fr)
+        return out
+
+
+def _desenrollar(v, cerca):
+    """Valor de 64 bits de un contador de 32 que ha dado la vuelta: el más cercano a ``cerca``."""
+    return v + ((cerca - v + (1 << 31)) >> 32 << 32)
+
+
+class EdgeDecoder:
+    """Decodificador incremental de lotes de flancos (mismos contadores que ``FrameDecoder``).
+
+    Los lotes son de tamaño variable: se localizan de uno en uno por su
+    cabecera y los CRC se comprueban de golpe, agrupando los lotes del mismo
+    tamaño. Ante un lote corrupto se avanza byte a byte hasta el siguiente
+    sync. ``lost`` cuenta flancos que faltan según el número de flanco.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._t_us = None       # último flanco (µs y número) ya desenrollados a 64 bits
+        self._flanco = None
+        self.frames = 0
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+        self.lost = 0
+
+    def _candidatos(self, buf, pos):
+        """Lotes completos con cabecera plausible desde ``pos``: [(inicio, n)], fin."""
+        out = []
+        n_buf = len(buf)
+        while n_buf - pos >= EDGE_MIN_SIZE:
+            if buf[pos] != EDGE_SYNC:
+                nxt = buf.find(EDGE_SYNC, pos)
+                if nxt < 0:
+                    nxt = n_buf
+                self.skipped_bytes += nxt - pos
+                pos = nxt
+                continue
+            n = buf[pos + 1]
+            if n == 0:
+                self.skipped_bytes += 1
+                pos += 1
+                continue
+            tam = EDGE_MIN_SIZE + 2 * (n - 1)
+            if n_buf - pos < tam:
+                break
+            out.append((pos, n))
+            pos += tam
+        return out, pos
+
+    def feed(self, data):
+        """Añade bytes y devuelve un array EDGE_DTYPE con los flancos de los lotes completos y válidos."""
+        buf = self._buf
+        buf += data
+        pos = 0
+        lotes = []
+        while True:
+            cand, fin = self._candidatos(buf, pos)
+            if not cand:
+                pos = fin
+                break
+            arr = np.frombuffer(bytes(buf[cand[0][0]:fin]), dtype=np.uint8)
+            ini = np.array([c[0] for c in cand]) - cand[0][0]
+            ns = np.array([c[1] for c in cand])
+            ok = np.ones(len(cand), dtype=bool)
+            for n in np.unique(ns):
+                sel = np.flatnonzero(ns == n)
+                tam = EDGE_MIN_SIZE + 2 * (n - 1)
+                filas = arr[ini[sel, None] + np.arange(1, tam - 1)]
+                ok[sel] = crc8_rows(filas) == arr[ini[sel] + tam - 1]
+            buenos = len(cand) if ok.all() else int(np.argmin(ok))
+            lotes += [(arr, i, n) for i, n in zip(ini[:buenos].tolist(), ns[:buenos].tolist())]
+            if buenos == len(cand):
+                pos = fin
+                continue
+            # lote corrupto o desalineado: saltar su sync y volver a buscar
+            self.crc_errors += 1
+            self.skipped_bytes += 1
+            pos = cand[buenos][0] + 1
+        del buf[:pos]
+        if not lotes:
+            return np.zeros(0, dtype=EDGE_DTYPE)
+        return self._decode(lotes)
+
+    def _decode(self, lotes):
+        total = sum(n for _, _, n in lotes)
+        out = np.empty(total, dtype=EDGE_DTYPE)
+        j = 0
+        for arr, i, n in lotes:
+            _, flanco0, t0 = EDGE_HEADER.unpack_from(arr, i + 1)
+            if self._flanco is not None:
+                flanco0 = _desenrollar(flanco0, self._flanco + 1)
+                t0 = _desenrollar(t0, self._t_us)
+                self.lost += max(0, flanco0 - self._flanco - 1)
+            dts = arr[i + 1 + EDGE_HEADER.size:i + EDGE_MIN_SIZE - 1 + 2 * (n - 1)].view("<u2")
+            t_us = t0 + np.concatenate(([0], np.cumsum(dts, dtype=np.int64)))
+            out["t_dev"][j:j + n] = t_us / 1e6
+            out["flanco"][j:j + n] = flanco0 + np.arange(n)
+            self._t_us, self._flanco = int(t_us[-1]), flanco0 + n - 1
+            j += n
+        self.frames += len(lotes)
+        return out
+
+
+def detectar_protocolo(data):
+    """'binario' con al menos dos tramas válidas, 'flancos' con un lote de flancos válido, si no 'ascii'."""
+    if len(FrameDecoder().feed(data)) >= 2:
+        return "binario"
+    return "flancos" if len(EdgeDecoder().feed(data)) else "ascii"
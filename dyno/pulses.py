@@ -0,0 +1,168 @@
+"""Modo de flancos: RPM instantáneas a partir del instante de cada pulso del sensor.
+
+Con ``PROTOCOLO = "flancos"`` el Arduino no promedia: manda en lotes el
+instante de cada flanco (``dyno.protocol``) y aquí sale una velocidad por
+intervalo entre pulsos, ``Δvueltas / Δt``, con diferencias sobre el lote
+entero (sin bucles por flanco), fechada en el punto medio del intervalo. Un
+hueco de flancos perdidos no rompe nada: el ángulo entre los dos flancos que
+sí llegaron sale de sus números de flanco.
+
+Con varios imanes (``PULSOS_POR_VUELTA``) los huecos entre ellos no miden
+exactamente 1/N de vuelta y la velocidad ondula con cada vuelta.
+``ESPACIADO_IMANES`` da la fracción de vuelta de cada hueco y se aplica al
+ángulo. El contador de flancos del Arduino empieza en un imán cualquiera, así
+que la fase de la tabla se busca sola en las primeras vueltas (la rotación
+que menos ondulación deja); hasta entonces se usan huecos iguales.
+
+Para medir la tabla, con el rodillo girando a velocidad estable::
+
+    python -m dyno.pulses --port COM7 --baud 1000000 --pulsos 4 --segundos 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from . import config
+
+VUELTAS_FASE = 4   # vueltas completas que se miran para encontrar la fase de la tabla
+
+
+def normalizar_espaciado(espaciado, pulsos_por_vuelta):
+    """Array de fracciones de vuelta (suman 1) o None si los imanes son equiespaciados."""
+    if espaciado is None or pulsos_por_vuelta == 1:
+        return None
+    e = np.asarray(espaciado, dtype=float)
+    if e.shape != (pulsos_por_vuelta,) or (e <= 0).any():
+        raise ValueError(f"ESPACIADO_IMANES necesita {pulsos_por_vuelta} valores positivos")
+    return e / e.sum()
+
+
+def posicion(flanco, pulsos_por_vuelta, espaciado=None, fase=0):
+    """Ángulo (en vueltas) del flanco número ``flanco`` (acepta arrays)."""
+    flanco = np.asarray(flanco, dtype=np.int64)
+    if espaciado is None:
+        return flanco / pulsos_por_vuelta
+    k = flanco + fase
+    inicio = np.concatenate(([0.0], np.cumsum(espaciado)[:-1]))
+    return k // pulsos_por_vuelta + inicio[k % pulsos_por_vuelta]
+
+
+def rpm_flancos(t, flanco, pulsos_por_vuelta=1, espaciado=None, fase=0):
+    """(t, rpm) de cada intervalo entre flancos consecutivos del array: punto medio y velocidad media."""
+    t = np.asarray(t, dtype=float)
+    vueltas = posicion(flanco, pulsos_por_vuelta, espaciado, fase)
+    dt = np.diff(t)
+    ok = dt > 0
+    return ((t[1:] + t[:-1]) / 2)[ok], (60.0 * np.diff(vueltas))[ok] / dt[ok]
+
+
+def ondulacion(rpm):
+    """Ondulación relativa entre intervalos consecutivos (RMS de la diferencia de log(rpm))."""
+    rpm = rpm[rpm > 0]
+    return float(np.sqrt(np.mean(np.diff(np.log(rpm)) ** 2))) if len(rpm) > 2 else 0.0
+
+
+def buscar_fase(t, flanco, pulsos_por_vuelta, espaciado):
+    """Rotación de la tabla que deja menos ondulación en estos flancos."""
+    return int(np.argmin([ondulacion(rpm_flancos(t, flanco, pulsos_por_vuelta, espaciado, f)[1])
+                          for f in range(pulsos_por_vuelta)]))
+
+
+def calibrar_espaciado(t, flanco, pulsos_por_vuelta):
+    """Fracción de vuelta de cada hueco (índice = número de flanco % pulsos) a partir de flancos medidos.
+
+    Cada intervalo se divide por la duración de la vuelta centrada en él (así
+    una aceleración suave apenas sesga) y se toma la mediana por hueco; solo
+    cuentan vueltas sin flancos perdidos.
+    """
+    t = np.asarray(t, dtype=float)
+    flanco = np.asarray(flanco, dtype=np.int64)
+    n = pulsos_por_vuelta
+    dt = np.diff(t)
+    seguido = np.diff(flanco) == 1
+    if len(dt) < 2 * n:
+        raise ValueError("hacen falta al menos dos vueltas de flancos")
+    # suma de n intervalos seguidos centrada en cada uno (ventana [i - n//2, i - n//2 + n))
+    acum = np.concatenate(([0.0], np.cumsum(dt)))
+    huecos = np.concatenate(([0], np.cumsum(~seguido)))
+    i = np.arange(n // 2, len(dt) - (n - n // 2) + 1)
+    a, b = i - n // 2, i - n // 2 + n
+    vuelta = acum[b] - acum[a]
+    ok = (huecos[b] == huecos[a]) & (vuelta > 0)
+    frac = dt[i[ok]] / vuelta[ok]
+    hueco = flanco[:-1][i[ok]] % n
+    e = np.array([np.median(frac[hueco == j]) if (hueco == j).any() else np.nan for j in range(n)])
+    if np.isnan(e).any():
+        raise ValueError("no hay vueltas completas sin flancos perdidos")
+    return e / e.sum()
+
+
+class ConversorFlancos:
+    """Flancos que van llegando -> (t, rpm) por intervalo, con el último flanco del lote anterior."""
+
+    def __init__(self, pulsos_por_vuelta=1, espaciado=None):
+        self.pulsos_por_vuelta = pulsos_por_vuelta
+        self.espaciado = normalizar_espaciado(espaciado, pulsos_por_vuelta)
+        self.reset()
+
+    def reset(self):
+        self.fase = None if self.espaciado is not None else 0
+        self._t = np.zeros(0)
+        self._flanco = np.zeros(0, dtype=np.int64)
+        self._muestra_fase = ([], [])
+
+    def convertir(self, t, flanco):
+        """(t, rpm) de los intervalos que cierran estos flancos (arrays en orden de llegada)."""
+        t = np.concatenate((self._t, t))
+        flanco = np.concatenate((self._flanco, flanco))
+        self._t, self._flanco = t[-1:], flanco[-1:]
+        if self.fase is None:
+            self._acumular_fase(t, flanco)
+        if self.fase is None:
+            return rpm_flancos(t, flanco, self.pulsos_por_vuelta)
+        return rpm_flancos(t, flanco, self.pulsos_por_vuelta, self.espaciado, self.fase)
+
+    def _acumular_fase(self, t, flanco):
+        ts, fs = self._muestra_fase
+        ts.append(t[1:] if ts else t)
+        fs.append(flanco[1:] if fs else flanco)
+        if sum(map(len, fs)) > VUELTAS_FASE * self.pulsos_por_vuelta:
+            t, flanco = np.concatenate(ts), np.concatenate(fs)
+            # la fase solo se puede juzgar con el rodillo girando
+            if (np.diff(t) < 0.1).all():
+                self.fase = buscar_fase(t, flanco, self.pulsos_por_vuelta, self.espaciado)
+            self._muestra_fase = ([], [])
+
+
+def main(argv=None):
+    import serial
+    from .protocol import EdgeDecoder
+
+    ap = argparse.ArgumentParser(prog="python -m dyno.pulses", description="Mide ESPACIADO_IMANES "
+                                 "con el rodillo girando a velocidad estable (protocolo de flancos)")
+    ap.add_argument("--port", default=config.PUERTO)
+    ap.add_argument("--baud", type=int, default=config.BAUDIOS)
+    ap.add_argument("--pulsos", type=int, default=config.PULSOS_POR_VUELTA)
+    ap.add_argument("--segundos", type=float, default=10.0)
+    args = ap.parse_args(argv)
+    if args.pulsos < 2:
+        ap.error("con un solo pulso por vuelta no hay nada que corregir")
+
+    dec = EdgeDecoder()
+    partes = []
+    with serial.Serial(args.port, args.baud, timeout=0.2) as puerto:
+        fin = time.monotonic() + args.segundos
+        while time.monotonic() < fin:
+            partes.append(dec.feed(puerto.read(max(puerto.in_waiting, 1))))
+    fl = np.concatenate(partes)
+    print(f"{len(fl)} flancos, {dec.lost} perdidos, {dec.crc_errors} lotes con CRC erróneo")
+    e = calibrar_espaciado(fl["t_dev"], fl["flanco"], args.pulsos)
+    antes = ondulacion(rpm_flancos(fl["t_dev"], fl["flanco"], args.pulsos)[1])
+    despues = ondulacion(rpm_flancos(fl["t_dev"], fl["flanco"], args.pulsos, e)[1])
+    print(f"Ondulación entre pulsos: {antes:.2%} sin corregir, {despues:.2%} con la tabla")
+    print("ESPACIADO_IMANES = [" + ", ".join(f"{v:.5f}" for v in e) + "]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Gráficas en vivo (RPM y km/h) con artistas persistentes y blitting."""
+import time
+
+import numpy as np
+from matplotlib.collections import PolyCollection
+
+from .analysis import rpm_to_kmh
+from .metrics import METRICAS
+
+
+class LivePlot:
+    """Línea de RPM arriba y barras de km/h abajo sobre un FigureCanvasTkAgg.
+
+    Los artistas se crean una vez (``animated=True``) y en cada frame solo se
+    cambian sus datos: se restaura el fondo cacheado, se dibujan los dos artistas
+    y se hace blit. El redibujado completo (ejes, ticks) solo ocurre al cambiar
+    los límites, cuando los datos se salen del rango actual, o al redimensionar.
+    El fondo y el blit se limitan a los ejes propios, así que varios LivePlot
+    (uno por banco) pueden compartir figura; ``ax_bar=None`` dibuja solo la línea.
+    """
+
+    def __init__(self, canvas, ax_line, ax_bar, D, duracion, color, bar_width=0.08):
+        self.canvas = canvas
+        self.fig = canvas.figure
+        self.ax_line = ax_line
+        self.ax_bar = ax_bar
+        self.D = D
+        self.duracion = duracion
+        self.bar_width = bar_width
+        self.linea, = ax_line.plot([], [], color=color, linewidth=2, animated=True)
+        self.barras = PolyCollection([], facecolors=color, edgecolors="none", alpha=0.9, animated=True)
+        if ax_bar is not None:
+            ax_bar.add_collection(self.barras)
+        self.ejes = [ax for ax in (ax_line, ax_bar) if ax is not None]
+        self.frame_ms = 0.0  # media móvil del coste por frame
+        self._bg = None
+        self._firma = None
+        self._auto = True
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def reset(self):
+        """Vacía las gráficas y vuelve a los límites por defecto."""
+        self.linea.set_data([], [])
+        self.barras.set_verts([])
+        self.ax_line.set_xlim(0, self.duracion)
+        self.ax_line.set_ylim(0, 15000)
+        if self.ax_bar is not None:
+            self.ax_bar.set_xlim(0, self.duracion)
+            self.ax_bar.set_ylim(0, 150)   # km/h por defecto
+        self._firma = None
+        self._auto = True
+        self.canvas.draw()
+
+    def _on_draw(self, event):
+        # tras cada dibujado completo: cachear el fondo y pintar encima los artistas
+        self._bg = [self.canvas.copy_from_bbox(ax.bbox) for ax in self.ejes]
+        self._draw_artists()
+
+    def _draw_artists(self):
+        self.ax_line.draw_artist(self.linea)
+        if self.ax_bar is not None:
+            self.ax_bar.draw_artist(self.barras)
+
+    def update(self, times, rpms):
+        """Redibuja con los datos actuales; no hace nada si no han cambiado."""
+        firma = (len(times), times[-1] if len(times) else None)
+        if firma == self._firma:
+            return
+        self._firma = firma
+        t0 = time.perf_counter()
+
+        xs = np.asarray(times, dtype=float)
+        ys = np.asarray(rpms, dtype=float)
+        self.linea.set_data(xs, ys)
+        if self.ax_bar is not None:
+            kmh = rpm_to_kmh(ys, self.D)
+            verts = np.zeros((len(xs), 4, 2))
+            verts[:, :2, 0] = (xs - self.bar_width / 2)[:, None]
+            verts[:, 2:, 0] = (xs + self.bar_width / 2)[:, None]
+            verts[:, 1:3, 1] = kmh[:, None]
+            self.barras.set_verts(verts)
+
+        full = self._bg is None
+        if len(ys):
+            max_r = float(ys.max())
+            if self._auto or max_r > self.ax_line.get_ylim()[1]:
+                self.ax_line.set_ylim(0, max(2000, max_r * 1.1))
+                if self.ax_bar is not None:
+                    self.ax_bar.set_ylim(0, max(20, rpm_to_kmh(max_r, self.D) * 1.1))
+                self._auto = False
+                full = True
+
+        if full:
+            self.canvas.draw()
+        else:
+            for bg in self._bg:
+                self.canvas.restore_region(bg)
+            self._draw_artists()
+            for ax in self.ejes:
+                self.canvas.blit(ax.bbox)
+        dt_ms = (time.perf_counter() - t0) * 1000
+        METRICAS.observar("dyno_render_completo_segundos" if full else "dyno_render_blit_segundos",
+                          dt_ms / 1000)
+        self.frame_ms = dt_ms if not self.frame_ms else 0.9 * self.frame_ms + 0.1 * dt_ms
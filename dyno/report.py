@@ -0,0 +1,155 @@
+"""Informe PDF de los tests con la API orientada a objetos de matplotlib (sin pyplot).
+
+Se construye una sola figura-plantilla por tipo de página y en cada test solo
+se cambian sus datos, sin ``bbox_inches='tight'``. Al no tocar el estado
+global de pyplot puede ejecutarse en un hilo aparte (``TrabajoInforme``) sin
+bloquear la interfaz.
+"""
+import threading
+
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+
+from . import config
+from .analysis import rpm_to_kmh
+from .lod import minmax_decimate
+from .overlay import GraficaCurvas, curvas_validas
+
+A4 = (8.27, 11.69)
+FILAS_POR_PAGINA = 40
+# torque y potencia con las pérdidas compensadas
+HEADERS = ["Test", "RPM máx", "Vel (km/h)", "Torque comp. (N·m)", "Potencia comp. (HP)"]
+
+
+def filas_resultados(resultados):
+    rows = []
+    for i, res in enumerate(resultados):
+        if res is None:
+            rows.append([f"Test {i+1}", "—", "—", "—", "—"])
+        else:
+            rows.append([f"Test {i+1}",
+                         f"{res['rpm_max']:.0f}",
+                         f"{res['velocidad_max']:.2f}",
+                         f"{res.get('torque_corr_max', res['torque_max']):.6f}",
+                         f"{res.get('potencia_corr_max', res['potencia_max']):.4f}"])
+    return rows
+
+
+class _PaginaTest:
+    """Plantilla de página por test: dos ejes (RPM y km/h) cuyos datos se reemplazan."""
+
+    def __init__(self, color_rpm, color_kmh):
+        self.fig = Figure(figsize=(A4[0], A4[1] / 1.5))
+        self.fig.subplots_adjust(left=0.12, right=0.95, top=0.92, bottom=0.08, hspace=0.25)
+        self.a1, self.a2 = self.fig.subplots(2, 1)
+        self.titulo = self.fig.suptitle("", fontsize=12)
+        self.l1, = self.a1.plot([], [], color=color_rpm)
+        self.l2, = self.a2.plot([], [], color=color_kmh)
+        self.a1.set_ylabel("RPM")
+        self.a2.set_ylabel("km/h")
+        self.a2.set_xlabel("Tiempo (s)")
+        self.vacio = [a.text(0.5, 0.5, "Sin datos", ha='center', va='center', transform=a.transAxes)
+                      for a in (self.a1, self.a2)]
+        for a in (self.a1, self.a2):
+            a.grid(True, alpha=0.2)
+            a.locator_params(nbins=6)   # menos ticks: el texto es lo más caro de cada página
+
+    def rellenar(self, titulo, ts, rpms, D):
+        self.titulo.set_text(titulo)
+        hay = ts is not None and len(ts) > 0
+        for t in self.vacio:
+            t.set_visible(not hay)
+        for line in (self.l1, self.l2):
+            line.set_visible(hay)
+        if hay:
+            self.l1.set_data(ts, rpms)
+            self.l2.set_data(ts, rpm_to_kmh(rpms, D))
+        for a in (self.a1, self.a2):
+            a.relim(visible_only=True)
+            a.autoscale_view()
+
+
+def generar_informe(filename, resultados, muestras, D, color_rpm, color_kmh="#e07b39", progreso=None,
+                    max_puntos=config.LOD_MAX_PUNTOS):
+    """Escribe el PDF: tabla resumen (paginada), curvas superpuestas y una página con RPM y km/h por test.
+
+    ``muestras[i]`` es cualquier cosa con campos ``"t"`` y ``"rpm"`` (array o Run) o None.
+    ``progreso(hechas, total)`` se llama tras cada página. Cada curva se diezma
+    (min/max) a ``max_puntos`` como mucho, conservando los picos.
+    """
+    rows = filas_resultados(resultados)
+    paginas_tabla = [rows[i:i + FILAS_POR_PAGINA] for i in range(0, max(len(rows), 1), FILAS_POR_PAGINA)]
+    curvas, etiquetas = curvas_validas(resultados)
+    total = len(paginas_tabla) + bool(curvas) + len(muestras)
+    hechas = 0
+    with PdfPages(filename) as pdf:
+        # Página(s) de tabla resumen
+        for k, chunk in enumerate(paginas_tabla):
+            fig = Figure(figsize=A4)
+            ax = fig.add_subplot()
+            ax.axis('off')
+            if chunk:
+                table = ax.table(cellText=chunk, colLabels=HEADERS, loc='upper center', cellLoc='center')
+                table.auto_set_font_size(False)
+                table.set_fontsize(10)
+                table.scale(1, 1.5)
+            titulo = "Resultados de Tests"
+            if len(paginas_tabla) > 1:
+                titulo += f" ({k+1}/{len(paginas_tabla)})"
+            ax.set_title(titulo, fontsize=14)
+            pdf.savefig(fig)
+            hechas += 1
+            if progreso:
+                progreso(hechas, total)
+
+        # Potencia y torque compensados frente a RPM de todos los tests, con su media
+        if curvas:
+            fig = Figure(figsize=(A4[0], A4[1] / 1.5))
+            grafica = GraficaCurvas(fig, color_rpm, color_kmh)
+            grafica.titulo("Curvas de potencia y torque (pérdidas compensadas)")
+            grafica.rellenar(curvas, etiquetas)
+            pdf.savefig(fig)
+            hechas += 1
+            if progreso:
+                progreso(hechas, total)
+
+        # Págs por test: RPM y km/h, reutilizando la misma figura
+        pagina = _PaginaTest(color_rpm, color_kmh)
+        for i, samples in enumerate(muestras):
+            if samples is not None and len(samples):
+                t, rpm = minmax_decimate(samples["t"], samples["rpm"], max_puntos)
+                pagina.rellenar(f"Test {i+1}", t - t[0], rpm, D)
+            else:
+                pagina.rellenar(f"Test {i+1}", None, None, D)
+            pdf.savefig(pagina.fig)
+            hechas += 1
+            if progreso:
+                progreso(hechas, total)
+
+
+class TrabajoInforme:
+    """Genera el informe en un hilo; la UI consulta ``hechas``/``total``/``terminado``/``error``."""
+
+    def __init__(self, filename, resultados, muestras, D, color_rpm):
+        self.filename = filename
+        self.hechas = 0
+        self.total = 0
+        self.terminado = False
+        self.error = None
+        self._args = (filename, list(resultados), list(muestras), D, color_rpm)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _progreso(self, hechas, total):
+        self.hechas, self.total = hechas, total
+
+    def _run(self):
+        try:
+            generar_informe(*self._args, progreso=self._progreso)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.terminado = True
@@ -0,0 +1,143 @@
+"""Planificador de bucles periódicos sobre el ``after`` de Tk, con reloj monotónico.
+
+    plan = Planificador(root)
+    plan.bucle("muestreo", 0.05, sample_test, prioridad=2)
+    plan.bucle("render", 0.1, actualizar, descartable=True)
+
+Cada bucle tiene su periodo y sus plazos en una rejilla fija (``inicio + k ·
+periodo``), así que no acumula deriva aunque un ``after`` llegue tarde. Si se
+pasa más de un plazo se salta a la siguiente casilla y se cuentan como
+perdidos. Los bucles ``descartable`` (render) no se ejecutan si llegan tarde
+o si en esa vuelta ya se ha gastado el presupuesto con bucles prioritarios,
+y tras un frame lento esperan otro tanto antes del siguiente: si el render
+no da abasto baja de fps en vez de quitarle tiempo a la adquisición.
+"""
+import math
+import time
+import traceback
+from collections import deque
+
+import numpy as np
+
+
+class Bucle:
+    """Un bucle del planificador y sus estadísticas de tiempo."""
+
+    def __init__(self, nombre, periodo_s, fn, prioridad=0, descartable=False, historial=1000):
+        self.nombre = nombre
+        self.periodo_s = periodo_s
+        self.fn = fn
+        self.prioridad = prioridad
+        self.descartable = descartable
+        self.activo = False
+        self.siguiente = 0.0
+        self.ejecuciones = 0
+        self.perdidos = 0       # plazos que pasaron sin ejecutarse
+        self.descartados = 0    # frames descartados por carga (solo descartables)
+        self._duraciones = deque(maxlen=historial)
+        self._retrasos = deque(maxlen=historial)
+
+    def estadisticas(self):
+        d = np.asarray(self._duraciones) * 1000
+        r = np.asarray(self._retrasos) * 1000
+        return {
+            "periodo_ms": self.periodo_s * 1000,
+            "ejecuciones": self.ejecuciones,
+            "media_ms": float(d.mean()) if d.size else 0.0,
+            "p99_ms": float(np.percentile(d, 99)) if d.size else 0.0,
+            "retraso_p99_ms": float(np.percentile(r, 99)) if r.size else 0.0,
+            "retraso_max_ms": float(r.max()) if r.size else 0.0,
+            "perdidos": self.perdidos,
+            "descartados": self.descartados,
+        }
+
+
+class Planificador:
+    """Ejecuta varios ``Bucle`` con una sola cadena de ``after`` (``tk``: la raíz de Tk).
+
+    ``presupuesto_s``: si en una vuelta los bucles prioritarios ya han tardado
+    más que esto, los descartables de esa vuelta se saltan.
+    """
+
+    def __init__(self, tk, presupuesto_s=0.03, reloj=time.monotonic):
+        self.tk = tk
+        self.presupuesto_s = presupuesto_s
+        self.reloj = reloj
+        self.bucles = {}
+        self._after = None
+        self._armado = None   # instante para el que está programado el after
+
+    def bucle(self, nombre, periodo_s, fn, prioridad=0, descartable=False, activo=True):
+        b = Bucle(nombre, periodo_s, fn, prioridad, descartable)
+        self.bucles[nombre] = b
+        if activo:
+            self.activar(nombre)
+        return b
+
+    def activar(self, nombre, ahora=True):
+        """Arranca el bucle (primera ejecución ya, o tras un periodo si ``ahora`` es False)."""
+        b = self.bucles[nombre]
+        b.activo = True
+        b.siguiente = self.reloj() + (0.0 if ahora else b.periodo_s)
+        self._armar()
+
+    def pausar(self, nombre):
+        self.bucles[nombre].activo = False
+
+    def estadisticas(self):
+        return {n: b.estadisticas() for n, b in self.bucles.items()}
+
+    def metricas(self):
+        """Estadísticas por bucle para ``METRICAS.fuente`` (etiqueta ``bucle``)."""
+        out = {}
+        for n, st in self.estadisticas().items():
+            for k in ("ejecuciones", "perdidos", "descartados"):
+                out[f'dyno_bucle_{k}_total{{bucle="{n}"}}'] = st[k]
+            out[f'dyno_bucle_p99_ms{{bucle="{n}"}}'] = round(st["p99_ms"], 3)
+            out[f'dyno_bucle_retraso_p99_ms{{bucle="{n}"}}'] = round(st["retraso_p99_ms"], 3)
+        return out
+
+    def _armar(self):
+        activos = [b.siguiente for b in self.bucles.values() if b.activo]
+        if not activos:
+            return
+        cuando = min(activos)
+        if self._after is not None:
+            if self._armado is not None and self._armado <= cuando:
+                return
+            self.tk.after_cancel(self._after)
+        ms = max(0, math.ceil((cuando - self.reloj()) * 1000))   # nunca antes de tiempo
+        self._armado = cuando
+        self._after = self.tk.after(ms, self._tick)
+
+    def _tick(self):
+        self._after = self._armado = None
+        inicio = self.reloj()
+        vencidos = sorted((b for b in self.bucles.values() if b.activo and b.siguiente <= inicio),
+                          key=lambda b: -b.prioridad)
+        for b in vencidos:
+            if not b.activo:        # otro bucle de esta vuelta lo ha pausado
+                continue
+            ahora = self.reloj()
+            retraso = ahora - b.siguiente
+            # siguiente plazo en la rejilla; las casillas saltadas cuentan como perdidas
+            saltos = int(retraso // b.periodo_s)
+            b.perdidos += saltos
+            b.siguiente += (saltos + 1) * b.periodo_s
+            if b.descartable and (saltos or ahora - inicio > self.presupuesto_s):
+                b.descartados += 1
+                continue
+            try:
+                b.fn()
+            except Exception:
+                traceback.print_exc()   # un error en un bucle no para a los demás
+            fin = self.reloj()
+            b.ejecuciones += 1
+            b._retrasos.append(retraso)
+            b._duraciones.append(fin - ahora)
+            if b.descartable:
+                # un frame lento espera otro tanto antes del siguiente: el render
+                # no ocupa más de la mitad del hilo y baja de fps solo
+                while b.siguiente < fin + (fin - ahora):
+                    b.siguiente += b.periodo_s
+        self._armar()
@@ -0,0 +1,287 @@
+"""Detección automática de tiradas (arranque, pico y deceleración) sobre el flujo de RPM.
+
+    det = DetectorTiradas()
+    for recs in lotes:                       # lo que se drena del SampleRing
+        for tirada in det.extend(recs["t"], recs["rpm"]):
+            guardar(tirada.muestras); analizar(tirada)
+
+El detector no mira cada muestra: agrupa el flujo en casillas de ``paso_s``
+(media por casilla), así que su coste no depende de la frecuencia del sensor.
+Sobre las casillas suaviza la RPM y estima su derivada con una regresión
+sobre las últimas ``ventana_s``, y sigue una máquina de estados:
+
+* ``reposo``: espera una subida de más de ``acel_min`` RPM/s sostenida
+  ``confirmar_s``. El inicio se fecha donde la derivada pasó de
+  ``acel_min / 4`` (antes de confirmarse), menos ``margen_s``.
+* ``subida``: sigue el pico. Pasa a ``bajada`` cuando la RPM cae de forma
+  sostenida por debajo del pico (``caida_rel``). Si no llega a subir
+  ``subida_min`` RPM sobre el arranque, era un falso arranque y se descarta.
+* ``bajada``: la tirada acaba cuando la RPM deja de caer (ralentí o
+  parado), baja de ``reposo_rel`` del pico, o se vuelve a acelerar (en ese
+  caso empieza ahí la siguiente, sin perder muestras).
+
+La memoria está acotada: antes del arranque solo se guarda ``preroll_s`` de
+muestras y una tirada se corta a los ``max_s`` segundos.
+"""
+from collections import deque
+
+import numpy as np
+
+from . import config
+from .acquisition import SAMPLE_DTYPE
+
+REPOSO, SUBIDA, BAJADA = "reposo", "subida", "bajada"
+
+
+class Tirada:
+    """Una tirada detectada: muestras (SAMPLE_DTYPE) e instantes de inicio, pico y fin."""
+
+    def __init__(self, muestras, t_inicio, t_pico, t_fin, rpm_pico, motivo):
+        self.muestras = muestras
+        self.t_inicio = t_inicio
+        self.t_pico = t_pico
+        self.t_fin = t_fin
+        self.rpm_pico = rpm_pico
+        self.motivo = motivo      # por qué terminó: "reposo", "estable", "nueva", "max_s", "fin"
+
+    @property
+    def duracion(self):
+        return self.t_fin - self.t_inicio
+
+    @property
+    def i_pico(self):
+        """Índice de la primera muestra después del pico (frontera subida/bajada)."""
+        return int(np.searchsorted(self.muestras["t"], self.t_pico, side="right"))
+
+    def subida(self):
+        return self.muestras[:self.i_pico]
+
+    def bajada(self):
+        return self.muestras[self.i_pico:]
+
+    def __len__(self):
+        return len(self.muestras)
+
+
+class DetectorTiradas:
+    """Segmenta en tiradas el flujo (t, rpm) según llega; ver el docstring del módulo."""
+
+    def __init__(self, acel_min=config.SEG_ACEL_MIN, subida_min=config.SEG_SUBIDA_MIN,
+                 confirmar_s=0.15, caida_rel=0.03, reposo_rel=0.05, estable_s=0.4,
+                 margen_s=0.2, preroll_s=1.0, max_s=config.SEG_MAX_S, paso_s=0.01, ventana_s=0.15):
+        self.acel_min = acel_min
+        self.subida_min = subida_min
+        self.confirmar_s = confirmar_s
+        self.caida_rel = caida_rel
+        self.reposo_rel = reposo_rel
+        self.estable_s = estable_s
+        self.margen_s = margen_s
+        self.preroll_s = preroll_s
+        self.max_s = max_s
+        self.paso_s = paso_s
+        self._n_ventana = max(3, int(round(ventana_s / paso_s)))
+        self.reset()
+
+    def reset(self):
+        self.estado = REPOSO
+        self.t_inicio = None
+        self.t_pico = None
+        self.rpm_pico = 0.0
+        self.rpm = 0.0               # RPM suavizada de la última casilla
+        self.derivada = 0.0          # RPM/s
+        self.descartadas = 0         # falsos arranques
+        self._bin = None             # [índice, suma, n] de la casilla en curso
+        self._casillas = deque(maxlen=self._n_ventana)   # (t, rpm suavizada)
+        self._t_rise = None          # cuando la derivada pasó de acel_min / 4
+        self._t_sobre = None         # desde cuando la derivada supera acel_min
+        self._t_bajo_pico = None     # desde cuando la RPM está por debajo del pico
+        self._t_quieto = None        # desde cuando la RPM ya no cae (en bajada)
+        self._rpm_arranque = 0.0
+        self._preroll = deque()      # lotes de muestras anteriores al arranque
+        self._trozos = []            # lotes de la tirada en curso
+        self._listas = []
+
+    # ---------------- entrada ---------------- #
+    def extend(self, ts, rpms):
+        """Añade un lote; devuelve la lista de tiradas que se han cerrado con él."""
+        ts = np.asarray(ts, dtype=float)
+        if len(ts) == 0:
+            return []
+        rpms = np.asarray(rpms, dtype=float)
+        recs = np.empty(len(ts), dtype=SAMPLE_DTYPE)
+        recs["t"], recs["rpm"] = ts, rpms
+        self._guardar(recs)
+
+        # medias por casilla de paso_s; la última se queda abierta para el siguiente lote
+        k = np.floor(ts / self.paso_s).astype(np.int64)
+        cortes = np.flatnonzero(np.diff(k)) + 1
+        inicios = np.r_[0, cortes]
+        sumas = np.add.reduceat(rpms, inicios)
+        cuentas = np.diff(np.r_[inicios, len(ts)])
+        for kb, s, c in zip(k[inicios].tolist(), sumas.tolist(), cuentas.tolist()):
+            if self._bin is not None and self._bin[0] == kb:
+                self._bin[1] += s
+                self._bin[2] += c
+                continue
+            if self._bin is not None:
+                self._casilla(*self._bin)
+            self._bin = [kb, s, c]
+        listas, self._listas = self._listas, []
+        return listas
+
+    def silencio(self, t_ahora, max_s=0.5):
+        """Cierra la tirada si no llegan muestras desde hace ``max_s`` (sensor parado).
+
+        Muchos sensores no mandan nada con el rodillo quieto; sin esto la
+        tirada no se cerraría hasta la siguiente muestra.
+        """
+        if self.estado == REPOSO or self._bin is None:
+            return []
+        if t_ahora - (self._bin[0] + 1) * self.paso_s < max_s:
+            return []
+        return self.terminar()
+
+    def terminar(self):
+        """Cierra lo que esté abierto (fin del flujo); devuelve las tiradas cerradas."""
+        if self._bin is not None:
+            self._casilla(*self._bin)
+            self._bin = None
+        if self.estado == BAJADA or (self.estado == SUBIDA and
+                                     self.rpm_pico - self._rpm_arranque >= self.subida_min):
+            self._cerrar(np.inf, "fin")
+        elif self.estado == SUBIDA:
+            self._descartar()
+        listas, self._listas = self._listas, []
+        return listas
+
+    def _guardar(self, recs):
+        if self.estado == REPOSO:
+            self._preroll.append(recs)
+            # se guarda algo más de preroll_s (lotes enteros)
+            while len(self._preroll) > 1 and recs["t"][-1] - self._preroll[1]["t"][0] > self.preroll_s:
+                self._preroll.popleft()
+        else:
+            self._trozos.append(recs)
+
+    def actual(self):
+        """Muestras de la tirada en curso (vacío en reposo)."""
+        if self.estado == REPOSO or not self._trozos:
+            return np.zeros(0, dtype=SAMPLE_DTYPE)
+        m = np.concatenate(self._trozos)
+        return m[m["t"] >= self.t_inicio]
+
+    # ---------------- máquina de estados ---------------- #
+    def _casilla(self, kb, suma, n):
+        t = (kb + 0.5) * self.paso_s
+        media = suma / n
+        self.rpm = media if not self._casillas else 0.5 * self.rpm + 0.5 * media
+        self._casillas.append((t, self.rpm))
+        self.derivada = self._pendiente()
+
+        if self.estado == REPOSO:
+            self._en_reposo(t)
+        elif self.estado == SUBIDA:
+            self._en_subida(t)
+        else:
+            self._en_bajada(t)
+
+    def _pendiente(self):
+        if len(self._casillas) < 3:
+            return 0.0
+        c = np.asarray(self._casillas)
+        x = c[:, 0] - c[:, 0].mean()
+        return float((x * (c[:, 1] - c[:, 1].mean())).sum() / (x * x).sum())
+
+    def _en_reposo(self, t):
+        d = self.derivada
+        if d <= self.acel_min / 4:
+            self._t_rise = self._t_sobre = None
+            return
+        if self._t_rise is None:
+            self._t_rise = t - self._n_ventana * self.paso_s / 2
+            self._rpm_arranque = self._casillas[0][1]
+        if d <= self.acel_min:
+            self._t_sobre = None
+            return
+        if self._t_sobre is None:
+            self._t_sobre = t
+        if t - self._t_sobre >= self.confirmar_s:
+            self._arrancar(self._t_rise - self.margen_s)
+
+    def _arrancar(self, t_inicio):
+        self.estado = SUBIDA
+        self.t_inicio = t_inicio
+        self.t_pico = t_inicio
+        self.rpm_pico = self.rpm
+        self._t_bajo_pico = self._t_quieto = None
+        self._trozos = [r[r["t"] >= t_inicio] for r in self._preroll]
+        self._preroll.clear()
+
+    def _en_subida(self, t):
+        if self.rpm >= self.rpm_pico:
+            self.rpm_pico, self.t_pico = self.rpm, t
+            self._t_bajo_pico = None
+        elif self.rpm < self.rpm_pico * (1 - self.caida_rel):
+            if self._t_bajo_pico is None:
+                self._t_bajo_pico = t
+            if t - self._t_bajo_pico >= self.confirmar_s:
+                if self.rpm_pico - self._rpm_arranque < self.subida_min:
+                    self._descartar()
+                    return
+                self.estado = BAJADA
+        if t - self.t_inicio > self.max_s:
+            self._cerrar(t, "max_s")
+
+    def _en_bajada(self, t):
+        d = self.derivada
+        if d > self.acel_min:
+            # vuelve a acelerar: cerrar aquí y arrancar la siguiente desde el mismo punto
+            t_rise = self._t_rise_reciente()
+            self._cerrar(t_rise, "nueva")
+            self._t_rise = t_rise
+            self._rpm_arranque = min(r for _, r in self._casillas)
+            self._t_sobre = t
+            return
+        if self.rpm <= self.rpm_pico * self.reposo_rel:
+            self._cerrar(t, "reposo")
+            return
+        if d > -self.acel_min / 8:
+            if self._t_quieto is None:
+                self._t_quieto = t
+            if t - self._t_quieto >= self.estable_s:
+                self._cerrar(t, "estable")
+                return
+        else:
+            self._t_quieto = None
+        if t - self.t_inicio > self.max_s:
+            self._cerrar(t, "max_s")
+
+    def _t_rise_reciente(self):
+        """Instante del mínimo de RPM en la ventana: donde empezó la nueva subida."""
+        return min(self._casillas, key=lambda c: c[1])[0]
+
+    def _cerrar(self, t_fin, motivo):
+        m = np.concatenate(self._trozos) if self._trozos else np.zeros(0, dtype=SAMPLE_DTYPE)
+        dentro = (m["t"] >= self.t_inicio) & (m["t"] < t_fin)
+        if motivo == "nueva":
+            self._preroll = deque([m[m["t"] >= t_fin]])
+        else:
+            self._preroll = deque([m[m["t"] >= t_fin - self.preroll_s]])
+        m_dentro = m[dentro]
+        if np.isinf(t_fin):
+            t_fin = float(m_dentro["t"][-1]) if len(m_dentro) else self.t_inicio
+        self._listas.append(Tirada(m_dentro, self.t_inicio, self.t_pico, t_fin,
+                                   self.rpm_pico, motivo))
+        self._a_reposo()
+
+    def _descartar(self):
+        self.descartadas += 1
+        m = np.concatenate(self._trozos)
+        self._preroll = deque([m[m["t"] >= m["t"][-1] - self.preroll_s]])
+        self._a_reposo()
+
+    def _a_reposo(self):
+        self.estado = REPOSO
+        self.t_inicio = self.t_pico = None
+        self._trozos = []
+        self._t_rise = self._t_sobre = None
@@ -0,0 +1,149 @@
+"""Captura y análisis de un test sobre el SampleRing, sin dependencias de UI."""
+import os
+
+import numpy as np
+
+from . import config
+from .acquisition import SAMPLE_DTYPE
+from .analysis import analizar_test
+from .clock import ahora
+from .curves import analizar_curvas, resultado_curvas
+from .metrics import METRICAS
+from .storage import Run, RunWriter, nombre_run
+
+
+class Captura:
+    """Muestras (t, rpm) de un test, drenadas por lotes del buffer del lector.
+
+    ``iniciar`` marca el t0 y registra la última lectura como primera muestra;
+    ``drenar`` añade lo llegado desde entonces (rpm > 0.5) y lo devuelve para
+    las gráficas; ``terminar`` hace el último drenado y entrega el test completo.
+    Con un ``RunWriter`` las muestras van directas a disco en vez de a memoria
+    y ``terminar`` devuelve el ``Run`` grabado. Con un ``EstimadorTorque`` cada
+    lote se analiza según llega y ``resultado`` queda listo al terminar.
+    """
+
+    def __init__(self, ring, estimador=None):
+        self.ring = ring
+        self.estimador = estimador
+        self.resultado = None
+        self.t0 = None
+        self.cursor = 0
+        self.writer = None
+        self._chunks = []
+
+    @property
+    def activa(self):
+        return self.t0 is not None
+
+    def iniciar(self, writer=None):
+        self.t0 = ahora()
+        self.cursor = self.ring.head
+        self.writer = writer
+        self._chunks = []
+        self.resultado = None
+        if self.estimador is not None:
+            self.estimador.reset()
+        last = self.ring.latest()
+        r0 = float(last["rpm"]) if last is not None else 0.0
+        self._guardar(np.array([(self.t0, r0)], dtype=SAMPLE_DTYPE))
+        return r0
+
+    def _guardar(self, recs):
+        if self.estimador is not None:
+            with METRICAS.cronometro("dyno_analisis_segundos"):
+                self.estimador.extend(recs["t"], recs["rpm"])
+        if self.writer is not None:
+            self.writer.append(recs)
+        else:
+            self._chunks.append(recs)
+
+    def drenar(self):
+        with METRICAS.cronometro("dyno_drenado_segundos"):
+            recs, self.cursor = self.ring.read(self.cursor)
+        if METRICAS.activo and len(recs):
+            # lo que ha esperado en el ring la muestra más reciente
+            METRICAS.observar("dyno_espera_ring_segundos", ahora() - recs["t"][-1])
+        recs = recs[(recs["rpm"] > 0.5) & (recs["t"] > self.t0)]
+        if len(recs):
+            self._guardar(recs)
+        return recs
+
+    def muestras(self):
+        if not self._chunks:
+            return np.zeros(0, dtype=SAMPLE_DTYPE)
+        return np.concatenate(self._chunks)
+
+    def terminar(self):
+        if self.activa:
+            self.drenar()
+            if self.estimador is not None:
+                with METRICAS.cronometro("dyno_analisis_final_segundos"):
+                    self.resultado = self.estimador.flush()
+        if self.writer is not None:
+            self.writer.close()
+            rec = Run(self.writer.path)
+            self.writer = None
+        else:
+            rec = self.muestras()
+        self.cancelar()
+        return rec
+
+    def cancelar(self):
+        if self.writer is not None:
+            self.writer.close()   # lo ya grabado se queda en disco
+        self.writer = None
+        self.t0 = None
+        self._chunks = []
+
+
+CAMPOS_RESULTADO = ("rpm_max", "velocidad_max", "torque_max", "potencia_max",
+                    "torque_corr_max", "potencia_corr_max", "rpm_potencia_max", "curvas")
+
+
+def resultado_sin_analisis(res, error):
+    """Resultado del test con los escalares de streaming (0 si faltan), sin curvas y con el error."""
+    res = {k: res.get(k) or 0.0 for k in CAMPOS_RESULTADO}
+    res["torque_corr_max"] = res["torque_corr_max"] or res["torque_max"]
+    res["potencia_corr_max"] = res["potencia_corr_max"] or res["potencia_max"]
+    res["curvas"] = None
+    res["error_analisis"] = error
+    return res
+
+
+def analizar_muestras(rec, J=config.J, D=config.D, window_s=config.REG_WINDOW_S,
+                      min_samples=config.MIN_SAMPLES_REG, filter_window=config.MEDIAN_WINDOW,
+                      perdidas=None, respaldo=None):
+    """Métricas de ``test_results`` para un array de muestras SAMPLE_DTYPE, con las curvas compensadas."""
+    res = analizar_test(rec["t"], rec["rpm"], J, D, window_s, min_samples, filter_window)
+    res.update(curvas_muestras(rec, J, window_s, min_samples, filter_window, perdidas, respaldo))
+    return res
+
+
+def curvas_muestras(rec, J=config.J, window_s=config.REG_WINDOW_S, min_samples=config.MIN_SAMPLES_REG,
+                    filter_window=config.MEDIAN_WINDOW, perdidas=None, respaldo=None):
+    """Máximos compensados y curvas (en JSON) de ``analizar_curvas`` sobre ``rec``."""
+    return resultado_curvas(analizar_curvas(rec["t"], rec["rpm"], J, window_s, min_samples,
+                                            filter_window, perdidas, respaldo))
+
+
+def nuevo_run(test_idx, lector, directorio=config.RUNS_DIR, **meta):
+    """RunWriter para el test ``test_idx`` con los datos del banco en el sidecar."""
+    datos = {
+        "test": test_idx,
+        "puerto": lector.puerto,
+        "baudios": lector.baudios,
+        "protocolo": lector.modo or lector.protocolo,
+        "pulsos_por_vuelta": lector.pulsos_por_vuelta,
+        "espaciado_imanes": lector.espaciado,
+        "firmware": config.FIRMWARE,
+        "motor": config.MOTOR,
+        "esc": config.ESC,
+        "J": config.J,
+        "D": config.D,
+        "reg_window_s": config.REG_WINDOW_S,
+        "min_samples_reg": config.MIN_SAMPLES_REG,
+        "median_window": config.MEDIAN_WINDOW,
+    }
+    datos.update(meta)
+    return RunWriter(os.path.join(directorio, nombre_run(test_idx)), **datos)
@@ -0,0 +1,333 @@
+"""Arduino simulado sobre un pseudo-terminal (solo POSIX) para pruebas y benchmarks.
+
+    dev = FakeDevice(protocolo="binario", rate_hz=2000, rpm_fn=tirada(), ruido_rpm=20)
+    dev.start()
+    lector = SerialReader(dev.port, 115200, ring)   # el puerto es un /dev/pts/N
+
+    dev = FakeDevice.replay(Run("runs/2024-05-01_test01"), velocidad=4)   # run grabado, x4
+
+También desde consola, para usar el dashboard o el modo headless sin Arduino::
+
+    python -m dyno.simulator --protocolo binario --rate 5000 --perfil tirada
+    python -m dyno.simulator --protocolo flancos --pulsos 4 --espaciado 0.26 0.24 0.255 0.245
+"""
+import argparse
+import os
+import threading
+import time
+import tty
+
+import numpy as np
+
+from .clock import ahora
+from .protocol import FRAME_SIZE, encode_edge_batches, encode_frames
+from .pulses import normalizar_espaciado
+
+PASO_FLANCOS_S = 2e-4   # paso con el que se integra el perfil para situar cada flanco
+
+
+def rampa_rpm(t):
+    """Perfil por defecto: arranque exponencial hasta 12000 RPM (acepta arrays)."""
+    return 12000 * (1 - np.exp(-np.asarray(t) / 4.0))
+
+
+def tirada(rpm_max=12000.0, t_subida=4.0, t_meseta=2.0, t_bajada=8.0, ralenti=0.0, espera=0.5):
+    """Perfil de una tirada completa: parado, aceleración, meseta y deceleración libre.
+
+    La aceleración es exponencial (``t_subida`` ≈ 3 constantes de tiempo) y la
+    bajada sigue ``(1 - s) / (1 + 3 s)``: cae rápido arriba (rozamiento
+    aerodinámico) y más lento abajo, hasta ``ralenti`` en ``t_bajada`` s. Se
+    repite con periodo igual a su duración total.
+    """
+    t1 = espera + t_subida
+    t2 = t1 + t_meseta
+    total = t2 + t_bajada
+
+    def fn(t):
+        t = np.asarray(t, dtype=float) % total
+        subida = ralenti + (rpm_max - ralenti) * (1 - np.exp(-3 * (t - espera) / t_subida))
+        s = np.clip((t - t2) / t_bajada, 0.0, 1.0)
+        bajada = ralenti + (rpm_max - ralenti) * (1 - s) / (1 + 3 * s)
+        return np.where(t < espera, ralenti, np.where(t < t2, np.minimum(subida, rpm_max), bajada))
+
+    fn.duracion = total
+    return fn
+
+
+class FakeDevice:
+    """Escribe líneas ``RPM: n`` o tramas binarias en el extremo maestro de un pty.
+
+    ``drop_every``/``corrupt_every`` (0 = nunca) saltan o corrompen una de cada N
+    tramas binarias para ejercitar el conteo de huecos y de CRC;
+    ``prob_perdida`` pierde tramas al azar. ``deriva_ppm`` adelanta (o
+    retrasa) el reloj del dispositivo respecto al del host. ``ruido_rpm`` es
+    ruido gaussiano (desviación en RPM) sobre el perfil y ``jitter`` el
+    desorden relativo del instante de cada muestra (0.2 = ±20 % del periodo;
+    menos de 0.5 para que no se adelanten unas a otras).
+    ``cortes``: intervalos ``(inicio_s, duracion_s)`` en los que el sensor no
+    manda nada (cable suelto, imán que no pasa).
+
+    Con ``muestras=(t, rpm)`` reproduce esos instantes y valores en vez de
+    ``rate_hz``/``rpm_fn``, ``velocidad`` veces más rápido que en tiempo real.
+
+    Con ``protocolo="flancos"`` no hay ``rate_hz``: se integra el perfil y se
+    manda el instante de cada paso de imán (``pulsos_por_vuelta`` por vuelta,
+    separados según ``espaciado``) en lotes de hasta ``por_lote``; ``jitter`` es
+    entonces relativo al intervalo entre flancos (``ruido_rpm`` no se usa) y las
+    pérdidas y la corrupción son de lotes enteros.
+
+    Para medir latencias guarda en ``envios`` pares (muestras entregadas
+    acumuladas, ``clock.ahora()`` de la escritura), uno por bloque escrito.
+    """
+
+    def __init__(self, protocolo="ascii", rate_hz=200.0, rpm_fn=rampa_rpm,
+                 drop_every=0, corrupt_every=0, pulsos_por_vuelta=1, deriva_ppm=0.0,
+                 ruido_rpm=0.0, jitter=0.0, prob_perdida=0.0, cortes=(),
+                 muestras=None, velocidad=1.0, espaciado=None, por_lote=64, semilla=0):
+        self.protocolo = protocolo
+        self.rate_hz = rate_hz
+        self.rpm_fn = rpm_fn
+        self.drop_every = drop_every
+        self.corrupt_every = corrupt_every
+        self.pulsos_por_vuelta = pulsos_por_vuelta
+        self.deriva_ppm = deriva_ppm
+        self.ruido_rpm = ruido_rpm
+        self.jitter = jitter
+        self.prob_perdida = prob_perdida
+        self.cortes = list(cortes)
+        self.velocidad = velocidad
+        self.espaciado = normalizar_espaciado(espaciado, pulsos_por_vuelta)
+        self.por_lote = por_lote
+        self._rng = np.random.default_rng(semilla)
+        self._replay = None
+        if muestras is not None:
+            t, rpm = (np.asarray(c, dtype=float) for c in muestras)
+            self._replay = (t - t[0], rpm)
+        self.master, self._slave = os.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self.sent = 0
+        self.dropped = 0
+        self.corrupted = 0
+        self.cortadas = 0
+        self.envios = []
+        self._entregadas = 0
+        self._t_flancos = 0.0       # hasta dónde se han generado flancos (s del dispositivo)
+        self._vueltas = 0.0
+        self._flanco = 0            # número del siguiente flanco
+        self._lotes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def replay(cls, rec, velocidad=1.0, protocolo="binario", **kw):
+        """Dispositivo que reproduce un run grabado (``Run`` o array SAMPLE_DTYPE)."""
+        return cls(protocolo=protocolo, muestras=(rec["t"], rec["rpm"]), velocidad=velocidad, **kw)
+
+    @property
+    def terminado(self):
+        """En replay, True cuando ya se ha enviado todo el run."""
+        if self._replay is None:
+            return False
+        if self.protocolo == "flancos":
+            return self._t_flancos >= self._replay[0][-1]
+        return self.sent >= len(self._replay[0])
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Deja de escribir; el pty sigue abierto para que el lector drene lo pendiente."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def close(self):
+        self.stop()
+        os.close(self.master)
+        os.close(self._slave)
+
+    def _tiempos(self, seq):
+        """Instante (s, reloj del dispositivo sin deriva) y RPM de las muestras ``seq``."""
+        if self._replay is not None:
+            t, rpm = self._replay[0][seq], self._replay[1][seq].copy()
+        else:
+            t = seq / self.rate_hz
+            if self.jitter:
+                t = t + self._rng.uniform(-self.jitter, self.jitter, len(seq)) / self.rate_hz
+            rpm = np.asarray(self.rpm_fn(t), dtype=float) * np.ones(len(seq))
+        if self.ruido_rpm:
+            rpm = rpm + self._rng.normal(0.0, self.ruido_rpm, len(seq))
+        return t, np.maximum(rpm, 0.0)
+
+    def _bloque(self, desde, hasta):
+        """Bytes de las muestras [desde, hasta) y cuántas se entregan de verdad."""
+        seq = np.arange(desde, hasta)
+        t, rpm = self._tiempos(seq)
+        enviar = np.ones(len(seq), dtype=bool)
+        for ini, dur in self.cortes:
+            enviar &= ~((t >= ini) & (t < ini + dur))
+        self.cortadas += int((~enviar).sum())
+        if self.protocolo != "binario":
+            return b"".join(b"RPM: %d\r\n" % v for v in np.rint(rpm[enviar])), int(enviar.sum())
+
+        perdida = np.zeros(len(seq), dtype=bool)
+        if self.drop_every:
+            perdida |= seq % self.drop_every == self.drop_every - 1
+        if self.prob_perdida:
+            perdida |= self._rng.random(len(seq)) < self.prob_perdida
+        perdida &= enviar
+        self.dropped += int(perdida.sum())
+        enviar &= ~perdida
+        seq, t, rpm = seq[enviar], t[enviar], rpm[enviar]
+
+        p = rpm * self.pulsos_por_vuelta
+        period = np.divide(60e6, p, out=np.zeros_like(p), where=p > 0).astype(np.int64)
+        t_us = np.rint(t * (1 + self.deriva_ppm * 1e-6) * 1e6).astype(np.int64)
+        buf = np.frombuffer(encode_frames(t_us, period, seq), dtype=np.uint8).reshape(-1, FRAME_SIZE).copy()
+        if self.corrupt_every:
+            mal = seq % self.corrupt_every == self.corrupt_every - 1
+            buf[mal, 5] ^= 0xFF
+            self.corrupted += int(mal.sum())
+            entregadas = len(seq) - int(mal.sum())
+        else:
+            entregadas = len(seq)
+        return buf.tobytes(), entregadas
+
+    def _bloque_flancos(self, hasta):
+        """Bytes de los flancos hasta el instante ``hasta`` y cuántos se entregan de verdad."""
+        desde = self._t_flancos
+        if hasta <= desde:
+            return b"", 0
+        t = np.linspace(desde, hasta, max(2, int(np.ceil((hasta - desde) / PASO_FLANCOS_S)) + 1))
+        if self._replay is not None:
+            rpm = np.interp(t, *self._replay)
+        else:
+            rpm = np.maximum(np.asarray(self.rpm_fn(t), dtype=float) * np.ones(len(t)), 0.0)
+        vueltas = self._vueltas + np.concatenate(([0.0], np.cumsum((rpm[1:] + rpm[:-1]) / 2 * np.diff(t)))) / 60
+        self._t_flancos, self._vueltas = hasta, vueltas[-1]
+
+        n = self.pulsos_por_vuelta
+        k = np.arange(self._flanco, n * (int(vueltas[-1]) + 2))
+        inicio = np.arange(n) / n if self.espaciado is None else np.concatenate(([0.0], np.cumsum(self.espaciado)[:-1]))
+        pos = k // n + inicio[k % n]
+        k = k[pos <= vueltas[-1]]
+        if not len(k):
+            return b"", 0
+        t_fl = np.interp(pos[:len(k)], vueltas, t)
+        if self.jitter and len(k) > 1:
+            t_fl = t_fl + self._rng.uniform(-self.jitter, self.jitter, len(k)) * np.gradient(t_fl)
+        primero, self._flanco = self._flanco, int(k[-1]) + 1
+        enviar = np.ones(len(k), dtype=bool)
+        for ini, dur in self.cortes:
+            enviar &= ~((t_fl >= ini) & (t_fl < ini + dur))
+        self.cortadas += int((~enviar).sum())
+        self.sent += len(k)
+
+        t_us = np.rint(t_fl * (1 + self.deriva_ppm * 1e-6) * 1e6).astype(np.int64)
+        partes, entregadas = [], 0
+        # con cortes, cada tramo seguido va en sus propios lotes (el número de flanco marca el hueco)
+        tramos = np.flatnonzero(np.diff(enviar.astype(np.int8)) != 0) + 1
+        for a, b in zip(np.concatenate(([0], tramos)), np.concatenate((tramos, [len(k)]))):
+            if not enviar[a]:
+                continue
+            for lote in encode_edge_batches(t_us[a:b], primero + a, self.por_lote):
+                i = self._lotes
+                self._lotes += 1
+                if (self.drop_every and i % self.drop_every == self.drop_every - 1) or \
+                        (self.prob_perdida and self._rng.random() < self.prob_perdida):
+                    self.dropped += lote[1]
+                    continue
+                if self.corrupt_every and i % self.corrupt_every == self.corrupt_every - 1:
+                    lote = lote[:-1] + bytes((lote[-1] ^ 0xFF,))
+                    self.corrupted += 1
+                else:
+                    entregadas += lote[1]
+                partes.append(lote)
+        return b"".join(partes), entregadas
+
+    def _run(self):
+        # se generan las muestras que tocan desde el último ciclo y se escriben en un bloque
+        t0 = time.monotonic()
+        seq = 0
+        total = len(self._replay[0]) if self._replay is not None else None
+        while not self._stop.is_set():
+            t = (time.monotonic() - t0) * self.velocidad
+            if self.protocolo == "flancos":
+                out, entregadas = self._bloque_flancos(t)
+                if out:
+                    if not self._escribir(out):
+                        return
+                    self._entregadas += entregadas
+                    self.envios.append((self._entregadas, ahora()))
+                if self.terminado:
+                    return
+                time.sleep(0.001)
+                continue
+            if total is None:
+                due = int(t * self.rate_hz) + 1
+            else:
+                due = int(np.searchsorted(self._replay[0], t, side="right"))
+            if due > seq:
+                out, entregadas = self._bloque(seq, due)
+                if not self._escribir(out):
+                    return
+                seq = due
+                self.sent = seq
+                self._entregadas += entregadas
+                self.envios.append((self._entregadas, ahora()))
+            if total is not None and seq >= total:
+                return
+            time.sleep(0.001)
+
+    def _escribir(self, out):
+        view = memoryview(out)
+        while view:
+            try:
+                view = view[os.write(self.master, view):]
+            except OSError:
+                return False
+        return True
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m dyno.simulator", description=__doc__.splitlines()[0])
+    ap.add_argument("--protocolo", default="binario", choices=["ascii", "binario", "flancos"])
+    ap.add_argument("--rate", type=float, default=1000.0, help="muestras por segundo (100-20000)")
+    ap.add_argument("--perfil", default="tirada", choices=["rampa", "tirada"])
+    ap.add_argument("--rpm-max", type=float, default=12000.0, help="solo --perfil tirada")
+    ap.add_argument("--ruido", type=float, default=0.0, help="desviación del ruido en RPM")
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--perdidas", type=float, default=0.0, help="probabilidad de perder una trama")
+    ap.add_argument("--corte", type=float, nargs=2, action="append", default=[],
+                    metavar=("INICIO", "DURACION"), help="intervalo sin datos (repetible)")
+    ap.add_argument("--deriva-ppm", type=float, default=0.0)
+    ap.add_argument("--pulsos", type=int, default=1, help="pulsos por vuelta (binario y flancos)")
+    ap.add_argument("--espaciado", type=float, nargs="+", help="fracción de vuelta entre imanes (flancos)")
+    ap.add_argument("--replay", metavar="RUN", help="directorio de un run grabado")
+    ap.add_argument("--velocidad", type=float, default=1.0, help="factor de velocidad del replay")
+    args = ap.parse_args(argv)
+
+    comun = dict(ruido_rpm=args.ruido, prob_perdida=args.perdidas, cortes=args.corte,
+                 deriva_ppm=args.deriva_ppm, pulsos_por_vuelta=args.pulsos, espaciado=args.espaciado)
+    if args.replay:
+        from .storage import Run
+        dev = FakeDevice.replay(Run(args.replay), args.velocidad, args.protocolo, **comun)
+    else:
+        perfil = tirada(rpm_max=args.rpm_max) if args.perfil == "tirada" else rampa_rpm
+        dev = FakeDevice(args.protocolo, args.rate, perfil, jitter=args.jitter, **comun)
+    dev.start()
+    print(f"Simulando en {dev.port} (Ctrl+C para parar)")
+    try:
+        while not dev.terminado:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    dev.close()
+
+
+if __name__ == "__main__":
+    main()
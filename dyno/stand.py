@@ -0,0 +1,186 @@
+"""Varios bancos en un proceso: un bucle de E/S para todos los puertos y un pool de análisis.
+
+    bancos = [Banco("A", "/dev/ttyACM0"), Banco("B", "/dev/ttyACM1", J=6.1e-5)]
+    taller = Taller(bancos).start()
+    ...
+    fut = taller.analizar(bancos[0], rec)   # concurrent.futures.Future
+
+Cada ``Banco`` tiene su puerto, su calibración (J, D), su SampleRing y su
+Captura; lo compartido (hilo de E/S, hilos de análisis, matplotlib en el
+tablero) no crece con el número de bancos.
+"""
+import os
+import selectors
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import serial
+
+from . import config
+from .acquisition import READ_CHUNK, Enlace, SampleRing
+from .curves import modelo_ajustado
+from .metrics import METRICAS
+from .session import Captura, analizar_muestras, nuevo_run
+
+
+class Banco:
+    """Un banco de rodillo: puerto, calibración y buffers propios."""
+
+    def __init__(self, nombre, puerto, baudios=config.BAUDIOS, protocolo=config.PROTOCOLO,
+                 pulsos_por_vuelta=config.PULSOS_POR_VUELTA, espaciado=config.ESPACIADO_IMANES,
+                 J=config.J, D=config.D, capacidad=config.RING_CAPACITY):
+        self.nombre = nombre
+        self.puerto = puerto
+        self.baudios = baudios
+        self.protocolo = protocolo
+        self.pulsos_por_vuelta = pulsos_por_vuelta
+        self.espaciado = espaciado
+        self.J = J
+        self.D = D
+        self.ring = SampleRing(capacidad)
+        self.enlace = Enlace(self.ring, protocolo, pulsos_por_vuelta, espaciado)
+        self.captura = Captura(self.ring)
+        self.perdidas = None      # último modelo de pérdidas ajustado en una bajada de este banco
+        self.conectado = False
+        self.error = None
+
+    @property
+    def modo(self):
+        return self.enlace.modo
+
+    def rpm_actual(self):
+        last = self.ring.latest()
+        return float(last["rpm"]) if last is not None else 0.0
+
+    def estado(self):
+        if self.error is not None:
+            return f"Error: {self.error}"
+        if not self.conectado and self.modo is None:
+            return "Sin conexión"
+        return self.enlace.estado()
+
+    def nuevo_run(self, test_idx, directorio=config.RUNS_DIR):
+        """RunWriter del test en ``directorio/<nombre>/`` con la calibración del banco."""
+        return nuevo_run(test_idx, self, os.path.join(directorio, self.nombre),
+                         banco=self.nombre, J=self.J, D=self.D)
+
+    def analizar(self, rec, **kw):
+        """Métricas del test con la calibración del banco (``kw``: ventanas del análisis).
+
+        Un test sin bajada libre suficiente se compensa con el último modelo
+        de pérdidas que ajustó el banco.
+        """
+        with METRICAS.cronometro("dyno_analisis_lote_segundos"):
+            res = analizar_muestras(rec, self.J, self.D, respaldo=self.perdidas, **kw)
+        self.perdidas = modelo_ajustado(res) or self.perdidas
+        return res
+
+    def metricas(self):
+        return self.enlace.metricas(f'banco="{self.nombre}"')
+
+
+def bancos_desde_config(bancos=None):
+    """Bancos de ``config.BANCOS`` (o de la lista dada); si está vacía, uno solo en PUERTO."""
+    bancos = config.BANCOS if bancos is None else bancos
+    if not bancos:
+        return [Banco("banco1", config.PUERTO)]
+    return [Banco(**b) for b in bancos]
+
+
+class BucleSerie:
+    """Un solo hilo que lee todos los puertos y pasa los bytes al ``Enlace`` de cada banco.
+
+    En POSIX espera con ``selectors`` sobre los descriptores de los puertos; en
+    Windows (los puertos COM no son seleccionables) recorre ``in_waiting`` de
+    cada puerto y duerme ``intervalo`` cuando no hay nada que leer.
+    """
+
+    def __init__(self, bancos, intervalo=0.002):
+        self.bancos = bancos
+        self.intervalo = intervalo
+        self.stop_event = threading.Event()
+        self.listo = threading.Event()
+        self._puertos = []
+
+    def _abrir(self):
+        for b in self.bancos:
+            try:
+                ser = serial.Serial(b.puerto, b.baudios, timeout=0)
+            except serial.SerialException as e:
+                b.error = e
+                print(f"No se pudo abrir {b.puerto} ({b.nombre})")
+                continue
+            b.conectado = True
+            self._puertos.append((b, ser))
+            print(f"Conectado a {b.puerto} ({b.nombre})")
+
+    def _leer(self, banco, ser):
+        try:
+            data = ser.read(min(max(ser.in_waiting, 1), READ_CHUNK))
+        except (serial.SerialException, OSError) as e:
+            banco.error = e
+            banco.conectado = False
+            return None
+        if data:
+            banco.enlace.feed(data)
+        return data
+
+    def run(self):
+        self._abrir()
+        self.listo.set()
+        try:
+            if os.name == "posix":
+                self._run_selector()
+            else:
+                self._run_sondeo()
+        finally:
+            for b, ser in self._puertos:
+                b.conectado = False
+                ser.close()
+            self._puertos = []
+
+    def _run_selector(self):
+        with selectors.DefaultSelector() as sel:
+            for b, ser in self._puertos:
+                sel.register(ser.fileno(), selectors.EVENT_READ, (b, ser))
+            while not self.stop_event.is_set() and sel.get_map():
+                for key, _ in sel.select(timeout=0.2):
+                    b, ser = key.data
+                    if self._leer(b, ser) is None:
+                        sel.unregister(key.fd)
+
+    def _run_sondeo(self):
+        while not self.stop_event.is_set():
+            leido = False
+            for b, ser in self._puertos:
+                if b.conectado and ser.in_waiting:
+                    leido |= bool(self._leer(b, ser))
+            if not leido:
+                self.stop_event.wait(self.intervalo)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class Taller:
+    """Los bancos de un proceso: ``BucleSerie`` en un hilo y análisis en un pool compartido."""
+
+    def __init__(self, bancos, workers=1):
+        self.bancos = bancos
+        self.bucle = BucleSerie(bancos)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analisis")
+        self._thread = threading.Thread(target=self.bucle.run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self.bucle.listo.wait(timeout=5)
+        return self
+
+    def analizar(self, banco, rec, **kw):
+        """Analiza ``rec`` con la calibración de ``banco`` en el pool; devuelve un Future."""
+        return self._pool.submit(banco.analizar, rec, **kw)
+
+    def stop(self):
+        self.bucle.stop()
+        self._thread.join(timeout=2)
+        self._pool.shutdown(wait=True)
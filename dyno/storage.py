@@ -0,0 +1,104 @@
+"""Runs en disco: una carpeta por test con columnas float64 append-only y un sidecar JSON.
+
+    runs/20261018-153000_test01/
+        meta.json   J, D, puerto, firmware, parámetros de análisis, resultados...
+        t.f64       tiempos (s, float64 little-endian)
+        rpm.f64     RPM (float64 little-endian)
+
+Las columnas se escriben según llegan las muestras y se reabren como
+``np.memmap`` de solo lectura, así que reanalizar o dibujar un run largo no
+lo copia entero a memoria.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+COLUMNAS = ("t", "rpm")
+META = "meta.json"
+DTYPE = "<f8"
+
+
+def nombre_run(test_idx, cuando=None):
+    return f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(cuando))}_test{test_idx:02d}"
+
+
+def _escribir_meta(path, meta):
+    tmp = os.path.join(path, META + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, os.path.join(path, META))
+
+
+def leer_meta(path):
+    with open(os.path.join(path, META), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def actualizar_meta(path, **campos):
+    meta = leer_meta(path)
+    meta.update(campos)
+    _escribir_meta(path, meta)
+    return meta
+
+
+class RunWriter:
+    """Escritor append-only de un run; ``append`` recibe arrays con campos t/rpm."""
+
+    def __init__(self, path, **meta):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.n = 0
+        self.meta = {"version": 1, "creado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                     "columnas": list(COLUMNAS), "dtype": DTYPE, **meta}
+        self._files = {c: open(os.path.join(path, f"{c}.f64"), "ab") for c in COLUMNAS}
+        _escribir_meta(path, self.meta)
+
+    def append(self, recs):
+        if len(recs) == 0:
+            return
+        for c, f in self._files.items():
+            f.write(np.ascontiguousarray(recs[c], dtype=DTYPE).tobytes())
+        self.n += len(recs)
+
+    def flush(self):
+        for f in self._files.values():
+            f.flush()
+
+    def close(self, **campos):
+        for f in self._files.values():
+            f.close()
+        self.meta.update(campos)
+        self.meta["n"] = self.n
+        _escribir_meta(self.path, self.meta)
+
+
+class Run:
+    """Run grabado; ``run["t"]``/``run["rpm"]`` son memmaps de solo lectura."""
+
+    def __init__(self, path):
+        self.path = path
+        self.meta = leer_meta(path)
+        # la longitud sale de los ficheros (válido aunque el run no se cerrara bien)
+        n = min(os.path.getsize(os.path.join(path, f"{c}.f64")) // 8 for c in COLUMNAS)
+        self._cols = {}
+        for c in COLUMNAS:
+            if n:
+                self._cols[c] = np.memmap(os.path.join(path, f"{c}.f64"), dtype=DTYPE, mode="r", shape=(n,))
+            else:
+                self._cols[c] = np.zeros(0)
+
+    def __getitem__(self, name):
+        return self._cols[name]
+
+    def __len__(self):
+        return len(self._cols["t"])
+
+
+def listar_runs(directorio):
+    """Carpetas de runs (con meta.json) dentro de ``directorio``, en orden."""
+    if not os.path.isdir(directorio):
+        return []
+    return sorted(os.path.join(directorio, d) for d in os.listdir(directorio)
+                  if os.path.isfile(os.path.join(directorio, d, META)))
@@ -0,0 +1,190 @@
+"""Tablero Tk para varios bancos en un proceso.
+
+    python -m dyno.tablero --port /dev/ttyACM0 --port /dev/ttyACM1
+    python -m dyno.tablero              # bancos de BANCOS en dyno/config.py
+
+Una fila por banco (RPM, enlace, test en curso y último resultado) y una sola
+figura de matplotlib con un eje de RPM por banco, todos con blitting. Un único
+``after`` refresca todos los bancos, un único hilo lee todos los puertos y el
+análisis de cada test va al pool compartido del ``Taller``.
+"""
+import argparse
+import math
+import sys
+import time
+import tkinter as tk
+
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+from . import config
+from .history import Historial
+from .lod import PiramideMinMax
+from .render import LivePlot
+from .session import resultado_sin_analisis
+from .stand import Banco, Taller, bancos_desde_config
+from .storage import actualizar_meta
+
+BG = "#1e1e1e"
+CARD = "#2a2d2f"
+FG = "#d4d4d4"
+ACCENT = "#0db99b"
+MUTED = "#9aa0a6"
+REFRESCO_MS = 100
+
+
+class _Fila:
+    """Widgets y estado de test de un banco en el tablero."""
+
+    def __init__(self, parent, banco, live):
+        self.banco = banco
+        self.live = live
+        self.lod = PiramideMinMax()
+        self.inicio = None     # instante (monotonic) en que empieza la captura
+        self.fin = None
+        self.n_test = 0
+        self.futuro = None
+        self.run = None
+        self._textos = {}
+
+        frame = tk.Frame(parent, bg=CARD)
+        frame.pack(fill="x", pady=(0, 4))
+        tk.Label(frame, text=banco.nombre, fg=ACCENT, bg=CARD, font=("Segoe UI", 12, "bold"),
+                 width=10, anchor="w").pack(side="left", padx=8, pady=6)
+        self.rpm = tk.Label(frame, fg=FG, bg=CARD, font=("Segoe UI", 14, "bold"), width=11, anchor="w")
+        self.rpm.pack(side="left")
+        self.boton = tk.Button(frame, text="Test", command=self.iniciar, bg=BG, fg=FG,
+                               relief="flat", activebackground=ACCENT)
+        self.boton.pack(side="right", padx=8)
+        self.resultado = tk.Label(frame, fg=FG, bg=CARD, font=("Segoe UI", 10), anchor="e")
+        self.resultado.pack(side="right", padx=8)
+        self.cuenta = tk.Label(frame, fg=MUTED, bg=CARD, font=("Segoe UI", 10), width=16, anchor="w")
+        self.cuenta.pack(side="left", padx=8)
+        self.enlace = tk.Label(frame, fg=MUTED, bg=CARD, font=("Segoe UI", 9), anchor="w")
+        self.enlace.pack(side="left", padx=8)
+
+    def _texto(self, label, texto):
+        # solo se toca el widget si el texto cambia
+        if self._textos.get(label) != texto:
+            self._textos[label] = texto
+            label.config(text=texto)
+
+    def iniciar(self):
+        if self.inicio is not None or not self.banco.conectado:
+            return
+        self.n_test += 1
+        self.inicio = time.monotonic() + config.COUNTDOWN_S
+        self.fin = self.inicio + config.TEST_DURATION
+        self.lod.clear()
+        self.live.reset()
+        self.boton.config(state="disabled")
+
+    def tick(self, taller, historial):
+        b = self.banco
+        ahora = time.monotonic()
+        self._texto(self.rpm, f"{b.rpm_actual():,.0f} RPM")
+        self._texto(self.enlace, b.estado())
+
+        if self.inicio is not None:
+            if ahora < self.inicio:
+                self._texto(self.cuenta, f"Comienza en: {math.ceil(self.inicio - ahora)}")
+            else:
+                if not b.captura.activa:
+                    self.lod.append(0.0, b.captura.iniciar(b.nuevo_run(self.n_test)))
+                recs = b.captura.drenar()
+                if len(recs):
+                    self.lod.extend(recs["t"] - b.captura.t0, recs["rpm"])
+                self._texto(self.cuenta, f"Test {self.n_test}: {max(self.fin - ahora, 0):.0f}s")
+                if ahora >= self.fin:
+                    self.run = b.captura.terminar()
+                    self.futuro = taller.analizar(b, self.run) if len(self.run) else None
+                    self.inicio = self.fin = None
+                    self._texto(self.cuenta, "Analizando..." if self.futuro else "Sin datos")
+                    self.boton.config(state="normal")
+                self.live.update(*self.lod.puntos(config.LOD_MAX_PUNTOS))
+
+        if self.futuro is not None and self.futuro.done():
+            fut, self.futuro = self.futuro, None
+            try:
+                res = fut.result()
+            except Exception as e:
+                # el banco no lleva estimador en streaming: el run queda registrado con ceros y el error
+                res = resultado_sin_analisis({}, f"{type(e).__name__}: {e}")
+            historial.registrar(self.run.path, actualizar_meta(self.run.path, resultados=res))
+            self._texto(self.cuenta, "")
+            if res.get("error_analisis"):
+                self._texto(self.resultado, f"T{self.n_test}: error analizando ({res['error_analisis']})")
+                return
+            self._texto(self.resultado,
+                        f"T{self.n_test}: {res['rpm_max']:.0f} RPM · {res['velocidad_max']:.1f} km/h · "
+                        f"comp. {res['torque_corr_max']:.4f} N·m · {res['potencia_corr_max']:.3f} HP")
+
+    def cerrar(self):
+        if self.banco.captura.activa:
+            self.banco.captura.cancelar()
+
+
+class Tablero:
+    def __init__(self, root, bancos):
+        self.root = root
+        self.taller = Taller(bancos).start()
+        self.historial = Historial()
+        root.title(f"Dyno Stand - RC · {len(bancos)} bancos")
+        root.configure(bg=BG)
+
+        filas = tk.Frame(root, bg=BG)
+        filas.pack(fill="x", padx=10, pady=8)
+        fig = Figure(figsize=(10, 1.6 * len(bancos) + 0.6), facecolor=BG)
+        ejes = fig.subplots(len(bancos), 1, sharex=True, squeeze=False)[:, 0]
+        for ax, b in zip(ejes, bancos):
+            ax.set_facecolor(CARD)
+            ax.tick_params(colors=MUTED, labelsize=8)
+            ax.set_ylabel(b.nombre, color=FG)
+            ax.grid(True, alpha=0.15)
+        ejes[-1].set_xlabel("Tiempo (s)", color=MUTED)
+        fig.tight_layout()
+        self.canvas = FigureCanvasTkAgg(fig, master=root)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        self.filas = [_Fila(filas, b, LivePlot(self.canvas, ax, None, b.D, config.TEST_DURATION, ACCENT))
+                      for b, ax in zip(bancos, ejes)]
+        for f in self.filas:
+            f.live.reset()
+        root.protocol("WM_DELETE_WINDOW", self.cerrar)
+        root.after(REFRESCO_MS, self.tick)
+
+    def tick(self):
+        for f in self.filas:
+            f.tick(self.taller, self.historial)
+        self.root.after(REFRESCO_MS, self.tick)
+
+    def cerrar(self):
+        for f in self.filas:
+            f.cerrar()
+        self.taller.stop()
+        self.historial.close()
+        self.root.destroy()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m dyno.tablero", description=__doc__.splitlines()[0])
+    ap.add_argument("--port", action="append", help="repetir para varios bancos (por defecto, config)")
+    ap.add_argument("--baud", type=int, default=config.BAUDIOS)
+    ap.add_argument("--protocolo", default=config.PROTOCOLO, choices=["auto", "ascii", "binario", "flancos"])
+    ap.add_argument("--pulsos", type=int, default=config.PULSOS_POR_VUELTA, help="pulsos por vuelta")
+    ap.add_argument("--espaciado", type=float, nargs="+", default=config.ESPACIADO_IMANES,
+                    help="fracción de vuelta entre imanes, con --protocolo flancos (python -m dyno.pulses)")
+    args = ap.parse_args(argv)
+    if args.port:
+        bancos = [Banco(f"banco{k+1}", p, args.baud, args.protocolo, args.pulsos, args.espaciado)
+                  for k, p in enumerate(args.port)]
+    else:
+        bancos = bancos_desde_config()
+    root = tk.Tk()
+    Tablero(root, bancos)
+    root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
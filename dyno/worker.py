@@ -0,0 +1,200 @@
+"""Análisis de fin de test en un proceso aparte, para que el bucle de Tk no se pare.
+
+    analizador = Analizador().start()
+    fut = analizador.analizar(rec, J=J, D=D, window_s=REG_WINDOW_S, respaldo=modelo)   # Future
+    ...
+    if fut.done():
+        res = fut.result()
+
+El proceso (``python -m dyno.worker``) se arranca una vez y se queda
+esperando. Las muestras no se serializan: se copian a un bloque de
+``multiprocessing.shared_memory`` y por la tubería solo van su nombre, el
+número de muestras y los parámetros, en una línea JSON; la respuesta es el
+resultado (que ya es JSON) en otra. Un hilo del proceso principal lee las
+respuestas y completa los ``Future``. Se arranca con ``subprocess`` y no
+con ``multiprocessing`` porque en Windows ``spawn`` volvería a ejecutar el
+script del dashboard en el hijo.
+
+Si el proceso no arranca o muere, lo pendiente y lo siguiente se analiza
+en un hilo (NumPy suelta el GIL en casi todo el trabajo, pero no en todo).
+"""
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import config
+from .acquisition import SAMPLE_DTYPE
+from .curves import ModeloPerdidas
+from .metrics import METRICAS
+from .session import analizar_muestras, curvas_muestras
+
+OPERACIONES = {"analizar": analizar_muestras, "curvas": curvas_muestras}
+
+
+def _ejecutar(op, rec, params):
+    """``params`` en JSON (los modelos de pérdidas como dict)."""
+    params = dict(params)
+    for k in ("perdidas", "respaldo"):
+        params[k] = ModeloPerdidas.desde_dict(params.get(k))
+    return OPERACIONES[op](rec, **params)
+
+
+def _adjuntar(nombre):
+    """Abre un bloque ya creado sin que el resource_tracker de este proceso lo borre al salir."""
+    try:
+        return shared_memory.SharedMemory(name=nombre, track=False)   # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=nombre)
+        if os.name == "posix":
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class Analizador:
+    """Cola de análisis servida por un proceso persistente; cada petición devuelve un ``Future``."""
+
+    def __init__(self, proceso=config.ANALISIS_PROCESO):
+        self.proceso = proceso
+        self._proc = None
+        self._pendientes = {}     # id -> (Future, SharedMemory, op, params, n, t0)
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._hilo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analisis")
+
+    @property
+    def en_proceso(self):
+        return self._proc is not None
+
+    def start(self):
+        if not self.proceso or self._proc is not None:
+            return self
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (raiz, env.get("PYTHONPATH")) if p)
+        try:
+            self._proc = subprocess.Popen(
+                [sys.executable, "-m", "dyno.worker"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                env=env, text=True, encoding="utf-8", bufsize=1,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        except OSError:
+            self._proc = None
+            return self
+        threading.Thread(target=self._leer, args=(self._proc,), daemon=True).start()
+        return self
+
+    def analizar(self, rec, **params):
+        """``analizar_muestras(rec, **params)`` en el proceso de análisis."""
+        return self._enviar("analizar", rec, params)
+
+    def curvas(self, rec, **params):
+        """``curvas_muestras(rec, **params)`` en el proceso de análisis."""
+        return self._enviar("curvas", rec, params)
+
+    def _enviar(self, op, rec, params):
+        params = {k: v.a_dict() if isinstance(v, ModeloPerdidas) else v for k, v in params.items()}
+        n = len(rec)
+        proc = self._proc
+        if proc is None or n == 0:
+            return self._hilo.submit(_ejecutar, op, rec, params)
+
+        shm = shared_memory.SharedMemory(create=True, size=n * SAMPLE_DTYPE.itemsize)
+        vista = np.ndarray(n, dtype=SAMPLE_DTYPE, buffer=shm.buf)
+        vista["t"] = rec["t"]
+        vista["rpm"] = rec["rpm"]
+        del vista
+        fut = Future()
+        with self._lock:
+            # si el proceso se ha caído desde que se leyó, ``_caido`` ya no vería esta entrada
+            if self._proc is not proc:
+                shm.close()
+                shm.unlink()
+                return self._hilo.submit(_ejecutar, op, rec, params)
+            i = next(self._ids)
+            self._pendientes[i] = (fut, shm, op, params, n, time.perf_counter())
+        try:
+            proc.stdin.write(json.dumps({"id": i, "op": op, "shm": shm.name, "n": n, "params": params}) + "\n")
+            proc.stdin.flush()
+        except (OSError, ValueError):
+            self._caido(proc)
+        return fut
+
+    def _leer(self, proc):
+        for linea in proc.stdout:
+            try:
+                msg = json.loads(linea)
+                i = msg["id"]
+                error = msg["error"] if "error" in msg else None
+                res = msg["res"] if error is None else None
+                with self._lock:
+                    entrada = self._pendientes.pop(i, None)
+            except (ValueError, KeyError, TypeError):
+                proc.kill()     # salida que no es del protocolo: el proceso ya no es fiable
+                break
+            if entrada is None:
+                continue
+            fut, shm, _, _, _, t0 = entrada
+            shm.close()
+            shm.unlink()
+            METRICAS.observar("dyno_analisis_proceso_segundos", time.perf_counter() - t0)
+            if error is not None:
+                fut.set_exception(RuntimeError(error))
+            else:
+                fut.set_result(res)
+        self._caido(proc)
+
+    def _caido(self, proc):
+        """El proceso ha terminado: lo pendiente y lo que venga se hace en el hilo."""
+        with self._lock:
+            if self._proc is not proc:
+                return
+            self._proc = None
+            pendientes, self._pendientes = self._pendientes, {}
+        for fut, shm, op, params, n, _ in pendientes.values():
+            rec = np.ndarray(n, dtype=SAMPLE_DTYPE, buffer=shm.buf).copy()
+            shm.close()
+            shm.unlink()
+            self._hilo.submit(_ejecutar, op, rec, params).add_done_callback(
+                lambda f, fut=fut: fut.set_exception(f.exception()) if f.exception() else fut.set_result(f.result()))
+
+    def stop(self):
+        proc = self._proc
+        if proc is not None:
+            try:
+                proc.stdin.close()      # el proceso sale al ver el fin de su entrada
+                proc.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                proc.kill()
+        self._hilo.shutdown(wait=False)
+
+
+def main():
+    # lo que escriba cualquier librería va a stderr; stdout es solo para las respuestas
+    salida, sys.stdout = sys.stdout, sys.stderr
+    for linea in sys.stdin:
+        msg = json.loads(linea)
+        try:
+            shm = _adjuntar(msg["shm"])
+            try:
+                rec = np.ndarray(msg["n"], dtype=SAMPLE_DTYPE, buffer=shm.buf)
+                res = _ejecutar(msg["op"], rec, msg["params"])
+                del rec
+            finally:
+                shm.close()
+            out = {"id": msg["id"], "res": res}
+        except Exception as e:
+            out = {"id": msg["id"], "error": f"{type(e).__name__}: {e}"}
+        salida.write(json.dumps(out) + "\n")
+        salida.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,52 +3,68 @@ from tkinter import ttk
 import threading
 import time
 import math
-from collections import deque
-import statistics
-import serial
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
 from tkinter import messagebox, filedialog
 import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from dyno.acquisition import SampleRing, SerialReader
+from dyno.analysis import EstimadorTorque, MediasResultados
+from dyno.batch import cargar_curvas
+from dyno.clock import ahora
+from dyno.curves import modelo_ajustado
+from dyno.history import Historial
+from dyno.lod import PiramideMinMax
+from dyno.metrics import METRICAS
+from dyno.overlay import GraficaCurvas, curvas_validas
+from dyno.scheduler import Planificador
+from dyno.segmentation import REPOSO, DetectorTiradas
+from dyno.session import CAMPOS_RESULTADO, Captura, nuevo_run, resultado_sin_analisis
+from dyno.storage import Run, actualizar_meta, listar_runs
+from dyno.worker import Analizador
 
 # ---------------- CONFIG ---------------- #
-PUERTO = "COM7"
-BAUDIOS = 9600
-J = 0.000055776625  # Momento de inercia (kg·m²)
-D = 0.055           # Diámetro del rodillo (m)
-SAMPLE_INTERVAL = 0.05  # s, muestreo durante el test
-TEST_DURATION = 15       # s por test
-REG_WINDOW_S = 0.35      # ventana para regresión (s)
-MIN_SAMPLES_REG = 4      # mínimo de puntos en la ventana para estimar alpha
-NUM_TESTS = 5            # número de tests
+# Los valores del banco están en dyno/config.py (compartidos con el modo headless)
+from dyno.config import (PUERTO, BAUDIOS, PROTOCOLO, PULSOS_POR_VUELTA, J, D, SAMPLE_INTERVAL,
+                         ESPACIADO_IMANES, COMPUTE_INTERVAL, RENDER_INTERVAL,
+                         RING_CAPACITY, TEST_DURATION, COUNTDOWN_S, NUM_TESTS, FILAS_TABLA, LOD_MAX_PUNTOS,
+                         REG_WINDOW_S, MIN_SAMPLES_REG, MEDIAN_WINDOW, RUNS_DIR, MOTOR, ESC)
 # ---------------------------------------- #
 
-# Datos en tiempo real
-rpm_actual = 0.0
+# Datos en tiempo real: el hilo serie escribe cada muestra (t, rpm) en el buffer
+muestras = SampleRing(RING_CAPACITY)
+# muestras del test en curso, analizadas según llegan (mismo resultado que el análisis por lotes)
+captura = Captura(muestras, EstimadorTorque(J, D, REG_WINDOW_S, MIN_SAMPLES_REG, MEDIAN_WINDOW))
+# torque/potencia en vivo fuera de los tests, con el mismo estimador
+vivo = EstimadorTorque(J, D, REG_WINDOW_S, MIN_SAMPLES_REG, MEDIAN_WINDOW)
+cursor_vivo = 0
+VIVO_MAX_MUESTRAS = 2000  # muestras por refresco como mucho; si hay más se salta a las últimas
+lector = SerialReader(PUERTO, BAUDIOS, muestras, PROTOCOLO, PULSOS_POR_VUELTA, ESPACIADO_IMANES)
+# el lector (ASCII línea a línea o tramas binarias por bloques, según PROTOCOLO) arranca antes
+# que la interfaz: las primeras RPM ya están en el buffer cuando aparece la ventana
+threading.Thread(target=lector.run, daemon=True).start()
 rpm_suave = 0.0
 velocidad = 0.0
 torque = 0.0
 potencia_hp = 0.0
 
-omega_anterior = 0.0
-t_anterior = time.time()
-
 # Test state
 test_iniciado = False
-tiempo_restante = 0
-rpm_test = []  # lista de (timestamp, rpm_actual) durante el test
+inicio_test = fin_test = 0.0   # instantes (time.monotonic) de inicio y fin de la captura
 test_results = [None] * NUM_TESTS
-test_samples = [None] * NUM_TESTS   # <-- guardar muestras por test para las gráficas
+test_samples = [None] * NUM_TESTS   # <-- runs grabados en disco (memmap t/rpm) para las gráficas
 current_test_idx = 0
-test_start_time = None
+# último modelo de pérdidas ajustado en una bajada libre: compensa los tests que no la tengan
+perdidas_ref = None
+# el análisis de fin de test va a un proceso aparte; la UI recoge el resultado cuando llega
+analizador = Analizador()
 
-# Datos para plot durante el test
-times_plot = deque()
-rpms_plot = deque(maxlen=500)
+# Modo automático: el detector corta cada tirada del flujo continuo, sin cuenta atrás
+detector = DetectorTiradas()
+cursor_auto = 0
 
-# Locks
-data_lock = threading.Lock()
+# Datos para plot durante el test: pirámide min/max de todo el test (t relativo, rpm)
+plot_lod = PiramideMinMax()
 
 # Mostrar máximos / tabla
 mostrar_maximos = False
@@ -79,6 +95,12 @@ style.configure("Outline.TButton",
                 relief="flat",
                 borderwidth=1)
 style.configure("Muted.TLabel", background=BG, foreground=MUTED, font=("Segoe UI", 10))
+style.configure("Resultados.Treeview", background=CARD, fieldbackground=CARD, foreground=FG,
+                font=("Segoe UI", 11), rowheight=30, borderwidth=0)
+style.configure("Resultados.Treeview.Heading", background=BG, foreground=FG,
+                font=("Segoe UI", 10, "bold"), relief="flat")
+style.configure("Media.Treeview", background="#1f2426", fieldbackground="#1f2426", foreground=FG,
+                font=("Segoe UI", 11, "bold"), rowheight=30, borderwidth=0)
 
 # ---------------- UI LAYOUT (redesign like image) ---------------- #
 # Header
@@ -103,7 +125,7 @@ right_frame.pack(side="right", fill="y")
 readout_frame = tk.Frame(left_frame, bg=CARD, bd=0)
 readout_frame.pack(fill="x", pady=(0,8))
 
-rpm_label = tk.Label(readout_frame, text=f"RPM: {rpm_actual:.0f}", fg=ACCENT, bg=CARD, font=("Segoe UI", 20, "bold"))
+rpm_label = tk.Label(readout_frame, text="RPM: 0", fg=ACCENT, bg=CARD, font=("Segoe UI", 20, "bold"))
 rpm_label.pack(side="left", padx=12, pady=10)
 
 datos_label = tk.Label(readout_frame, text="", fg=FG, bg=CARD, font=("Segoe UI", 11), justify="left")
@@ -120,6 +142,12 @@ circulo = canvas_ind.create_oval(6, 6, 34, 34, fill="#3a3a3a", outline="#3a3a3a"
 cuenta_label = tk.Label(status_frame, text="", fg=MUTED, bg=BG, font=("Segoe UI", 12))
 cuenta_label.pack(side="left", padx=6)
 
+enlace_label = tk.Label(status_frame, text="", fg=MUTED, bg=BG, font=("Segoe UI", 9))
+enlace_label.pack(side="right", padx=6)
+
+frame_label = tk.Label(status_frame, text="", fg=MUTED, bg=BG, font=("Segoe UI", 9))
+frame_label.pack(side="right", padx=6)
+
 # LEFT: gauge + plots area
 left_top = tk.Frame(left_frame, bg=BG)
 left_top.pack(fill="x", expand=False)
@@ -149,31 +177,10 @@ led_lbl.pack(side="left", padx=(6,0))
 plot_card = tk.Frame(left_top, bg=CARD)
 plot_card.pack(side="left", fill="both", expand=True, pady=6)
 
-fig, (ax_line, ax_bar) = plt.subplots(2, 1, figsize=(9.5, 6), sharex=True, gridspec_kw={"height_ratios":[1,0.7]})
-fig.patch.set_facecolor(BG)
-ax_line.set_facecolor(PANEL)
-ax_bar.set_facecolor(PANEL)
-for a in (ax_line, ax_bar):
-    a.tick_params(colors=FG)
-    a.xaxis.label.set_color(FG)
-    a.yaxis.label.set_color(FG)
-    for s in a.spines.values():
-        s.set_color(MUTED)
-
-linea_line, = ax_line.plot([], [], color=ACCENT, linewidth=2)
-ax_line.set_xlim(0, TEST_DURATION)
-ax_line.set_ylim(0, 15000)
-ax_line.set_ylabel("RPM")
-
-# bottom plot: show speed in km/h (convert from RPM when drawing)
-ax_bar.set_xlim(0, TEST_DURATION)
-ax_bar.set_ylim(0, 150)                # default in km/h
-ax_bar.set_ylabel("km/h")
-ax_bar.yaxis.label.set_color(FG)
-ax_bar.set_xlabel("tiempo(s)")
-
-canvas = FigureCanvasTkAgg(fig, master=plot_card)
-canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+# la gráfica se monta cuando matplotlib termina de cargar (construir_grafica); mientras, un aviso
+plot_espera = tk.Label(plot_card, text="Cargando gráfica…", fg=MUTED, bg=CARD, font=("Segoe UI", 10))
+plot_espera.pack(fill="both", expand=True, padx=10, pady=10)
+live = None
 
 # LEFT bottom: metrics card
 metrics_card = tk.Frame(left_bottom, bg=CARD)
@@ -200,6 +207,24 @@ for k, v in labels_info:
 left_extra = tk.Frame(left_bottom, bg=BG)
 left_extra.pack(side="left", fill="both", expand=True, pady=6)
 
+# panel de instrumentación (plegado; al abrirlo se empiezan a medir los tiempos)
+instr_card = tk.Frame(left_extra, bg=CARD)
+instr_card.pack(fill="both", expand=True)
+instr_btn = tk.Button(instr_card, text="▸ Instrumentación", command=lambda: alternar_instrumentacion(),
+                      bg=CARD, fg=FG, bd=0, relief="flat", anchor="w", font=("Segoe UI", 10, "bold"))
+instr_btn.pack(fill="x", padx=6, pady=(4,0))
+instr_cuerpo = tk.Frame(instr_card, bg=CARD)
+instr_texto = tk.Label(instr_cuerpo, text="", fg=MUTED, bg=CARD, font=("Consolas", 8),
+                       justify="left", anchor="nw")
+instr_texto.pack(fill="both", expand=True, padx=6)
+instr_export = tk.Frame(instr_cuerpo, bg=CARD)
+instr_export.pack(anchor="w", padx=6, pady=(2,6))
+ttk.Button(instr_export, text="Exportar JSON", style="Outline.TButton",
+           command=lambda: exportar_metricas(".json")).pack(side="left", padx=(0,6))
+ttk.Button(instr_export, text="Exportar Prometheus", style="Outline.TButton",
+           command=lambda: exportar_metricas(".prom")).pack(side="left")
+METRICAS_CONFIG = METRICAS.activo   # lo que pide config.METRICAS con el panel cerrado
+
 # RIGHT: results table + controls
 tabla_panel = tk.Frame(right_frame, bg=BG)
 tabla_panel.pack(fill="both", expand=False, pady=6, padx=6)
@@ -207,115 +232,88 @@ tabla_panel.pack(fill="both", expand=False, pady=6, padx=6)
 tabla_title = tk.Label(tabla_panel, text="Resultados Tests", fg=FG, bg=BG, font=("Segoe UI", 13, "bold"))
 tabla_title.pack(anchor="w", padx=6, pady=(6,4))
 
-hdr_frame = tk.Frame(tabla_panel, bg=BG)
-hdr_frame.pack(fill="x", padx=6)
-headers = ["Test", "RPM máx", "Vel (km/h)", "Torque (N·m)", "Potencia (HP)"]
-widths = [8,10,12,16,14]
-for j, h in enumerate(headers):
-    lbl = tk.Label(hdr_frame, text=h, fg=FG, bg=BG, font=("Segoe UI", 10, "bold"), width=widths[j], anchor="w")
-    lbl.grid(row=0, column=j, padx=2)
-
-rows_frame = tk.Frame(tabla_panel, bg=BG)
-rows_frame.pack(fill="both", padx=6, pady=(4,6))
-
-test_labels = []
+# Tabla en un Treeview: Tk solo dibuja las filas visibles, así que 200 tests cuestan
+# lo mismo que 5; cada test que termina actualiza su fila y la media, nada más
+COLUMNAS_TABLA = (("rpm_max", "RPM máx", 90, ".0f"), ("velocidad_max", "Vel (km/h)", 95, ".2f"),
+                  ("torque_corr_max", "Torque comp. (N·m)", 140, ".6f"),
+                  ("potencia_corr_max", "Potencia comp. (HP)", 140, ".4f"))
+tabla_cols = ["test"] + [c for c, _, _, _ in COLUMNAS_TABLA]
+
+def crear_tabla(padre, estilo, filas, cabecera):
+    tabla = ttk.Treeview(padre, columns=tabla_cols, show="headings" if cabecera else (),
+                         height=filas, style=estilo, selectmode="none")
+    tabla.heading("test", text="Test")
+    tabla.column("test", width=80, anchor="w")
+    for c, titulo_col, ancho, _ in COLUMNAS_TABLA:
+        tabla.heading(c, text=titulo_col)
+        tabla.column(c, width=ancho, anchor="w")
+    return tabla
+
+tabla_marco = tk.Frame(tabla_panel, bg=BG)
+tabla_marco.pack(fill="both", padx=6, pady=(4,0))
+tabla_tests = crear_tabla(tabla_marco, "Resultados.Treeview", min(NUM_TESTS, FILAS_TABLA), True)
+if NUM_TESTS > FILAS_TABLA:
+    tabla_barra = ttk.Scrollbar(tabla_marco, orient="vertical", command=tabla_tests.yview)
+    tabla_tests.configure(yscrollcommand=tabla_barra.set)
+    tabla_barra.pack(side="right", fill="y")
+tabla_tests.pack(side="left", fill="both", expand=True)
 for i in range(NUM_TESTS):
-    row = tk.Frame(rows_frame, bg=CARD)
-    row.pack(fill="x", pady=4)
-    lbl0 = tk.Label(row, text=f"Test {i+1}", fg=ACCENT, bg=CARD, font=("Segoe UI", 11, "bold"), width=8, anchor="w")
-    lbl0.pack(side="left", padx=6, pady=6)
-    lbl1 = tk.Label(row, text="—", fg=FG, bg=CARD, font=("Segoe UI", 11), width=10, anchor="w")
-    lbl1.pack(side="left", padx=6)
-    lbl2 = tk.Label(row, text="—", fg=FG, bg=CARD, font=("Segoe UI", 11), width=12, anchor="w")
-    lbl2.pack(side="left", padx=6)
-    lbl3 = tk.Label(row, text="—", fg=FG, bg=CARD, font=("Segoe UI", 11), width=16, anchor="w")
-    lbl3.pack(side="left", padx=6)
-    lbl4 = tk.Label(row, text="—", fg=FG, bg=CARD, font=("Segoe UI", 11), width=14, anchor="w")
-    lbl4.pack(side="left", padx=6)
-    test_labels.append((lbl0, lbl1, lbl2, lbl3, lbl4))
-
-# Mean row
-mean_row = tk.Frame(rows_frame, bg="#1f2426")
-mean_row.pack(fill="x", pady=(8,0))
-mean_lbl0 = tk.Label(mean_row, text="Media", fg=FG, bg="#1f2426", font=("Segoe UI", 11, "bold"), width=8, anchor="w")
-mean_lbl0.pack(side="left", padx=6, pady=6)
-mean_lbl1 = tk.Label(mean_row, text="—", fg=FG, bg="#1f2426", font=("Segoe UI", 11), width=10, anchor="w")
-mean_lbl1.pack(side="left", padx=6)
-mean_lbl2 = tk.Label(mean_row, text="—", fg=FG, bg="#1f2426", font=("Segoe UI", 11), width=12, anchor="w")
-mean_lbl2.pack(side="left", padx=6)
-mean_lbl3 = tk.Label(mean_row, text="—", fg=FG, bg="#1f2426", font=("Segoe UI", 11), width=16, anchor="w")
-mean_lbl3.pack(side="left", padx=6)
-mean_lbl4 = tk.Label(mean_row, text="—", fg=FG, bg="#1f2426", font=("Segoe UI", 11), width=14, anchor="w")
-mean_lbl4.pack(side="left", padx=6)
+    tabla_tests.insert("", "end", iid=str(i), values=(f"Test {i+1}",) + ("—",) * len(COLUMNAS_TABLA))
+
+# Mean row: misma rejilla, fija debajo del scroll
+tabla_media = crear_tabla(tabla_panel, "Media.Treeview", 1, False)
+tabla_media.pack(fill="x", padx=6, pady=(6,6))
+tabla_media.insert("", "end", iid="media", values=("Media",) + ("—",) * len(COLUMNAS_TABLA))
+medias_tests = MediasResultados(c for c, _, _, _ in COLUMNAS_TABLA)
 
 # ---------------- AUX ---------------- #
+def formato(v, f):
+    return "…" if v is None else format(v, f)
+
+def analizando(res):
+    return res["potencia_corr_max"] is None
+
+def valores_fila(i):
+    res = test_results[i]
+    if res is None:
+        return (f"Test {i+1}",) + ("—",) * len(COLUMNAS_TABLA)
+    # None = el proceso de análisis aún no ha contestado
+    return (f"Test {i+1}",) + tuple(formato(res[c], f) for c, _, _, f in COLUMNAS_TABLA)
+
+def actualizar_fila(i):
+    """Redibuja solo la fila del test ``i`` (y la lleva a la vista) y la media."""
+    tabla_tests.item(str(i), values=valores_fila(i))
+    tabla_tests.see(str(i))
+    medias_tests.poner(i, test_results[i])
+    actualizar_media()
+
+def actualizar_media():
+    medias = medias_tests.medias()
+    n = len(medias_tests)
+    # hasta completar la tanda, la media es de los tests ya analizados
+    titulo = "Media" if n == NUM_TESTS else f"Media ({n}/{NUM_TESTS})"
+    if medias is None:
+        valores = ("—",) * len(COLUMNAS_TABLA)
+    else:
+        valores = tuple(format(medias[c], f) for c, _, _, f in COLUMNAS_TABLA)
+    tabla_media.item("media", values=(titulo,) + valores)
+
 def update_tests_table():
+    """Rehace la tabla entera y las sumas de la media (al reiniciar)."""
+    medias_tests.reset()
     for i in range(NUM_TESTS):
-        res = test_results[i]
-        lbls = test_labels[i]
-        lbls[0].config(text=f"Test {i+1}")
-        if res is None:
-            lbls[1].config(text="—")
-            lbls[2].config(text="—")
-            lbls[3].config(text="—")
-            lbls[4].config(text="—")
-        else:
-            lbls[1].config(text=f"{res['rpm_max']:.0f}")
-            lbls[2].config(text=f"{res['velocidad_max']:.2f}")
-            lbls[3].config(text=f"{res['torque_max']:.6f}")
-            lbls[4].config(text=f"{res['potencia_max']:.4f}")
-
-    if all(r is not None for r in test_results):
-        rpm_list = [r['rpm_max'] for r in test_results]
-        vel_list = [r['velocidad_max'] for r in test_results]
-        tq_list = [r['torque_max'] for r in test_results]
-        p_list = [r['potencia_max'] for r in test_results]
-        mean_rpm = statistics.mean(rpm_list) if rpm_list else 0.0
-        mean_vel = statistics.mean(vel_list) if vel_list else 0.0
-        mean_tq = statistics.mean(tq_list) if tq_list else 0.0
-        mean_p = statistics.mean(p_list) if p_list else 0.0
-        mean_lbl1.config(text=f"{mean_rpm:.0f}")
-        mean_lbl2.config(text=f"{mean_vel:.2f}")
-        mean_lbl3.config(text=f"{mean_tq:.6f}")
-        mean_lbl4.config(text=f"{mean_p:.4f}")
-    else:
-        mean_lbl1.config(text="—")
-        mean_lbl2.config(text="—")
-        mean_lbl3.config(text="—")
-        mean_lbl4.config(text="—")
-
-def median_filter(values, window=3):
-    if len(values) < 1:
-        return []
-    if window <= 1:
-        return values[:]
-    out = []
-    half = window // 2
-    n = len(values)
-    for i in range(n):
-        start = max(0, i - half)
-        end = min(n, i + half + 1)
-        out.append(statistics.median(values[start:end]))
-    return out
-
-def slope_least_squares(ts, ys):
-    n = len(ts)
-    if n < 2:
-        return 0.0
-    sum_t = sum(ts)
-    sum_y = sum(ys)
-    sum_tt = sum(t*t for t in ts)
-    sum_ty = sum(t*y for t, y in zip(ts, ys))
-    denom = n * sum_tt - sum_t * sum_t
-    if abs(denom) < 1e-12:
-        return 0.0
-    return (n * sum_ty - sum_t * sum_y) / denom
+        tabla_tests.item(str(i), values=valores_fila(i))
+        medias_tests.poner(i, test_results[i])
+    actualizar_media()
 
 def generar_pdf():
     """Genera PDF con la tabla de resultados y por cada test dos gráficas (RPM y km/h)."""
     if not all(r is not None for r in test_results):
         messagebox.showwarning("Aviso", "Los tests no están completados.")
         return
+    if any(analizando(r) for r in test_results):
+        messagebox.showwarning("Aviso", "Aún se están analizando tests; espera a que terminen.")
+        return
 
     filename = filedialog.asksaveasfilename(defaultextension=".pdf",
                                             filetypes=[("PDF files","*.pdf")],
@@ -323,55 +321,29 @@ def generar_pdf():
     if not filename:
         return
 
-    try:
-        with PdfPages(filename) as pdf:
-            # Página 1: tabla resumen
-            fig, ax = plt.subplots(figsize=(8.27, 11.69))  # A4
-            ax.axis('off')
-            headers = ["Test", "RPM máx", "Vel (km/h)", "Torque (N·m)", "Potencia (HP)"]
-            rows = []
-            for i, res in enumerate(test_results):
-                if res is None:
-                    rows.append([f"Test {i+1}", "—", "—", "—", "—"])
-                else:
-                    rows.append([f"Test {i+1}",
-                                 f"{res['rpm_max']:.0f}",
-                                 f"{res['velocidad_max']:.2f}",
-                                 f"{res['torque_max']:.6f}",
-                                 f"{res['potencia_max']:.4f}"])
-            table = ax.table(cellText=rows, colLabels=headers, loc='center', cellLoc='center')
-            table.auto_set_font_size(False)
-            table.set_fontsize(10)
-            table.scale(1, 1.5)
-            ax.set_title("Resultados de Tests", fontsize=14)
-            pdf.savefig(fig, bbox_inches='tight')
-            plt.close(fig)
-
-            # Págs por test: RPM y km/h
-            for i in range(NUM_TESTS):
-                samples = test_samples[i]
-                fig, (a1, a2) = plt.subplots(2, 1, figsize=(8.27, 11.69/1.5))
-                fig.suptitle(f"Test {i+1}", fontsize=12)
-                if samples:
-                    t0 = samples[0][0]
-                    ts = [t - t0 for t, r in samples]
-                    rpms = [r for t, r in samples]
-                    a1.plot(ts, rpms, color=ACCENT)
-                    a1.set_ylabel("RPM")
-                    v_kmh = [(r * math.pi * D * 60) / 1000 for r in rpms]
-                    a2.plot(ts, v_kmh, color="#e07b39")
-                    a2.set_ylabel("km/h")
-                    a2.set_xlabel("Tiempo (s)")
-                    a1.grid(True, alpha=0.2)
-                    a2.grid(True, alpha=0.2)
-                else:
-                    a1.text(0.5, 0.5, "Sin datos", ha='center', va='center')
-                    a2.text(0.5, 0.5, "Sin datos", ha='center', va='center')
-                pdf.savefig(fig, bbox_inches='tight')
-                plt.close(fig)
-        messagebox.showinfo("PDF creado", f"PDF guardado en:\n{filename}")
-    except Exception as e:
-        messagebox.showerror("Error", f"No se pudo crear el PDF:\n{e}")
+    # se genera en un hilo (API OO de matplotlib, sin pyplot); aquí solo se sigue el progreso.
+    # El backend PDF solo se carga si se llega a pedir un informe
+    from dyno.report import TrabajoInforme
+    desc_btn.config(state="disabled")
+    pdf_progress.config(value=0)
+    pdf_progress.pack(anchor="w", pady=(6,0))
+    trabajo = TrabajoInforme(filename, test_results, test_samples, D, ACCENT).start()
+    root.after(100, lambda: vigilar_pdf(trabajo))
+
+def vigilar_pdf(trabajo):
+    if trabajo.total:
+        pdf_progress.config(maximum=trabajo.total, value=trabajo.hechas)
+        set_text(cuenta_label, f"Generando PDF: {trabajo.hechas}/{trabajo.total} páginas")
+    if not trabajo.terminado:
+        root.after(100, lambda: vigilar_pdf(trabajo))
+        return
+    pdf_progress.pack_forget()
+    set_text(cuenta_label, "")
+    desc_btn.config(state="normal")
+    if trabajo.error is not None:
+        messagebox.showerror("Error", f"No se pudo crear el PDF:\n{trabajo.error}")
+    else:
+        messagebox.showinfo("PDF creado", f"PDF guardado en:\n{trabajo.filename}")
 
 # Controls card
 controls_container = tk.Frame(tabla_panel, bg=BG)
@@ -412,6 +384,28 @@ desc_btn = tk.Button(btn_col,
                      state="disabled")
 desc_btn.pack(side="left", padx=(8,0))
 
+curvas_btn = tk.Button(btn_col,
+                       text="Curvas",
+                       command=lambda: abrir_curvas(),
+                       bg=CARD,
+                       fg=FG,
+                       bd=0,
+                       relief="flat",
+                       font=("Segoe UI", 10),
+                       padx=8, pady=6)
+curvas_btn.pack(side="left", padx=(8,0))
+
+hist_btn = tk.Button(btn_col,
+                     text="Historial",
+                     command=lambda: abrir_historial(),
+                     bg=CARD,
+                     fg=FG,
+                     bd=0,
+                     relief="flat",
+                     font=("Segoe UI", 10),
+                     padx=8, pady=6)
+hist_btn.pack(side="left", padx=(8,0))
+
 info_col = tk.Frame(control_card, bg=CARD)
 info_col.pack(side="left", fill="x", expand=True, padx=(12,6), pady=8)
 
@@ -426,243 +420,446 @@ info_text = tk.Label(info_col,
                      wraplength=240)
 info_text.pack(anchor="w", pady=(4,0))
 
+auto_var = tk.BooleanVar(value=False)
+auto_chk = tk.Checkbutton(info_col, text="Detección automática de tiradas", variable=auto_var,
+                          command=lambda: alternar_auto(), fg=MUTED, bg=CARD, selectcolor=CARD,
+                          activebackground=CARD, activeforeground=FG, bd=0, font=("Segoe UI", 9))
+auto_chk.pack(anchor="w", pady=(4,0))
+
+# etiquetas que se guardan con cada run y en el historial
+etiq_row = tk.Frame(info_col, bg=CARD)
+etiq_row.pack(anchor="w", pady=(6,0))
+motor_var = tk.StringVar(value=MOTOR)
+esc_var = tk.StringVar(value=ESC)
+for texto, var in (("Motor", motor_var), ("ESC", esc_var)):
+    tk.Label(etiq_row, text=texto, fg=MUTED, bg=CARD, font=("Segoe UI", 9)).pack(side="left", padx=(0,4))
+    tk.Entry(etiq_row, textvariable=var, width=12, bg=PANEL, fg=FG, insertbackground=FG,
+             relief="flat", font=("Segoe UI", 9)).pack(side="left", padx=(0,8))
+
+def etiquetas():
+    return {"motor": motor_var.get().strip(), "esc": esc_var.get().strip()}
+
+# progreso del PDF (solo visible mientras se genera)
+pdf_progress = ttk.Progressbar(info_col, mode="determinate", length=220)
+
 # compatibility
 test_btn = primary_btn
 reset_btn = secondary_btn
 
 # ---------------- helper: gauge drawing ---------------- #
+# Los elementos del gauge se crean una vez; cada refresco solo cambia el arco
+# de valor, la aguja y el texto, y nada si el valor mostrado no ha cambiado.
+GAUGE_W = GAUGE_H = 240
+GAUGE_R = 90
+gcx, gcy = GAUGE_W//2, GAUGE_H//2
+gauge_canvas.create_oval(gcx-GAUGE_R, gcy-GAUGE_R, gcx+GAUGE_R, gcy+GAUGE_R, fill=CARD, outline="", tags="gauge")
+gauge_canvas.create_arc(gcx-GAUGE_R, gcy-GAUGE_R, gcx+GAUGE_R, gcy+GAUGE_R,
+                        start=150, extent=240, style="arc", width=12, outline="#2f3234", tags="gauge")
+gauge_arco = gauge_canvas.create_arc(gcx-GAUGE_R, gcy-GAUGE_R, gcx+GAUGE_R, gcy+GAUGE_R,
+                                     start=150, extent=0, style="arc", width=12, outline=ACCENT, tags="gauge")
+gauge_aguja = gauge_canvas.create_line(gcx, gcy, gcx, gcy, fill="#ffffff", width=3, tags="gauge")
+gauge_canvas.create_oval(gcx-8, gcy-8, gcx+8, gcy+8, fill="#ffffff", tags="gauge")
+gauge_texto = gauge_canvas.create_text(gcx, gcy+28, text="", fill=FG, font=("Segoe UI", 10, "bold"), tags="gauge")
+gauge_mostrado = None
+
 def draw_gauge(rpm_val):
-    gauge_canvas.delete("gauge")
-    w = 240; h = 240
-    cx, cy = w//2, h//2
-    radius = 90
-    gauge_canvas.create_oval(cx-radius, cy-radius, cx+radius, cy+radius, fill=CARD, outline="", tags="gauge")
-    gauge_canvas.create_arc(cx-radius, cy-radius, cx+radius, cy+radius,
-                            start=150, extent=240, style="arc", width=12, outline="#2f3234", tags="gauge")
+    global gauge_mostrado
+    texto = f"{rpm_val:.0f} RPM"
     perc = min(max(rpm_val / 15000.0, 0.0), 1.0)
-    gauge_canvas.create_arc(cx-radius, cy-radius, cx+radius, cy+radius,
-                            start=150, extent=240*perc, style="arc", width=12, outline=ACCENT, tags="gauge")
     ang = math.radians(150 - 240*perc)
-    nx = cx + int((radius-18) * math.cos(ang))
-    ny = cy - int((radius-18) * math.sin(ang))
-    gauge_canvas.create_line(cx, cy, nx, ny, fill="#ffffff", width=3, tags="gauge")
-    gauge_canvas.create_oval(cx-8, cy-8, cx+8, cy+8, fill="#ffffff", tags="gauge")
-    gauge_canvas.create_text(cx, cy+28, text=f"{rpm_val:.0f} RPM", fill=FG, font=("Segoe UI", 10, "bold"), tags="gauge")
+    nx = gcx + int((GAUGE_R-18) * math.cos(ang))
+    ny = gcy - int((GAUGE_R-18) * math.sin(ang))
+    extent = round(240*perc, 1)
+    if (texto, extent, nx, ny) == gauge_mostrado:
+        return
+    if gauge_mostrado is None or gauge_mostrado[0] != texto:
+        gauge_canvas.itemconfig(gauge_texto, text=texto)
+    if gauge_mostrado is None or gauge_mostrado[1] != extent:
+        gauge_canvas.itemconfig(gauge_arco, extent=extent)
+    if gauge_mostrado is None or gauge_mostrado[2:] != (nx, ny):
+        gauge_canvas.coords(gauge_aguja, gcx, gcy, nx, ny)
+    gauge_mostrado = (texto, extent, nx, ny)
 
 draw_gauge(0.0)
 
-# ---------------- SERIAL ---------------- #
-def leer_datos():
-    global rpm_actual
-    try:
-        with serial.Serial(PUERTO, BAUDIOS, timeout=1) as arduino:
-            print(f"Conectado a {PUERTO}")
-            while True:
-                linea = arduino.readline().decode(errors='ignore').strip()
-                if linea.startswith("RPM:"):
-                    try:
-                        val = float(linea.split(":")[1].strip())
-                        with data_lock:
-                            rpm_actual = val
-                    except:
-                        pass
-    except serial.SerialException:
-        print(f"No se pudo abrir {PUERTO}")
-
-# ---------------- ACTUALIZAR ---------------- #
-def actualizar():
-    global rpm_suave, velocidad, torque, potencia_hp, omega_anterior, t_anterior
+# ---------------- helper: textos ---------------- #
+textos_mostrados = {}
+
+def set_text(widget, texto):
+    """Cambia el texto del widget solo si es distinto del que ya muestra."""
+    if textos_mostrados.get(widget) != texto:
+        textos_mostrados[widget] = texto
+        widget.config(text=texto)
+
+# ---------------- CURVAS ---------------- #
+# ventana con potencia/torque frente a RPM de los tests y de runs del archivo (se crea al abrirla)
+curvas_win = None
+grafica_curvas = None
+curvas_canvas = None
+curvas_info = None
+curvas_archivo = []            # curvas de runs cargados del archivo, para comparar
+carga_pool = ThreadPoolExecutor(max_workers=1)
+
+def abrir_curvas():
+    global curvas_win, grafica_curvas, curvas_canvas, curvas_info
+    if curvas_win is not None and curvas_win.winfo_exists():
+        curvas_win.lift()
+        refrescar_curvas()
+        return
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from matplotlib.figure import Figure
+    curvas_win = tk.Toplevel(root)
+    curvas_win.title("Curvas de potencia y torque")
+    curvas_win.geometry("760x680")
+    curvas_win.configure(bg=BG)
+    barra = tk.Frame(curvas_win, bg=BG)
+    barra.pack(fill="x", padx=10, pady=(8,0))
+    ttk.Button(barra, text="Añadir runs…", style="Outline.TButton",
+               command=lambda: cargar_runs_curvas()).pack(side="left", padx=(0,6))
+    ttk.Button(barra, text="Quitar runs", style="Outline.TButton",
+               command=lambda: quitar_runs_curvas()).pack(side="left")
+    curvas_info = tk.Label(barra, text="", fg=MUTED, bg=BG, font=("Segoe UI", 9))
+    curvas_info.pack(side="left", padx=10)
+    fig_curvas = Figure(figsize=(7.5, 6))
+    fig_curvas.patch.set_facecolor(BG)
+    grafica_curvas = GraficaCurvas(fig_curvas, ACCENT)
+    for a in grafica_curvas.ejes:
+        a.set_facecolor(PANEL)
+        a.tick_params(colors=FG)
+        a.xaxis.label.set_color(FG)
+        a.yaxis.label.set_color(FG)
+        for sp in a.spines.values():
+            sp.set_color(MUTED)
+    curvas_canvas = FigureCanvasTkAgg(fig_curvas, master=curvas_win)
+    curvas_canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+    refrescar_curvas()
+
+def refrescar_curvas():
+    """Vuelve a dibujar las curvas si la ventana está abierta."""
+    if curvas_win is None or not curvas_win.winfo_exists():
+        return
+    curvas, etiquetas = curvas_validas(test_results)
+    grafica_curvas.rellenar(curvas + curvas_archivo, etiquetas + [None] * len(curvas_archivo))
+    set_text(curvas_info, f"{len(curvas)} tests · {len(curvas_archivo)} runs del archivo")
+    curvas_canvas.draw_idle()
+
+def cargar_runs_curvas():
+    directorio = filedialog.askdirectory(title="Carpeta de runs", initialdir=RUNS_DIR)
+    if not directorio:
+        return
+    paths = listar_runs(directorio)
+    set_text(curvas_info, f"Cargando {len(paths)} runs…")
+    # leer cientos de meta.json (o recalcular los runs sin curvas) fuera del hilo de la UI
+    futuro = carga_pool.submit(cargar_curvas, paths)
+    root.after(100, lambda: vigilar_carga_curvas(futuro))
+
+def vigilar_carga_curvas(futuro):
+    if not futuro.done():
+        root.after(100, lambda: vigilar_carga_curvas(futuro))
+        return
+    curvas_archivo.extend(futuro.result())
+    refrescar_curvas()
+
+def quitar_runs_curvas():
+    curvas_archivo.clear()
+    refrescar_curvas()
+
+# ---------------- HISTORIAL ---------------- #
+# todos los tests hechos, en SQLite (dyno/history.py); la ventana los carga por páginas
+# según se baja en la tabla, así que da igual que haya cien o cien mil
+historial = Historial()
+hist_win = None
+hist_tabla = None
+hist_info = None
+hist_motor = None
+hist_periodo = None
+hist_orden = None
+hist_cursor = None
+HIST_PAGINA = 100
+HIST_COLUMNAS = (("creado", "Fecha", 140), ("motor", "Motor", 90), ("esc", "ESC", 90),
+                 ("banco", "Banco", 60), ("rpm_max", "RPM máx", 70), ("velocidad_max", "km/h", 60),
+                 ("torque_corr_max", "Torque (N·m)", 90), ("potencia_corr_max", "Potencia (HP)", 90))
+HIST_ORDEN = {"Fecha": "creado", "Potencia": "potencia_corr_max", "Torque": "torque_corr_max",
+              "RPM": "rpm_max"}
+HIST_PERIODOS = {
+    "Todo": lambda: None,
+    "Hoy": lambda: time.strftime("%Y-%m-%d"),
+    "Últimos 7 días": lambda: time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(time.time() - 7 * 86400)),
+    "Este mes": lambda: time.strftime("%Y-%m"),
+}
+
+def abrir_historial():
+    global hist_win, hist_tabla, hist_info, hist_motor, hist_periodo, hist_orden
+    if hist_win is not None and hist_win.winfo_exists():
+        hist_win.lift()
+        recargar_historial()
+        return
+    hist_win = tk.Toplevel(root)
+    hist_win.title("Historial de tests")
+    hist_win.geometry("820x560")
+    hist_win.configure(bg=BG)
+    barra = tk.Frame(hist_win, bg=BG)
+    barra.pack(fill="x", padx=10, pady=(8,0))
+    hist_motor = tk.StringVar(value="Todos")
+    hist_periodo = tk.StringVar(value="Este mes")
+    hist_orden = tk.StringVar(value="Fecha")
+    for texto, var, valores, ancho in (("Motor", hist_motor, ["Todos"] + historial.valores("motor"), 14),
+                                       ("Periodo", hist_periodo, list(HIST_PERIODOS), 12),
+                                       ("Orden", hist_orden, list(HIST_ORDEN), 9)):
+        tk.Label(barra, text=texto, fg=MUTED, bg=BG, font=("Segoe UI", 9)).pack(side="left", padx=(0,4))
+        cb = ttk.Combobox(barra, textvariable=var, values=valores, width=ancho, state="readonly")
+        cb.pack(side="left", padx=(0,10))
+        cb.bind("<<ComboboxSelected>>", lambda e: recargar_historial())
+    hist_info = tk.Label(hist_win, text="", fg=MUTED, bg=BG, font=("Segoe UI", 9), anchor="w", justify="left")
+    hist_info.pack(fill="x", padx=10, pady=(6,0))
+    marco = tk.Frame(hist_win, bg=BG)
+    marco.pack(fill="both", expand=True, padx=10, pady=10)
+    hist_tabla = ttk.Treeview(marco, columns=[c for c, _, _ in HIST_COLUMNAS], show="headings")
+    for c, titulo_col, ancho in HIST_COLUMNAS:
+        hist_tabla.heading(c, text=titulo_col)
+        hist_tabla.column(c, width=ancho, anchor="w" if c in ("creado", "motor", "esc", "banco") else "e")
+    barra_v = ttk.Scrollbar(marco, orient="vertical", command=hist_tabla.yview)
+    # al acercarse al final de lo cargado se pide la página siguiente
+    def desplazar(primero, ultimo):
+        barra_v.set(primero, ultimo)
+        if float(ultimo) > 0.95 and hist_cursor is not None:
+            cargar_pagina_historial()
+    hist_tabla.configure(yscrollcommand=desplazar)
+    barra_v.pack(side="right", fill="y")
+    hist_tabla.pack(side="left", fill="both", expand=True)
+    recargar_historial()
+
+def filtros_historial():
+    motor = hist_motor.get()
+    return {"motor": None if motor == "Todos" else motor, "desde": HIST_PERIODOS[hist_periodo.get()]()}
+
+def recargar_historial():
+    """Vacía la tabla y carga la primera página con los filtros de la ventana (si está abierta)."""
+    global hist_cursor
+    if hist_win is None or not hist_win.winfo_exists():
+        return
+    hist_tabla.delete(*hist_tabla.get_children())
+    hist_cursor = None
+    cargar_pagina_historial()
+    medias = historial.media_por("esc", "potencia_corr_max", **filtros_historial())
+    set_text(hist_info, "Potencia media por ESC: " + (" · ".join(
+        f"{esc or '(sin ESC)'} {media:.4f} HP ({n})" for esc, media, _, n in medias[:6] if n) or "—"))
+
+def cargar_pagina_historial():
+    global hist_cursor
+    filas, hist_cursor = historial.pagina(HIST_ORDEN[hist_orden.get()], limite=HIST_PAGINA,
+                                          despues=hist_cursor, **filtros_historial())
+    for r in filas:
+        hist_tabla.insert("", "end", values=(
+            r["creado"].replace("T", " "), r["motor"] or "", r["esc"] or "", r["banco"] or "",
+            formato(r["rpm_max"], ".0f"), formato(r["velocidad_max"], ".2f"),
+            formato(r["torque_corr_max"], ".6f"), formato(r["potencia_corr_max"], ".4f")))
+
+# ---------------- INSTRUMENTACIÓN ---------------- #
+def alternar_instrumentacion():
+    if instr_cuerpo.winfo_ismapped():
+        instr_cuerpo.pack_forget()
+        instr_btn.config(text="▸ Instrumentación")
+        METRICAS.activo = METRICAS_CONFIG
+        plan.pausar("instrumentacion")
+    else:
+        instr_cuerpo.pack(fill="both", expand=True)
+        instr_btn.config(text="▾ Instrumentación")
+        METRICAS.activo = True
+        plan.activar("instrumentacion")
 
-    with data_lock:
-        r_actual = rpm_actual
+def refrescar_instrumentacion():
+    set_text(instr_texto, METRICAS.resumen())
 
-    rpm_suave = (rpm_suave * 0.3) + (r_actual * 0.7)
+def exportar_metricas(ext):
+    tipos = [("JSON", "*.json")] if ext == ".json" else [("Prometheus", "*.prom")]
+    filename = filedialog.asksaveasfilename(defaultextension=ext, filetypes=tipos,
+                                            initialfile=f"dyno_metricas{ext}")
+    if filename:
+        METRICAS.guardar(filename)
 
-    omega = (2 * math.pi * rpm_suave) / 60
-    tiempo_actual = time.time()
+# ---------------- SERIAL ---------------- #
+def rpm_actual():
+    s = muestras.latest()
+    return float(s["rpm"]) if s is not None else 0.0
 
-    delta_t = tiempo_actual - t_anterior
-    if delta_t > 0:
-        alpha = (omega - omega_anterior) / delta_t
-        torque = J * alpha
-    else:
-        torque = 0.0
+# ---------------- CÁLCULO EN VIVO ---------------- #
+def calcular():
+    global rpm_suave, velocidad, torque, potencia_hp, cursor_vivo
+
+    r_actual = rpm_actual()
 
-    omega_anterior = omega
-    t_anterior = tiempo_actual
+    rpm_suave = (rpm_suave * 0.3) + (r_actual * 0.7)
 
-    potencia_hp = (torque * omega) / 745.7
+    # torque/potencia: regresión por ventana sobre los tiempos de las muestras;
+    # durante el test, la misma que dará el resultado final
+    if test_iniciado and captura.activa:
+        est = captura.estimador
+    else:
+        est = vivo
+        recs, cursor_vivo = muestras.read(max(cursor_vivo, muestras.head - VIVO_MAX_MUESTRAS))
+        vivo.extend(recs["t"], recs["rpm"])
+    torque = est.torque
+    potencia_hp = est.potencia
     velocidad = (rpm_suave * math.pi * D * 60) / 1000
 
-    rpm_label.config(text=f"RPM: {rpm_suave:,.0f}")
+# ---------------- ACTUALIZAR (render) ---------------- #
+def actualizar():
+    est = captura.estimador if test_iniciado and captura.activa else vivo
+    set_text(rpm_label, f"RPM: {rpm_suave:,.0f}")
     draw_gauge(rpm_suave)
+    set_text(enlace_label, lector.estado())
 
     if test_iniciado:
-        datos_label.config(text=f"Velocidad: {velocidad:,.2f} km/h\nTest actual: {current_test_idx+1}/{NUM_TESTS}")
+        set_text(datos_label,
+                 f"Velocidad: {velocidad:,.2f} km/h\nTest actual: {current_test_idx+1}/{NUM_TESTS}\n"
+                 f"Torque: {torque:.6f} N·m (máx {est.torque_max:.6f})\n"
+                 f"Potencia: {potencia_hp:.4f} HP (máx {est.potencia_max:.4f})")
     elif mostrar_maximos:
-        datos_label.config(
-            text=f"Vel (último test): {velocidad:.2f} km/h\n"
+        set_text(datos_label,
+                 f"Vel (último test): {velocidad:.2f} km/h\n"
                  f"Torque (último): {torque:.6f} N·m\n"
-                 f"Potencia (último): {potencia_hp:.4f} HP"
-        )
+                 f"Potencia (último): {potencia_hp:.4f} HP")
     else:
-        datos_label.config(
-            text=f"Velocidad: {velocidad:,.2f} km/h\n"
+        set_text(datos_label,
+                 f"Velocidad: {velocidad:,.2f} km/h\n"
                  f"Torque: {torque:.6f} N·m\n"
-                 f"Potencia: {potencia_hp:.4f} HP"
-        )
-
-    # actualizar plots
-    if test_iniciado and test_start_time is not None and times_plot:
-        max_r = max(rpms_plot) if rpms_plot else 15000
-        ax_line.set_ylim(0, max(2000, max_r * 1.1))
-        xs = [min(max(0.0, x), TEST_DURATION) for x in times_plot]
-        linea_line.set_data(xs, list(rpms_plot))
-        ax_line.set_xlim(0, TEST_DURATION)
-
-        # bottom: convert RPM -> km/h for display
-        ax_bar.clear()
-        ax_bar.set_facecolor(PANEL)
-        ax_bar.tick_params(colors=FG)
-        for s in ax_bar.spines.values():
+                 f"Potencia: {potencia_hp:.4f} HP")
+
+    # actualizar plots (solo cambian los datos de los artistas)
+    if live is None:
+        return
+    live.update(*plot_lod.puntos(LOD_MAX_PUNTOS))
+    st = plan.bucles["render"].estadisticas()
+    set_text(frame_label, f"render: {live.frame_ms:.1f} ms · p99 {st['p99_ms']:.0f} ms · "
+                          f"descartados {st['descartados']}")
+
+# ---------------- GRÁFICA (carga diferida) ---------------- #
+# importar matplotlib y su backend de Tk cuesta más que todo lo demás junto: se hace en un
+# hilo con la ventana ya en pantalla, y la figura se monta después en el hilo de Tk
+def importar_graficas():
+    import matplotlib.backends.backend_tkagg  # noqa: F401
+    import matplotlib.figure  # noqa: F401
+    import dyno.render  # noqa: F401
+
+def construir_grafica(futuro):
+    global live
+    if not futuro.done():
+        root.after(50, lambda: construir_grafica(futuro))
+        return
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from matplotlib.figure import Figure
+    from dyno.render import LivePlot
+    fig = Figure(figsize=(9.5, 6))
+    ax_line, ax_bar = fig.subplots(2, 1, sharex=True, gridspec_kw={"height_ratios":[1,0.7]})
+    fig.patch.set_facecolor(BG)
+    ax_line.set_facecolor(PANEL)
+    ax_bar.set_facecolor(PANEL)
+    for a in (ax_line, ax_bar):
+        a.tick_params(colors=FG)
+        a.xaxis.label.set_color(FG)
+        a.yaxis.label.set_color(FG)
+        for s in a.spines.values():
             s.set_color(MUTED)
-        ax_bar.set_xlim(0, TEST_DURATION)
-        # convert max rpm to km/h for y limits
-        max_v_kmh = (max_r * math.pi * D * 60) / 1000 if max_r else 150.0
-        ax_bar.set_ylim(0, max(20, max_v_kmh * 1.1))
-        ax_bar.set_ylabel("km/h")
-        ax_bar.yaxis.label.set_color(FG)
-        if times_plot and rpms_plot:
-            vals_kmh = [ (r * math.pi * D * 60) / 1000 for r in rpms_plot ]
-            ax_bar.bar(xs, vals_kmh, width=0.08, color=ACCENT, alpha=0.9)
-        canvas.draw()
-    else:
-        ax_line.set_xlim(0, TEST_DURATION)
-        if not rpms_plot:
-            ax_line.set_ylim(0, 15000)
-            linea_line.set_data([], [])
-            ax_bar.clear()
-            ax_bar.set_facecolor(PANEL)
-            ax_bar.set_xlim(0, TEST_DURATION)
-            ax_bar.set_ylim(0, 150)    # default km/h when empty
-            ax_bar.set_ylabel("km/h")
-            ax_bar.yaxis.label.set_color(FG)
-        else:
-            max_r = max(rpms_plot)
-            ax_line.set_ylim(0, max(2000, max_r * 1.1))
-            linea_line.set_data(list(times_plot), list(rpms_plot))
-            ax_bar.clear()
-            ax_bar.set_facecolor(PANEL)
-            ax_bar.set_xlim(0, TEST_DURATION)
-            # convert to km/h for limits and bars
-            max_v_kmh = (max_r * math.pi * D * 60) / 1000
-            ax_bar.set_ylim(0, max(20, max_v_kmh * 1.1))
-            ax_bar.set_ylabel("km/h")
-            ax_bar.yaxis.label.set_color(FG)
-            if times_plot and rpms_plot:
-                vals_kmh = [ (r * math.pi * D * 60) / 1000 for r in rpms_plot ]
-                ax_bar.bar(list(times_plot), vals_kmh, width=0.08, color=ACCENT, alpha=0.9)
-        canvas.draw()
-
-    root.after(100, actualizar)
+
+    ax_line.set_xlim(0, TEST_DURATION)
+    ax_line.set_ylim(0, 15000)
+    ax_line.set_ylabel("RPM")
+
+    # bottom plot: show speed in km/h (convert from RPM when drawing)
+    ax_bar.set_xlim(0, TEST_DURATION)
+    ax_bar.set_ylim(0, 150)                # default in km/h
+    ax_bar.set_ylabel("km/h")
+    ax_bar.yaxis.label.set_color(FG)
+    ax_bar.set_xlabel("tiempo(s)")
+
+    plot_espera.destroy()
+    canvas = FigureCanvasTkAgg(fig, master=plot_card)
+    canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+
+    # línea RPM + barras km/h: artistas persistentes, actualizados con blitting
+    live = LivePlot(canvas, ax_line, ax_bar, D, TEST_DURATION, ACCENT)
+
+def reiniciar_grafica():
+    if live is not None:
+        live.reset()
+
+def arranque_diferido():
+    """Lo que no hace falta para ver las RPM: gráfica y proceso de análisis."""
+    construir_grafica(carga_pool.submit(importar_graficas))
+    analizador.start()
 
 # ---------------- TEST (muestreo y cálculo) ---------------- #
 def iniciar_test():
-    global test_iniciado, rpm_test, tiempo_restante, mostrar_maximos, current_test_idx, times_plot, rpms_plot
+    global test_iniciado, inicio_test, fin_test, mostrar_maximos, current_test_idx
     if test_iniciado:
         return
     if current_test_idx >= NUM_TESTS:
         return
     test_iniciado = True
-    rpm_test = []
-    tiempo_restante = TEST_DURATION
+    # plazos con reloj monotónico: la cuenta atrás y la duración no derivan con los after
+    inicio_test = time.monotonic() + COUNTDOWN_S
+    fin_test = inicio_test + TEST_DURATION
     mostrar_maximos = False
     canvas_ind.itemconfig(circulo, fill="#0b6e4f")
-    times_plot.clear()
-    rpms_plot.clear()
-    linea_line.set_data([], [])
-    ax_line.set_xlim(0, TEST_DURATION)
-    ax_line.set_ylim(0, 15000)
-    ax_bar.clear()
-    ax_bar.set_xlim(0, TEST_DURATION)
-    ax_bar.set_ylim(0, 150)   # reset bottom plot to km/h range
-    ax_bar.set_ylabel("km/h")
-    ax_bar.yaxis.label.set_color(FG)
-    canvas.draw()
-    cuenta_atras_inicial(3)
-
-def cuenta_atras_inicial(segundos):
-    global test_start_time
-    if segundos > 0:
-        cuenta_label.config(text=f"Comienza en: {segundos}")
-        root.after(1000, lambda: cuenta_atras_inicial(segundos-1))
-    else:
-        test_start_time = time.time()
-        with data_lock:
-            r0 = rpm_actual if rpm_actual is not None else 0.0
-        times_plot.append(0.0)
-        rpms_plot.append(r0)
-        rpm_test.append((test_start_time, r0))
-        cuenta_label.config(text="¡Acelera!")
-        root.after(0, sample_test)
-        root.after(0, cuenta_test)
-
-def cuenta_test():
-    global tiempo_restante
-    if tiempo_restante > 0:
-        cuenta_label.config(text=f"Tiempo restante: {tiempo_restante}s")
-        tiempo_restante -= 1
-        root.after(1000, cuenta_test)
-    else:
-        finalizar_test()
+    plot_lod.clear()
+    reiniciar_grafica()
+    plan.activar("muestreo")
 
 def sample_test():
-    global rpm_test, times_plot, rpms_plot
-    if not test_iniciado or test_start_time is None:
+    """Bucle de muestreo: cuenta atrás, captura y fin del test por plazos."""
+    if not test_iniciado:
+        plan.pausar("muestreo")
         return
-    t = time.time()
-    with data_lock:
-        r = rpm_actual
-    if r is not None and r > 0.5:
-        rpm_test.append((t, r))
-        rel_t = t - test_start_time
-        if rel_t < 0:
-            rel_t = 0.0
-        if rel_t > TEST_DURATION:
-            rel_t = TEST_DURATION
-        if rel_t <= TEST_DURATION:
-            times_plot.append(rel_t)
-            rpms_plot.append(r)
-    root.after(int(SAMPLE_INTERVAL * 1000), sample_test)
+    ahora = time.monotonic()
+    if ahora < inicio_test:
+        set_text(cuenta_label, f"Comienza en: {math.ceil(inicio_test - ahora)}")
+        return
+    if not captura.activa:
+        # cada test se graba en RUNS_DIR mientras se captura
+        r0 = captura.iniciar(nuevo_run(current_test_idx + 1, lector, **etiquetas()))
+        plot_lod.append(0.0, r0)
+    drenar_muestras()
+    if ahora >= fin_test:
+        finalizar_test()
+    else:
+        set_text(cuenta_label, f"Tiempo restante: {math.ceil(fin_test - ahora)}s")
+
+def drenar_muestras():
+    """Pasa al test en curso, en lote, las muestras llegadas desde el último drenado."""
+    recs = captura.drenar()
+    if len(recs) == 0:
+        return
+    rel_t = np.clip(recs["t"] - captura.t0, 0.0, TEST_DURATION)
+    plot_lod.extend(rel_t, recs["rpm"])
 
 def finalizar_test():
-    global test_iniciado, rpm_test, test_results, mostrar_maximos, current_test_idx, test_start_time, test_samples
+    global test_iniciado, test_results, mostrar_maximos, current_test_idx, test_samples
+    plan.pausar("muestreo")
+    if captura.activa:
+        drenar_muestras()
     # guardar muestras del test actual (aunque esté vacío)
-    try:
-        test_samples[current_test_idx] = rpm_test.copy()
-    except Exception:
-        test_samples[current_test_idx] = rpm_test[:]
+    rec = captura.terminar()
+    test_samples[current_test_idx] = rec
 
     test_iniciado = False
     canvas_ind.itemconfig(circulo, fill="#3a3a3a")
 
-    rpm_max_test = 0.0
-    velocidad_max_test = 0.0
-    torque_max_test = 0.0
-    potencia_max_test = 0.0
-
-    if not rpm_test:
+    if len(rec) == 0:
         test_results[current_test_idx] = {
-            "rpm_max": rpm_max_test,
-            "velocidad_max": velocidad_max_test,
-            "torque_max": torque_max_test,
-            "potencia_max": potencia_max_test,
+            "rpm_max": 0.0,
+            "velocidad_max": 0.0,
+            "torque_max": 0.0,
+            "potencia_max": 0.0,
+            "torque_corr_max": 0.0,
+            "potencia_corr_max": 0.0,
+            "rpm_potencia_max": 0.0,
+            "curvas": None,
         }
-        update_tests_table()
+        actualizar_fila(current_test_idx)
         current_test_idx += 1
         mostrar_maximos = True
-        cuenta_label.config(text="")
-        test_start_time = None
+        set_text(cuenta_label, "")
         # limpiar resumen si no hay datos
         metric_widgets["km/h"].config(text="--")
         metric_widgets["km/h-max"].config(text="--")
@@ -675,51 +872,27 @@ def finalizar_test():
             test_btn.config(text="Tests completados", state="disabled")
         return
 
-    tiempos_lst = [t for t, r in rpm_test]
-    rpms_vals = [r for t, r in rpm_test]
-
-    rpm_max_test = max(rpms_vals) if rpms_vals else 0.0
-    velocidad_max_test = (rpm_max_test * math.pi * D * 60) / 1000 if rpm_max_test else 0.0
-
-    # Filtrado mediano ligero
-    rpms_filtered = median_filter(rpms_vals, window=3)
-    omegas = [(2 * math.pi * r) / 60 for r in rpms_filtered]
-
-    torques = []
-    potencias = []
-
-    n = len(omegas)
-    for i in range(n):
-        ti = tiempos_lst[i]
-        j0 = i
-        while j0 > 0 and (ti - tiempos_lst[j0 - 1]) <= REG_WINDOW_S:
-            j0 -= 1
-        rec_ts = [t - tiempos_lst[j0] for t in tiempos_lst[j0:i+1]]
-        window_omegas = omegas[j0:i+1]
-        if len(rec_ts) >= MIN_SAMPLES_REG:
-            alpha = slope_least_squares(rec_ts, window_omegas)
-            total_dt = tiempos_lst[i] - tiempos_lst[j0]
-            if total_dt > 0 and total_dt <= REG_WINDOW_S:
-                torque_inst = J * alpha
-                potencia_inst = (torque_inst * window_omegas[-1]) / 745.7
-                torques.append(torque_inst)
-                potencias.append(potencia_inst)
-
-    torque_max_test = max((abs(t) for t in torques), default=0.0)
-    potencia_max_test = max((abs(p) for p in potencias), default=0.0)
-
-    test_results[current_test_idx] = {
-        "rpm_max": rpm_max_test,
-        "velocidad_max": velocidad_max_test,
-        "torque_max": torque_max_test,
-        "potencia_max": potencia_max_test,
-    }
-    update_tests_table()
+    # calculado durante el test (mediana + regresión por ventana, igual que analizar_muestras);
+    # las curvas con las pérdidas de la bajada compensadas necesitan el test completo y se
+    # calculan en el proceso de análisis sin parar la interfaz
+    idx = current_test_idx
+    futuro = analizador.curvas(rec, J=J, window_s=REG_WINDOW_S, min_samples=MIN_SAMPLES_REG,
+                               filter_window=MEDIAN_WINDOW, respaldo=perdidas_ref)
+    guardar_resultado(captura.resultado)
+    esperar_analisis(idx, rec, captura.resultado, futuro)
+
+def guardar_resultado(res):
+    """Apunta el resultado del test actual en la tabla y pasa al siguiente.
+
+    Lo que falte en ``res`` queda a None hasta que llegue el análisis (``completar_resultado``).
+    """
+    global test_results, mostrar_maximos, current_test_idx
+    test_results[current_test_idx] = {k: res.get(k) for k in CAMPOS_RESULTADO}
+    actualizar_fila(current_test_idx)
 
     current_test_idx += 1
     mostrar_maximos = True
-    cuenta_label.config(text="")
-    test_start_time = None
+    set_text(cuenta_label, "")
 
     # si ya se completaron todos los tests, habilitar botón PDF
     if current_test_idx >= NUM_TESTS:
@@ -731,32 +904,121 @@ def finalizar_test():
     else:
         test_btn.config(text=f"Iniciar Test {current_test_idx+1}")
 
+def esperar_analisis(idx, rec, res, futuro):
+    """Completa el test ``idx`` con el resultado del proceso de análisis cuando llegue."""
+    if not futuro.done():
+        root.after(50, lambda: esperar_analisis(idx, rec, res, futuro))
+        return
+    try:
+        res = dict(res, **futuro.result())
+    except Exception as e:
+        # sin curvas: el test se queda con lo medido en streaming para no bloquear la sesión
+        res = resultado_sin_analisis(res, f"{type(e).__name__}: {e}")
+    completar_resultado(idx, rec, res)
+    if res.get("error_analisis"):
+        set_text(cuenta_label, f"Error analizando el test {idx+1}: {res['error_analisis']}")
+
+def completar_resultado(idx, rec, res):
+    global perdidas_ref
+    if test_samples[idx] is not rec:     # reset (u otro test en su sitio) mientras se analizaba
+        return
+    historial.registrar(rec.path, actualizar_meta(rec.path, resultados=res))
+    test_results[idx] = {k: res[k] for k in CAMPOS_RESULTADO}
+    perdidas_ref = modelo_ajustado(res) or perdidas_ref
+    actualizar_fila(idx)
+    refrescar_curvas()
+    recargar_historial()
+    metric_widgets["km/h-max"].config(text=f"{res['velocidad_max']:.2f}")
+    metric_widgets["HP"].config(text=f"{res['potencia_corr_max']:.4f} @ {res['rpm_potencia_max']:.0f} RPM")
+    metric_widgets["Torque N·m"].config(text=f"{res['torque_corr_max']:.6f}")
+
+# ---------------- MODO AUTOMÁTICO ---------------- #
+def alternar_auto():
+    global cursor_auto
+    if auto_var.get():
+        if test_iniciado or current_test_idx >= NUM_TESTS:
+            auto_var.set(False)
+            return
+        detector.reset()
+        cursor_auto = muestras.head
+        test_btn.config(state="disabled")
+        plot_lod.clear()
+        reiniciar_grafica()
+        plan.activar("auto")
+    else:
+        plan.pausar("auto")
+        detector.reset()
+        canvas_ind.itemconfig(circulo, fill="#3a3a3a")
+        set_text(cuenta_label, "")
+        if current_test_idx < NUM_TESTS:
+            test_btn.config(state="normal")
+
+def muestrear_auto():
+    """Bucle del modo automático: pasa el flujo al detector y guarda cada tirada que cierra."""
+    global cursor_auto
+    recs, cursor_auto = muestras.read(cursor_auto)
+    antes = detector.estado
+    tiradas = detector.extend(recs["t"], recs["rpm"]) + detector.silencio(ahora())
+    for tir in tiradas:
+        registrar_tirada(tir)
+        if current_test_idx >= NUM_TESTS:
+            auto_var.set(False)
+            alternar_auto()
+            return
+
+    if detector.estado == REPOSO:
+        canvas_ind.itemconfig(circulo, fill="#3a3a3a")
+        set_text(cuenta_label, f"Automático: esperando tirada {current_test_idx+1}…")
+        return
+    if antes == REPOSO or tiradas:
+        # acaba de arrancar una tirada: la gráfica empieza en su inicio
+        canvas_ind.itemconfig(circulo, fill="#0b6e4f")
+        plot_lod.clear()
+        reiniciar_grafica()
+        recs = detector.actual()
+    recs = recs[recs["t"] >= detector.t_inicio]
+    plot_lod.extend(np.clip(recs["t"] - detector.t_inicio, 0.0, TEST_DURATION), recs["rpm"])
+    set_text(cuenta_label, f"Tirada {current_test_idx+1}: {detector.estado} · "
+                           f"pico {detector.rpm_pico:,.0f} RPM")
+
+def registrar_tirada(tir):
+    """Graba la tirada como un run más, la analiza y la apunta como el test siguiente."""
+    writer = nuevo_run(current_test_idx + 1, lector, automatico=True, motivo_fin=tir.motivo,
+                       t_inicio=tir.t_inicio, t_pico=tir.t_pico, t_fin=tir.t_fin, **etiquetas())
+    writer.append(tir.muestras)
+    writer.close()
+    rec = Run(writer.path)
+    idx = current_test_idx
+    test_samples[idx] = rec
+    futuro = analizador.analizar(rec, J=J, D=D, window_s=REG_WINDOW_S, min_samples=MIN_SAMPLES_REG,
+                                 filter_window=MEDIAN_WINDOW, respaldo=perdidas_ref)
+    guardar_resultado({})
+    esperar_analisis(idx, rec, {}, futuro)
+
 # ---------------- RESET ---------------- #
 def reset_all():
-    global test_results, current_test_idx, mostrar_maximos, times_plot, rpms_plot, test_start_time, test_samples
+    global test_results, current_test_idx, mostrar_maximos, test_samples, test_iniciado
+    plan.pausar("muestreo")
+    if auto_var.get():
+        auto_var.set(False)
+        alternar_auto()
+    test_iniciado = False
+    canvas_ind.itemconfig(circulo, fill="#3a3a3a")
     test_results = [None] * NUM_TESTS
     test_samples = [None] * NUM_TESTS
     current_test_idx = 0
     mostrar_maximos = False
-    times_plot.clear()
-    rpms_plot.clear()
-    test_start_time = None
+    plot_lod.clear()
+    captura.cancelar()
     test_btn.config(text=f"Iniciar Test 1", state="normal")
     try:
         desc_btn.config(state="disabled")
     except Exception:
         pass
     update_tests_table()
-    cuenta_label.config(text="")
-    linea_line.set_data([], [])
-    ax_line.set_xlim(0, TEST_DURATION)
-    ax_line.set_ylim(0, 15000)
-    ax_bar.clear()
-    ax_bar.set_xlim(0, TEST_DURATION)
-    ax_bar.set_ylim(0, 150)   # reset bottom plot to km/h range
-    ax_bar.set_ylabel("km/h")
-    ax_bar.yaxis.label.set_color(FG)
-    canvas.draw()
+    refrescar_curvas()
+    set_text(cuenta_label, "")
+    reiniciar_grafica()
     # limpiar resumen
     try:
         metric_widgets["km/h"].config(text="--")
@@ -768,6 +1030,15 @@ def reset_all():
         pass
 
 # ---------------- RUN ---------------- #
-threading.Thread(target=leer_datos, daemon=True).start()
-root.after(100, actualizar)
-root.mainloop()
\ No newline at end of file
+# un planificador para todo: muestreo > cálculo > render (el render se descarta si va cargado)
+plan = Planificador(root)
+plan.bucle("muestreo", SAMPLE_INTERVAL, sample_test, prioridad=2, activo=False)
+plan.bucle("auto", SAMPLE_INTERVAL, muestrear_auto, prioridad=2, activo=False)
+plan.bucle("calculo", COMPUTE_INTERVAL, calcular, prioridad=1)
+plan.bucle("render", RENDER_INTERVAL, actualizar, descartable=True)
+plan.bucle("instrumentacion", 1.0, refrescar_instrumentacion, prioridad=-1, descartable=True, activo=False)
+METRICAS.fuente(lambda: lector.enlace.metricas())
+METRICAS.fuente(plan.metricas)
+root.after(100, arranque_diferido)
+root.mainloop()
+analizador.stop()
\ No newline at end of file